@@ -0,0 +1,221 @@
+"""End-to-end benchmark of the Flask routes against the offline MTA stand-in.
+
+Starts bench/standin.py and the app (each in its own process), drives every
+route at several concurrency levels, prints throughput and p50/p95/p99
+latency, and saves the numbers to bench/results/<commit>.json.
+
+Usage:
+    python bench/run.py                                # defaults
+    python bench/run.py --concurrency 1,16,64 --requests 500 --latency 80 --jitter 40
+    python bench/run.py --compare bench/results/<older commit>.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'flaskr'))
+
+import standin  # noqa: E402
+
+ROUTES = [
+    '/ace',
+    '/1234567s',
+    '/mta/feeds/ace',
+    '/mta/elevator',
+    '/mta/accessibility/Times Sq-42 St',
+    '/mta/stations?q=times',
+    '/mta/status',
+    '/mta/positions',
+    '/mta/plan?from=times sq&to=atlantic av',
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def quiet_request_log():
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+
+def serve_standin(port, fixtures_dir, settings):
+    from werkzeug.serving import make_server
+
+    quiet_request_log()
+    make_server('127.0.0.1', port, standin.create_standin(fixtures_dir, **settings), threaded=True).serve_forever()
+
+
+def serve_app(port, config):
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    quiet_request_log()
+    make_server('127.0.0.1', port, create_app(config), threaded=True).serve_forever()
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def percentile(values, pct):
+    # nearest-rank percentile of an already sorted list
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))]
+
+
+def run_scenario(base_url, route, concurrency, total):
+    def worker(count):
+        session = requests.Session()
+        latencies, errors, payload = [], 0, 0
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + route, timeout=60)
+                payload += len(response.content)
+                if response.status_code >= 400:
+                    errors += 1
+            except requests.RequestException:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+        return latencies, errors, payload
+
+    shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for outcome in outcomes for latency in outcome[0])
+    return {
+        'route': route,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(outcome[1] for outcome in outcomes),
+        'bytes': sum(outcome[2] for outcome in outcomes),
+        'throughput': len(latencies) / elapsed,
+        'mean_ms': 1000 * sum(latencies) / len(latencies),
+        'p50_ms': 1000 * percentile(latencies, 50),
+        'p95_ms': 1000 * percentile(latencies, 95),
+        'p99_ms': 1000 * percentile(latencies, 99),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_results(results, baseline=None):
+    previous = {(r['route'], r['concurrency']): r for r in (baseline or [])}
+    print(f"{'route':40} {'conc':>4} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for r in results:
+        line = (f"{r['route'][:40]:40} {r['concurrency']:>4} {r['throughput']:>9.1f} "
+                f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>6}")
+        old = previous.get((r['route'], r['concurrency']))
+        if old:
+            line += f"   vs base: {100 * (r['throughput'] / old['throughput'] - 1):+.0f}% req/s, " \
+                    f"{100 * (r['p99_ms'] / old['p99_ms'] - 1):+.0f}% p99"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=standin.FIXTURES_DIR)
+    parser.add_argument('--routes', default=','.join(ROUTES))
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route and concurrency level')
+    parser.add_argument('--latency', type=float, default=50, help='stand-in base latency in ms')
+    parser.add_argument('--jitter', type=float, default=25, help='stand-in extra random latency in ms')
+    parser.add_argument('--failure-rate', type=float, default=0)
+    parser.add_argument('--no-poller', action='store_true', help='disable the background feed poller')
+    parser.add_argument('--out', default=RESULTS_DIR)
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.fixtures) or not os.listdir(args.fixtures):
+        print(f"no fixtures in {args.fixtures}, synthesizing")
+        standin.synthesize(args.fixtures)
+
+    standin_port, app_port = free_port(), free_port()
+    settings = {'latency': args.latency / 1000, 'jitter': args.jitter / 1000, 'failure_rate': args.failure_rate}
+    # the app's state goes to a scratch directory, away from the real instance's
+    scratch = tempfile.mkdtemp(prefix='subway-bench-')
+    config = {
+        'MTA_BASE_URL': f"http://127.0.0.1:{standin_port}/Dataservice/mtagtfsfeeds/",
+        'FEED_POLLER_ENABLED': not args.no_poller,
+        'DATABASE': os.path.join(scratch, 'flaskr.sqlite'),
+        'ARCHIVE_DIR': os.path.join(scratch, 'archive'),
+    }
+    processes = [
+        multiprocessing.Process(target=serve_standin, args=(standin_port, args.fixtures, settings), daemon=True),
+        multiprocessing.Process(target=serve_app, args=(app_port, config), daemon=True),
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        base_url = f"http://127.0.0.1:{app_port}"
+        wait_until_up(base_url + '/')
+        routes = [route for route in args.routes.split(',') if route]
+        for route in routes:
+            requests.get(base_url + route, timeout=60)  # warm up caches
+
+        results = []
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            for route in routes:
+                results.append(run_scenario(base_url, route, concurrency, args.requests))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    os.makedirs(args.out, exist_ok=True)
+    commit = git_commit()
+    path = os.path.join(args.out, f"{commit}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'date': datetime.now().isoformat(),
+            'settings': vars(args),
+            'results': results,
+        }, f, indent=2)
+    print(f"saved {path}")
+
+
+if __name__ == '__main__':
+    main()
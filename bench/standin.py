@@ -0,0 +1,231 @@
+"""Offline stand-in for api-endpoint.mta.info.
+
+Serves recorded (or synthesized) GTFS-realtime protobufs and ENE documents
+from a fixtures directory, with configurable latency, jitter and failure
+injection. Point the app at it with
+
+    MTA_BASE_URL = 'http://127.0.0.1:5100/Dataservice/mtagtfsfeeds/'
+
+Usage:
+    python bench/standin.py synth                 # generate synthetic fixtures
+    python bench/standin.py record --count 5      # capture the live MTA feeds
+    python bench/standin.py serve --latency 80 --jitter 40 --failure-rate 0.01
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from urllib.parse import unquote
+
+from flask import Flask, Response, abort, request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'flaskr'))
+from feeds import ENE_PATHS, FEED_PATHS, MTA_BASE_URL  # noqa: E402
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# routes carried by each feed group, for synthetic trips
+FEED_ROUTES = {
+    'ace': ['A', 'C', 'E'],
+    'bdfm': ['B', 'D', 'F', 'M'],
+    'g': ['G'],
+    'jz': ['J', 'Z'],
+    'nqrw': ['N', 'Q', 'R', 'W'],
+    'l': ['L'],
+    '1234567s': ['1', '2', '3', '4', '5', '6', '7', 'GS'],
+    'sir': ['SI'],
+}
+
+STATIONS = [
+    'Times Sq-42 St', '34 St-Penn Station', 'Grand Central-42 St', '14 St-Union Sq',
+    'Fulton St', 'Atlantic Av-Barclays Ctr', 'Jay St-MetroTech', 'Court Sq',
+    'Jackson Hts-Roosevelt Av', '59 St-Columbus Circle', '96 St', '125 St',
+    'Canal St', 'W 4 St-Wash Sq', 'Broadway Junction', 'Lexington Av/59 St',
+]
+
+
+def fixture_name(path):
+    """Directory name for a feed path ("nyct%2Fgtfs-ace" -> "nyct_gtfs-ace")"""
+    return unquote(path).replace('/', '_')
+
+
+def write_fixture(fixtures_dir, path, content):
+    directory = os.path.join(fixtures_dir, fixture_name(path))
+    os.makedirs(directory, exist_ok=True)
+    index = len(os.listdir(directory))
+    with open(os.path.join(directory, f"{index:04d}.bin"), 'wb') as f:
+        f.write(content)
+
+
+def synth_feed(routes, now, rnd, trips_per_route=40, stops_per_trip=25):
+    from google.transit import gtfs_realtime_pb2
+
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '1.0'
+    feed.header.timestamp = now
+    for route in routes:
+        prefix = route[0]
+        for i in range(trips_per_route):
+            direction = 'N' if i % 2 else 'S'
+            entity = feed.entity.add()
+            entity.id = f"{route}{i}"
+            trip_update = entity.trip_update
+            trip_update.trip.trip_id = f"{60000 + i * 150:06d}_{route}..{direction}03R"
+            trip_update.trip.route_id = route
+            trip_update.trip.start_date = time.strftime('%Y%m%d', time.localtime(now))
+            trip_update.trip.start_time = time.strftime('%H:%M:%S', time.localtime(now - 1800 + i * 60))
+            timestamp = now + rnd.randint(-120, 900)
+            first_stop = rnd.randint(1, 20)
+            for k in range(stops_per_trip):
+                stop_time_update = trip_update.stop_time_update.add()
+                stop_time_update.stop_id = f"{prefix}{first_stop + k:02d}{direction}"
+                stop_time_update.arrival.time = timestamp
+                stop_time_update.departure.time = timestamp + 30
+                timestamp += rnd.randint(90, 180)
+    return feed.SerializeToString()
+
+
+def synth_ene(rnd, equipment_per_station=6):
+    outages, upcoming, equipment = [], [], []
+    for station in STATIONS:
+        for n in range(equipment_per_station):
+            equipment_type = 'EL' if n % 2 == 0 else 'ES'
+            equipment_id = f"{equipment_type}{rnd.randint(100, 999)}"
+            equipment.append(
+                f"<equipment><station>{station}</station><equipmentnumber>{equipment_id}</equipmentnumber>"
+                f"<equipmenttype>{equipment_type}</equipmenttype><serving>mezzanine to platform {n}</serving>"
+                f"<trainno>A/C/E</trainno></equipment>"
+            )
+            if rnd.random() < 0.15:
+                outages.append(
+                    f"<outage><station>{station}</station><trainno>A/C/E</trainno><equipment>{equipment_id}</equipment>"
+                    f"<equipmenttype>{equipment_type}</equipmenttype><serving>mezzanine to platform {n}</serving>"
+                    f"<reason>Repair</reason><outagedate>10/18/2026 01:00:00 AM</outagedate>"
+                    f"<estimatedreturntoservice>10/19/2026 01:00:00 AM</estimatedreturntoservice></outage>"
+                )
+            elif rnd.random() < 0.1:
+                upcoming.append(
+                    f"<outage><station>{station}</station><trainno>A/C/E</trainno><equipment>{equipment_id}</equipment>"
+                    f"<equipmenttype>{equipment_type}</equipmenttype><reason>Capital Replacement</reason>"
+                    f"<startdate>10/25/2026</startdate><estimatedreturntoservice>12/01/2026</estimatedreturntoservice></outage>"
+                )
+    return {
+        'current': ('<NYCOutages>' + ''.join(outages) + '</NYCOutages>').encode(),
+        'upcoming': ('<NYCOutages>' + ''.join(upcoming) + '</NYCOutages>').encode(),
+        'equipment': ('<NYCEquipments>' + ''.join(equipment) + '</NYCEquipments>').encode(),
+    }
+
+
+def synthesize(fixtures_dir=FIXTURES_DIR, snapshots=3, seed=0):
+    """Write `snapshots` synthetic captures of every feed and ENE document"""
+    rnd = random.Random(seed)
+    now = int(time.time())
+    for i in range(snapshots):
+        for line, path in FEED_PATHS.items():
+            write_fixture(fixtures_dir, path, synth_feed(FEED_ROUTES[line], now + i * 30, rnd))
+        for name, content in synth_ene(rnd).items():
+            write_fixture(fixtures_dir, ENE_PATHS[name], content)
+
+
+def record(fixtures_dir=FIXTURES_DIR, count=1, interval=30, base_url=MTA_BASE_URL):
+    """Capture `count` rounds of every live feed and ENE document"""
+    import requests
+
+    for i in range(count):
+        for path in list(FEED_PATHS.values()) + list(ENE_PATHS.values()):
+            response = requests.get(base_url + path, timeout=30)
+            response.raise_for_status()
+            write_fixture(fixtures_dir, path, response.content)
+        if i + 1 < count:
+            time.sleep(interval)
+
+
+def create_standin(fixtures_dir=FIXTURES_DIR, latency=0.0, jitter=0.0, failure_rate=0.0,
+                   hang_rate=0.0, hang=30.0, rotate=30.0, seed=None):
+    """Flask app replaying fixtures; settings live in app.config and may be changed live.
+
+    latency / jitter / hang / rotate are seconds. Each request sleeps
+    latency + uniform(0, jitter), fails with a 503 with probability
+    failure_rate and stalls for `hang` seconds with probability hang_rate.
+    Captures of a feed are served in turn, advancing every `rotate` seconds.
+    """
+    app = Flask(__name__)
+    app.config.update(
+        FIXTURES_DIR=fixtures_dir, LATENCY=latency, JITTER=jitter, FAILURE_RATE=failure_rate,
+        HANG_RATE=hang_rate, HANG=hang, ROTATE=rotate,
+    )
+    rnd = random.Random(seed)
+    started = time.monotonic()
+    captures = {}
+
+    def load(name):
+        if name not in captures:
+            directory = os.path.join(app.config['FIXTURES_DIR'], name)
+            if not os.path.isdir(directory):
+                return None
+            captures[name] = []
+            for filename in sorted(os.listdir(directory)):
+                with open(os.path.join(directory, filename), 'rb') as f:
+                    captures[name].append(f.read())
+        return captures[name] or None
+
+    @app.route('/Dataservice/mtagtfsfeeds/<path:path>')
+    def serve(path):
+        bodies = load(fixture_name(path))
+        if bodies is None:
+            abort(404)
+
+        config = app.config
+        time.sleep(config['LATENCY'] + rnd.uniform(0, config['JITTER']))
+        if rnd.random() < config['HANG_RATE']:
+            time.sleep(config['HANG'])
+        if rnd.random() < config['FAILURE_RATE']:
+            return Response('injected failure', status=503)
+
+        body = bodies[int((time.monotonic() - started) // config['ROTATE']) % len(bodies)]
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers={'ETag': etag})
+        return Response(body, headers={'ETag': etag}, mimetype='application/octet-stream')
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    synth = commands.add_parser('synth', help='generate synthetic fixtures')
+    synth.add_argument('--snapshots', type=int, default=3)
+    synth.add_argument('--seed', type=int, default=0)
+
+    rec = commands.add_parser('record', help='capture the live MTA feeds')
+    rec.add_argument('--count', type=int, default=1)
+    rec.add_argument('--interval', type=float, default=30)
+
+    serve = commands.add_parser('serve', help='serve fixtures over HTTP')
+    serve.add_argument('--port', type=int, default=5100)
+    serve.add_argument('--latency', type=float, default=0, help='base latency in ms')
+    serve.add_argument('--jitter', type=float, default=0, help='extra random latency in ms')
+    serve.add_argument('--failure-rate', type=float, default=0)
+    serve.add_argument('--hang-rate', type=float, default=0)
+    serve.add_argument('--hang', type=float, default=30, help='seconds a hung request stalls')
+    serve.add_argument('--rotate', type=float, default=30, help='seconds between captures')
+
+    args = parser.parse_args(argv)
+    if args.command == 'synth':
+        synthesize(args.fixtures, args.snapshots, args.seed)
+    elif args.command == 'record':
+        record(args.fixtures, args.count, args.interval)
+    else:
+        app = create_standin(args.fixtures, args.latency / 1000, args.jitter / 1000, args.failure_rate,
+                             args.hang_rate, args.hang, args.rotate)
+        app.run(port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import propTypes from 'prop-types';
 import axios from 'axios';
-import { stationMapping } from './StationMapping'; 
 import './RealtimeData.css'; 
 import { Link } from 'react-router-dom';
 
@@ -38,37 +37,80 @@ function RealtimeData() {
     { id: 'sir', label: 'Staten Island Railway' }
   ];
 
+  // Resolves with the feed version of the downloaded trips (or null on error)
   const fetchData = (line = currentLines) => {
     setLoading(true);
     setError('');
     
-    axios.get(`/${line}`)
-      .then(({ data }) => {
+    return axios.get(`/${line}`)
+      .then(({ data, headers }) => {
         setTrips(data);
         setTimeUpdated(new Date().toLocaleTimeString());
         setLoading(false);
+        return Number(headers['x-feed-version']);
       })
       .catch(err => {
         setError(`There was a problem retrieving data for line ${line.toUpperCase()}. ${err}`);
         setLoading(false);
+        return null;
       });
   };
 
+  // Apply a feed delta (added / changed / removed trips) to the current trips
+  const applyDelta = (current, delta) => {
+    const removed = new Set(delta.removed);
+    const replaced = new Map([...delta.added, ...delta.changed].map(trip => [trip.trip_id, trip]));
+    const next = current
+      .filter(trip => !removed.has(trip.trip_id))
+      .map(trip => replaced.get(trip.trip_id) || trip);
+    const known = new Set(next.map(trip => trip.trip_id));
+    delta.added.forEach(trip => {
+      if (!known.has(trip.trip_id)) next.push(trip);
+    });
+    return next;
+  };
+
   useEffect(() => {
-    fetchData();
-    // Set up auto-refresh every 60 seconds
-    const intervalId = setInterval(() => {
-      fetchData();
-    }, 60000);
-    
-    // Clean up interval on component unmount
-    return () => clearInterval(intervalId);
+    let source = null;
+    let intervalId = null;
+    let cancelled = false;
+
+    fetchData(currentLines).then(version => {
+      if (cancelled) return;
+      if (!window.EventSource || version === null) {
+        // Fall back to auto-refresh every 60 seconds
+        intervalId = setInterval(() => fetchData(currentLines), 60000);
+        return;
+      }
+      // The server pushes only what changed since the version we downloaded
+      source = new EventSource(`/mta/feeds/${currentLines}/events?since=${version}`);
+      source.addEventListener('delta', (event) => {
+        const delta = JSON.parse(event.data);
+        setTrips(current => applyDelta(current, delta));
+        setTimeUpdated(new Date().toLocaleTimeString());
+      });
+      // Our version fell out of the server's delta history; start over
+      source.addEventListener('reset', () => fetchData(currentLines));
+      // The server refused the stream (too many open) or it failed for good;
+      // EventSource only retries on its own after a dropped connection
+      source.onerror = () => {
+        if (source.readyState !== EventSource.CLOSED || cancelled) return;
+        source = null;
+        intervalId = setInterval(() => fetchData(currentLines), 60000);
+      };
+    });
+
+    // Close the stream / clear the interval on line change or unmount
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+      if (intervalId) clearInterval(intervalId);
+    };
   }, [currentLines]);
 
   const handleLineChange = (line) => {
     setcurrentLines(line);
     setTrips([]);
-    fetchData(line);
     let lines = [];
     if (line == "bdfm") lines = ["B", "D", "F", "M"];
     if (line == "ace") lines = ["A", "C", "E"];
@@ -86,13 +128,9 @@ function RealtimeData() {
     setcurrentLine(line);
   }
 
-  // const getStationName = (stopId) => {
-  //   // This function would ideally map station IDs to readable names
-  //   // For now, we'll just return the ID
-  //   return stopId;
-  // };
-  const getStationName = (stopId) => {
-    return stationMapping[stopId] || stopId;
+  // Stop names are resolved by the server from GTFS static stops.txt
+  const getStationName = (stop) => {
+    return stop.stop_name || stop.stop_id;
   }
 
   const getTripDirection = (tripId) => {
@@ -205,8 +243,8 @@ function RealtimeData() {
                         {trip.stop_time_updates.slice(0, 8).map((stop, j) => (
                           <tr key={stop.stop_id + j}>
                             <td>
-                              <Link to={`/station/${encodeURIComponent(getStationName(stop.stop_id))}`}>
-                                {getStationName(stop.stop_id)}
+                              <Link to={`/station/${encodeURIComponent(getStationName(stop))}`}>
+                                {getStationName(stop)}
                               </Link>
                             </td>
                             <td>{stop.arrival_time ? new Date(stop.arrival_time).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }) : 'N/A'}</td>
@@ -247,8 +285,8 @@ function RealtimeData() {
                         {trip.stop_time_updates.slice(0, 8).map((stop, j) => (
                           <tr key={stop.stop_id + j}>
                             <td>
-                              <Link to={`/station/${encodeURIComponent(getStationName(stop.stop_id))}`}>
-                                {getStationName(stop.stop_id)}
+                              <Link to={`/station/${encodeURIComponent(getStationName(stop))}`}>
+                                {getStationName(stop)}
                               </Link>
                             </td>
                             <td>{stop.arrival_time ? new Date(stop.arrival_time).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }) : 'N/A'}</td>
@@ -0,0 +1,492 @@
+import logging
+import re
+import threading
+import xml.etree.ElementTree as ET
+from bisect import bisect_left
+from datetime import datetime
+
+from feeds import ENE_FEEDS
+from metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+DATE_PATTERN = re.compile(r'(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2} [AP]M)')
+SERVING_PATTERN = re.compile(r'serving (.*?) [YN]')
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_station(name):
+    return name.strip().lower()
+
+
+# bytes handed to the parser at a time
+CHUNK_SIZE = 65536
+
+
+def _chunks(content, size=CHUNK_SIZE):
+    # a body in bytes, or already an iterable of byte chunks (e.g. iter_content())
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        view = memoryview(content)
+        for offset in range(0, len(view), size):
+            yield view[offset:offset + size]
+    else:
+        yield from content
+
+
+def _local(tag):
+    # "{http://www.mta.info/nyct/ene}station" -> "station"
+    return tag.rpartition('}')[2]
+
+
+def iter_elements(chunks, tag):
+    """Each `tag` element of an XML stream as {child name: text}, plus its attributes.
+
+    Elements are handed over as soon as they close. Every completed child
+    of the root is detached from the tree, matching or not, so memory stays
+    bounded by one of them whatever the size of the document. Namespaces
+    are ignored. Raises ET.ParseError.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+
+    def drain():
+        for event, element in parser.read_events():
+            if event == 'start':
+                stack.append(element)
+                continue
+            stack.pop()
+            matched = _local(element.tag) == tag
+            if matched:
+                fields = {_local(name): value for name, value in element.attrib.items()}
+                fields.update((_local(child.tag), child.text or '') for child in element)
+            if stack and (matched or len(stack) == 1):
+                stack[-1].remove(element)
+            if matched:
+                yield fields
+
+    for chunk in chunks:
+        parser.feed(bytes(chunk))
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+
+def iter_text_rows(chunks):
+    """(row, parts) for each data row of the fixed-width text variant, line by line"""
+    pending = b''
+    for chunk in chunks:
+        lines = (pending + bytes(chunk)).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield from _text_row(line)
+    yield from _text_row(pending)
+
+
+def _text_row(line):
+    row = line.decode('utf-8', errors='replace').strip()
+    if row and not row.startswith('0'):
+        yield row, row.split(' ')
+
+
+def _is_xml(chunks):
+    # (is the stream XML?, the same chunks) judged by its first non-blank byte
+    chunks = iter(chunks)
+    seen = []
+    for chunk in chunks:
+        seen.append(chunk)
+        head = bytes(chunk).lstrip()
+        if head:
+            return head.startswith(b'<'), _resume(seen, chunks)
+    return False, iter(seen)
+
+
+def _resume(seen, rest):
+    yield from seen
+    yield from rest
+
+
+def _split_text_row(parts):
+    # station name is everything before the EL/ES marker
+    for equipment_type in ('EL', 'ES'):
+        try:
+            index = parts.index(equipment_type)
+        except ValueError:
+            continue
+        if index > 0:
+            return ' '.join(parts[:index]), equipment_type, index
+        return None
+    return None
+
+
+def iter_current_outages(content):
+    """Records for every <outage> in nyct_ene.xml, as the document streams in"""
+    for outage in iter_elements(_chunks(content), 'outage'):
+        station = outage.get('station', '')
+        if not station:
+            continue
+        yield {
+            'station': station,
+            'equipment_id': outage.get('equipment') or 'Unknown',
+            'equipment_type': outage.get('equipmenttype', ''),
+            'location': outage.get('serving', ''),
+            'reason': outage.get('reason') or 'Unknown',
+            'outage_date': outage.get('outagedate', ''),
+            'estimated_return': outage.get('estimatedreturntoservice', ''),
+            'lines': outage.get('trainno', ''),
+        }
+
+
+def iter_upcoming_outages(content):
+    """Records for nyct_ene_upcoming.xml, which is sometimes served as text"""
+    xml, chunks = _is_xml(_chunks(content))
+    if not xml:
+        yield from _iter_upcoming_text(chunks)
+        return
+    for outage in iter_elements(chunks, 'outage'):
+        station = outage.get('station', '')
+        if not station:
+            continue
+        yield {
+            'station': station,
+            'equipment_id': outage.get('equipment') or None,
+            'equipment_type': outage.get('equipmenttype', ''),
+            'reason': outage.get('reason') or 'Scheduled Maintenance',
+            'start_date': outage.get('startdate', ''),
+            'end_date': outage.get('estimatedreturntoservice', ''),
+            'lines': outage.get('trainno', ''),
+        }
+
+
+def _iter_upcoming_text(chunks):
+    for row, parts in iter_text_rows(chunks):
+        if len(parts) < 10:
+            continue
+        split = _split_text_row(parts)
+        if split is None:
+            continue
+        station, equipment_type, _ = split
+        dates = DATE_PATTERN.findall(row)
+        yield {
+            'station': station,
+            'equipment_id': None,
+            'equipment_type': equipment_type,
+            'reason': 'Capital Replacement' if 'Capital Replacement' in row else 'Scheduled Maintenance',
+            'start_date': dates[0] if len(dates) > 0 else '',
+            'end_date': dates[1] if len(dates) > 1 else '',
+            'lines': '',
+        }
+
+
+def iter_equipment(content):
+    """Records for nyct_ene_equipments.xml, which is sometimes served as text"""
+    xml, chunks = _is_xml(_chunks(content))
+    if not xml:
+        yield from _iter_equipment_text(chunks)
+        return
+    for equipment in iter_elements(chunks, 'equipment'):
+        station = equipment.get('station', '')
+        if not station:
+            continue
+        equipment_id = equipment.get('equipmentnumber') or equipment.get('equipmentno', '')
+        yield {
+            'station': station,
+            'equipment_id': equipment_id.strip() or None,
+            'equipment_type': equipment.get('equipmenttype', ''),
+            'location': equipment.get('serving', ''),
+            'complex_id': equipment.get('stationcomplexid', ''),
+            'lines': equipment.get('trainno', ''),
+        }
+
+
+def _iter_equipment_text(chunks):
+    for row, parts in iter_text_rows(chunks):
+        split = _split_text_row(parts)
+        if split is None:
+            continue
+        station, equipment_type, index = split
+        equipment_id = parts[index + 1] if index + 1 < len(parts) and parts[index + 1].strip() else None
+        serving = SERVING_PATTERN.search(row) if 'serving' in row.lower() else None
+        yield {
+            'station': station,
+            'equipment_id': equipment_id,
+            'equipment_type': equipment_type,
+            'location': serving.group(1) if serving else '',
+            'complex_id': '',
+            'lines': '',
+        }
+
+
+def parse_current_outages(content):
+    return list(iter_current_outages(content))
+
+
+def parse_upcoming_outages(content):
+    return list(iter_upcoming_outages(content))
+
+
+def parse_equipment(content):
+    return list(iter_equipment(content))
+
+
+class AccessibilityIndex:
+    """Normalized ENE records for one revision of the three ENE documents.
+
+    Records are grouped by normalized station name, with lookup tables from
+    station complex id and equipment id to station, and a token index that
+    narrows free-text station queries to a handful of candidates. Tokens
+    and all their suffixes are also kept sorted, so the words of a partial
+    query are looked up by prefix instead of scanning every station.
+    `missing` names the documents that could not be fetched at all.
+    """
+
+    def __init__(self, outages=(), upcoming=(), equipment=(), missing=()):
+        self.missing = tuple(missing)
+        self.stations = {}
+        self.by_complex = {}
+        self.by_equipment = {}
+        self.tokens = {}
+        self._matches = {}
+
+        for kind, records in (('outages', outages), ('upcoming', upcoming), ('equipment', equipment)):
+            for record in records:
+                station = self._station(record['station'])
+                station[kind].append(record)
+                if record.get('equipment_id'):
+                    self.by_equipment.setdefault(record['equipment_id'].upper(), station['key'])
+                if record.get('complex_id'):
+                    self.by_complex.setdefault(record['complex_id'], station['key'])
+        # (suffix, token) of every token, sorted: a bisect finds the tokens
+        # starting with or containing a word
+        self.suffixes = sorted({(token[start:], token) for token in self.tokens for start in range(len(token))})
+
+    def _station(self, name):
+        key = normalize_station(name)
+        station = self.stations.get(key)
+        if station is None:
+            station = self.stations[key] = {
+                'key': key, 'outages': [], 'upcoming': [], 'equipment': []
+            }
+            for token in TOKEN_PATTERN.findall(key):
+                self.tokens.setdefault(token, set()).add(key)
+        return station
+
+    def match(self, query):
+        """Station keys matching `query` the way station pages search.
+
+        A station matches when either name contains the other. Complex and
+        equipment ids resolve directly to their station.
+        """
+        query = normalize_station(query)
+        if not query:
+            return []
+        cached = self._matches.get(query)
+        if cached is not None:
+            return cached
+
+        if query in self.by_complex:
+            keys = [self.by_complex[query]]
+        elif query.upper() in self.by_equipment:
+            keys = [self.by_equipment[query.upper()]]
+        else:
+            tokens = TOKEN_PATTERN.findall(query)
+            # a key containing the query has a token containing its first word
+            # (which may start mid-word, as in "imes sq") and tokens starting
+            # with each later word (the last may be cut short, as in "times s")
+            if tokens:
+                narrowing = [self._containing(tokens[0], whole=False)]
+                narrowing += [self._containing(token) for token in tokens[1:]]
+                candidates = set.intersection(*sorted(narrowing, key=len))
+            else:
+                candidates = set(self.stations)
+            # a key contained in the query has tokens that are pieces of its words
+            for token in tokens:
+                for start in range(len(token)):
+                    for end in range(start + 1, len(token) + 1):
+                        candidates |= self.tokens.get(token[start:end], set())
+            keys = sorted(key for key in candidates if query in key or key in query)
+
+        if len(self._matches) >= 1024:
+            self._matches.clear()
+        self._matches[query] = keys
+        return keys
+
+    def _containing(self, word, whole=True):
+        # station keys with a token starting with `word` (or, unless `whole`, containing it)
+        keys = set()
+        suffixes = self.suffixes
+        for position in range(bisect_left(suffixes, (word,)), len(suffixes)):
+            suffix, token = suffixes[position]
+            if not suffix.startswith(word):
+                break
+            if not whole or suffix == token:
+                keys |= self.tokens[token]
+        return keys
+
+    def lookup(self, query):
+        """Build the /mta/accessibility response for `query`"""
+        now = datetime.now().isoformat()
+        station_data = {
+            'station_id': query,
+            'elevators': [],
+            'escalators': [],
+            'upcoming_outages': [],
+            'last_updated': now,
+            # some ENE documents were unavailable, so this may be incomplete
+            'degraded': bool(self.missing),
+        }
+        groups = {'EL': station_data['elevators'], 'ES': station_data['escalators']}
+
+        stations = [self.stations[key] for key in self.match(query)]
+        out_of_service = {'EL': set(), 'ES': set()}
+        for station in stations:
+            for outage in station['outages']:
+                if outage['equipment_type'] not in groups:
+                    continue
+                groups[outage['equipment_type']].append({
+                    'id': outage['equipment_id'],
+                    'location': outage['location'],
+                    'status': f"Out of Service - {outage['reason']}",
+                    'outage_date': outage['outage_date'],
+                    'estimated_return': outage['estimated_return'],
+                    'is_working': False,
+                    'last_updated': now
+                })
+                out_of_service[outage['equipment_type']].add(outage['equipment_id'])
+
+        for station in stations:
+            for outage in station['upcoming']:
+                station_data['upcoming_outages'].append({
+                    'type': 'Elevator' if outage['equipment_type'] == 'EL' else 'Escalator',
+                    'station': outage['station'],
+                    'start_date': outage['start_date'],
+                    'end_date': outage['end_date'],
+                    'reason': outage['reason']
+                })
+
+        # Counter for generating sequential IDs for working equipment
+        counters = {'EL': 1, 'ES': 1}
+        for station in stations:
+            for equipment in station['equipment']:
+                equipment_type = equipment['equipment_type']
+                equipment_id = equipment['equipment_id']
+                if not equipment_id:
+                    if equipment_type in counters:
+                        equipment_id = f"{equipment_type}{counters[equipment_type]:03d}"
+                        counters[equipment_type] += 1
+                    else:
+                        equipment_id = 'Unknown'
+                if equipment_type not in groups or equipment_id in out_of_service[equipment_type]:
+                    continue
+                groups[equipment_type].append({
+                    'id': equipment_id,
+                    'location': equipment['location'],
+                    'status': "In Service",
+                    'is_working': True,
+                    'last_updated': now
+                })
+
+        return station_data
+
+
+PARSERS = {
+    'current': parse_current_outages,
+    'upcoming': parse_upcoming_outages,
+    'equipment': parse_equipment,
+}
+
+
+class AccessibilityStore:
+    """Keeps an AccessibilityIndex built from the latest ENE documents.
+
+    A daemon thread revalidates the three documents every `interval`
+    seconds; the index is only rebuilt when one of them actually changed,
+    and every callback registered with `add_listener(callback(index))` is
+    then called with the new index.
+    The documents are fetched concurrently, and one that cannot be fetched
+    in time falls back to its last cached copy, or contributes no records.
+    """
+
+    def __init__(self, upstream, fanout, feeds=ENE_FEEDS, interval=180, metrics=None):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.upstream = upstream
+        self.fanout = fanout
+        self.feeds = feeds
+        self.interval = interval
+        self._index = None
+        self._revisions = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ene-store', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("ENE refresh failed")
+            self._stop.wait(self.interval)
+
+    def refresh(self):
+        """Revalidate all three documents upstream and reindex if needed"""
+        return self._build(self.upstream.revalidate)
+
+    def index(self):
+        """Return the current index, fetching through the upstream cache"""
+        index = self._index
+        if index is not None:
+            # the usual case: all three documents are fresh and already indexed
+            entries = [self.upstream.peek(url) for url in self.feeds.values()]
+            if all(entry is not None and entry.age <= self.upstream.ttl_for(entry.url) for entry in entries) \
+                    and tuple(entry.revision for entry in entries) == self._revisions:
+                return index
+        return self._build(self.upstream.fetch)
+
+    def lookup(self, query):
+        return self.index().lookup(query)
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _build(self, fetch):
+        entries, errors = self.fanout.map(lambda name: fetch(self.feeds[name]), self.feeds)
+        for name, url in self.feeds.items():
+            if name not in entries:
+                logger.warning("ENE fetch failed document=%s error=%s", name, errors.get(name))
+                entries[name] = self.upstream.peek(url)
+
+        revisions = tuple(entries[name].revision if entries[name] is not None else None for name in self.feeds)
+        with self._lock:
+            if self._index is None or revisions != self._revisions:
+                records = {}
+                with self.metrics.phase('parse'):
+                    for name, entry in entries.items():
+                        try:
+                            records[name] = entry.parse(PARSERS[name]) if entry is not None else []
+                        except ET.ParseError as e:
+                            logger.warning("ENE document unreadable document=%s error=%s", name, e)
+                            records[name] = []
+                with self.metrics.phase('transform'):
+                    missing = [name for name in self.feeds if entries[name] is None]
+                    self._index = AccessibilityIndex(records['current'], records['upcoming'], records['equipment'],
+                                                     missing)
+                self._revisions = revisions
+                for listener in self._listeners:
+                    try:
+                        listener(self._index)
+                    except Exception:
+                        logger.exception("accessibility listener failed")
+            return self._index
@@ -1,10 +1,30 @@
 import os
-from flask import Flask, jsonify, render_template
-import requests
-import xml.etree.ElementTree as ET
-from google.transit import gtfs_realtime_pb2
+from flask import Flask, Response, g, jsonify, make_response, render_template, request, stream_with_context
 from datetime import datetime
-import re
+from heapq import merge
+from itertools import islice
+import json
+import logging
+import queue
+import threading
+import time
+
+from accessibility import AccessibilityStore, iter_current_outages
+from archive import Archive, ArchiveRecorder, ReplayAdapter, parse_time
+from bodies import FORMATS, Body, encode, formats, msgpack
+from columnar import TRIP_FIELDS, format_time
+from deltas import render_delta
+from fanout import FanOut
+from feeds import ENE_PATHS, FEED_PATHS, MTA_BASE_URL, FeedPoller, feed_urls
+from metrics import Metrics
+from planner import JourneyPlanner, StaticTimetable
+from positions import PositionEngine, Shapes
+from stations import StationCatalog
+from status import ServiceStatus
+from store import SharedStore
+from streaming import NDJSON_MIMETYPE, SEPARATORS, choose_encoding, chunked, json_array, ndjson
+from subscriptions import SubscriptionEngine
+from upstream import UpstreamClient
 
 
 def create_app(test_config=None):
@@ -13,6 +33,91 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY='dev',
         DATABASE=os.path.join(app.instance_path, 'flaskr.sqlite'),
+        # where the MTA feeds live; point at bench/standin.py to run offline
+        MTA_BASE_URL=MTA_BASE_URL,
+        # seconds between background refreshes of each GTFS-realtime feed
+        FEED_POLL_INTERVAL=30,
+        ENE_POLL_INTERVAL=180,
+        FEED_POLLER_ENABLED=True,
+        # seconds an upstream response is fresh (GTFS-rt feeds / ENE documents)
+        FEED_TTL=20,
+        ENE_TTL=180,
+        # seconds past its TTL a response may still be served while it is
+        # revalidated in the background
+        FEED_MAX_STALENESS=120,
+        # seconds a multi-upstream request waits for each upstream
+        UPSTREAM_TIMEOUT=10,
+        # seconds to connect to / wait for data from one upstream request
+        UPSTREAM_CONNECT_TIMEOUT=3.05,
+        UPSTREAM_READ_TIMEOUT=10,
+        # consecutive failures that open an upstream's circuit, and seconds
+        # it stays open before a probe request is allowed through
+        UPSTREAM_FAILURE_THRESHOLD=5,
+        UPSTREAM_COOLDOWN=30,
+        # seconds an upstream error is remembered and returned without a call
+        UPSTREAM_NEGATIVE_TTL=5,
+        # latency percentile after which a second, hedged request is sent
+        # (None disables hedging)
+        UPSTREAM_HEDGE_PERCENTILE=95,
+        # deltas kept per feed for ?since= and event-stream catch-up
+        FEED_DELTA_HISTORY=20,
+        # seconds between keep-alive comments on idle event streams
+        SSE_HEARTBEAT=15,
+        # event streams open at once in this process; each holds a thread of a
+        # threaded (gthread/gevent) worker, and past this clients are told to poll
+        SSE_MAX_STREAMS=64,
+        # stream feed responses that are not precomputed (filtered queries, or
+        # all of them without PRECOMPUTED_BODIES) trip by trip instead of
+        # building them in memory first, compressed on the fly with gzip (or
+        # brotli, when installed) in chunks of STREAM_CHUNK_BYTES
+        STREAM_RESPONSES=True,
+        STREAM_CHUNK_BYTES=16384,
+        STREAM_COMPRESSION_LEVEL=6,
+        # serialize and compress each whole-feed response once per snapshot
+        # version and answer repeats with a copy of those bytes (or a 304)
+        PRECOMPUTED_BODIES=True,
+        # favorites/alerts (kept in the shared store when it is enabled), and the webhook POST timeout
+        MAX_SUBSCRIPTIONS=10000,
+        WEBHOOK_TIMEOUT=5,
+        # let subscriptions POST to webhooks (public addresses only), limited
+        # to WEBHOOK_ALLOWED_HOSTS when that is a list of host names
+        WEBHOOKS_ENABLED=False,
+        WEBHOOK_ALLOWED_HOSTS=None,
+        # app log level; DEBUG adds per-request accessibility summaries
+        LOG_LEVEL='WARNING',
+        # share feeds across worker processes through DATABASE, with one
+        # elected process polling the MTA
+        SHARED_STORE_ENABLED=True,
+        # seconds the poller lease lasts without renewal
+        SHARED_STORE_LEASE=15,
+        # seconds between checks of the shared store by non-polling workers
+        SHARED_STORE_SYNC_INTERVAL=2,
+        # record every upstream document, for analytics and replay (off by
+        # default, so a run against another upstream never mixes into it)
+        ARCHIVE_ENABLED=False,
+        ARCHIVE_DIR=os.path.join(app.instance_path, 'archive'),
+        # seconds of history per segment file; whole segments are dropped
+        # once older than ARCHIVE_RETENTION seconds or past ARCHIVE_MAX_BYTES
+        ARCHIVE_SEGMENT_SECONDS=3600,
+        ARCHIVE_RETENTION=7 * 86400,
+        ARCHIVE_MAX_BYTES=512 * 2 ** 20,
+        # serve archived history instead of the MTA: epoch seconds or ISO
+        # 8601 times, played back REPLAY_SPEED times faster than real time
+        REPLAY_FROM=None,
+        REPLAY_UNTIL=None,
+        REPLAY_SPEED=1.0,
+        # seconds an estimated train positions frame is reused, and how far
+        # ahead a train with no known previous stop is shown approaching
+        POSITIONS_INTERVAL=5,
+        POSITIONS_HORIZON=300,
+        # journey planner: seconds to change between stations of a complex,
+        # and the most vehicles one journey may board
+        PLANNER_TRANSFER_SECONDS=180,
+        PLANNER_MAX_ROUNDS=4,
+        # directory holding GTFS static stops.txt (and optionally transfers.txt,
+        # shapes.txt, and trips.txt/stop_times.txt/calendar.txt for planning
+        # beyond the realtime predictions)
+        GTFS_STATIC_DIR=os.path.join(app.root_path, 'gtfs_static'),
     )
 
     if test_config is None:
@@ -28,501 +133,690 @@ def create_app(test_config=None):
     except OSError:
         pass
 
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+
+    # Per-route, per-phase timings and upstream/cache counters for /metrics
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        route = request.endpoint or 'unknown'
+        metrics.observe('subway_request_duration_seconds', time.perf_counter() - g.get('request_started', time.perf_counter()),
+                        route=route, status=response.status_code)
+        if not response.is_streamed:
+            metrics.inc('subway_response_bytes_total', response.content_length or 0, route=route)
+        return response
+
+    def serialize(payload):
+        with metrics.phase('serialize'):
+            return jsonify(payload)
+
+    def render(template, **context):
+        with metrics.phase('serialize'):
+            return make_response(render_template(template, **context))
+
+    @app.route('/metrics')
+    def get_metrics():
+        """Prometheus text exposition of the counters and timings above"""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
     # Homepage route
     @app.route('/')
     def homepage():
-        return render_template('homepage.html')
+        return render_template('homepage.html', status=status.overview())
+
+    # Station catalog from GTFS static, shared by every route that names stops
+    stations = StationCatalog.load(app.config['GTFS_STATIC_DIR'])
+    app.extensions['stations'] = stations
+
+    replay_from = parse_time(app.config['REPLAY_FROM'])
+    if replay_from is not None:
+        # replayed time runs faster, so poll and expire proportionally faster
+        speed = app.config['REPLAY_SPEED']
+        for key in ('FEED_POLL_INTERVAL', 'ENE_POLL_INTERVAL', 'FEED_TTL', 'ENE_TTL'):
+            app.config[key] = max(1, app.config[key] / speed)
+
+    # Cross-process store: one worker polls, the others read what it wrote
+    store = None
+    if app.config['SHARED_STORE_ENABLED'] and replay_from is None:
+        # rows the leader has not confirmed for this long are not served
+        max_age = max(app.config['FEED_TTL'], app.config['ENE_TTL']) + app.config['FEED_MAX_STALENESS']
+        store = SharedStore(app.config['DATABASE'], lease_ttl=app.config['SHARED_STORE_LEASE'], max_age=max_age,
+                            upstream=app.config['MTA_BASE_URL'])
+        app.extensions['store'] = store
+
+    # Shared upstream fetch layer used by every route
+    FEEDS = feed_urls(FEED_PATHS, app.config['MTA_BASE_URL'])
+    ENE_FEEDS = feed_urls(ENE_PATHS, app.config['MTA_BASE_URL'])
+    ttls = {url: app.config['FEED_TTL'] for url in FEEDS.values()}
+    ttls.update({url: app.config['ENE_TTL'] for url in ENE_FEEDS.values()})
+    upstream = UpstreamClient(
+        ttls=ttls,
+        max_stale=app.config['FEED_MAX_STALENESS'],
+        metrics=metrics,
+        store=store,
+        timeout=(app.config['UPSTREAM_CONNECT_TIMEOUT'], app.config['UPSTREAM_READ_TIMEOUT']),
+        failure_threshold=app.config['UPSTREAM_FAILURE_THRESHOLD'],
+        cooldown=app.config['UPSTREAM_COOLDOWN'],
+        negative_ttl=app.config['UPSTREAM_NEGATIVE_TTL'],
+        hedge_percentile=app.config['UPSTREAM_HEDGE_PERCENTILE'],
+    )
+    app.extensions['upstream'] = upstream
+
+    # Archive of every upstream document, or the source of a replay
+    streams = dict(zip(FEEDS.values(), FEEDS))
+    streams.update({url: f"ene-{name}" for name, url in ENE_FEEDS.items()})
+    archive = None
+    if app.config['ARCHIVE_ENABLED'] or replay_from is not None:
+        archive = Archive(app.config['ARCHIVE_DIR'], segment_seconds=app.config['ARCHIVE_SEGMENT_SECONDS'],
+                          max_bytes=app.config['ARCHIVE_MAX_BYTES'], max_age=app.config['ARCHIVE_RETENTION'])
+        app.extensions['archive'] = archive
+    recorder = None
+    # what "now" is for predictions: the replayed time during a replay
+    clock = time.time
+    if replay_from is not None:
+        replay = ReplayAdapter(archive, streams, replay_from, parse_time(app.config['REPLAY_UNTIL']),
+                               speed=app.config['REPLAY_SPEED'])
+        upstream.session.mount(app.config['MTA_BASE_URL'], replay)
+        app.extensions['replay'] = replay
+        clock = replay.now
+    elif archive is not None:
+        recorder = ArchiveRecorder(archive, streams, delta_streams=FEEDS)
+        app.extensions['archive_recorder'] = recorder
+
+    # Thread pool for calls that hit several upstreams at once
+    fanout = FanOut(timeout=app.config['UPSTREAM_TIMEOUT'])
+    app.extensions['fanout'] = fanout
+
+    # Background poller keeps a decoded snapshot of every feed in memory
+    poller = FeedPoller(upstream, fanout, FEEDS, interval=app.config['FEED_POLL_INTERVAL'],
+                        delta_history=app.config['FEED_DELTA_HISTORY'], metrics=metrics, stations=stations,
+                        store=store, sync_interval=app.config['SHARED_STORE_SYNC_INTERVAL'])
+    app.extensions['feed_poller'] = poller
+
+    # Indexed elevator/escalator store built from the three ENE documents
+    accessibility = AccessibilityStore(upstream, fanout, ENE_FEEDS, interval=app.config['ENE_POLL_INTERVAL'],
+                                       metrics=metrics)
+    app.extensions['accessibility'] = accessibility
+
+    # Per-route service status, updated from every feed delta and ENE rebuild
+    status = ServiceStatus(clock=clock)
+    poller.add_listener(status.on_snapshot)
+    accessibility.add_listener(status.on_accessibility)
+    app.extensions['status'] = status
+
+    # Estimated train positions for the map, interpolated between predicted stops
+    positions = PositionEngine(stations, Shapes.load(app.config['GTFS_STATIC_DIR']),
+                               interval=app.config['POSITIONS_INTERVAL'], horizon=app.config['POSITIONS_HORIZON'],
+                               clock=clock)
+    poller.add_listener(positions.on_snapshot)
+    app.extensions['positions'] = positions
+
+    # Journey planner over realtime predictions and the static timetable
+    planner = JourneyPlanner(stations, StaticTimetable.load(app.config['GTFS_STATIC_DIR']),
+                             transfer_seconds=app.config['PLANNER_TRANSFER_SECONDS'],
+                             max_rounds=app.config['PLANNER_MAX_ROUNDS'], clock=clock)
+    app.extensions['planner'] = planner
+
+    # Favorites and alerts, evaluated against each delta and ENE rebuild
+    subscriptions = SubscriptionEngine(stations, max_subscriptions=app.config['MAX_SUBSCRIPTIONS'],
+                                       webhook_timeout=app.config['WEBHOOK_TIMEOUT'],
+                                       webhooks=app.config['WEBHOOKS_ENABLED'],
+                                       webhook_hosts=app.config['WEBHOOK_ALLOWED_HOSTS'], store=store,
+                                       clock=clock)
+    poller.add_listener(subscriptions.on_snapshot)
+    accessibility.add_listener(subscriptions.on_accessibility)
+    app.extensions['subscriptions'] = subscriptions
+
+    if app.config['FEED_POLLER_ENABLED']:
+        if store is not None:
+            store.start()
+        if recorder is not None:
+            upstream.add_listener(recorder.record)
+            recorder.start()
+        poller.start()
+        accessibility.start()
+
+    def requested_time_format():
+        time_format = request.args.get('time_format', 'iso')
+        if time_format not in ('iso', 'epoch'):
+            raise ValueError('time_format must be iso or epoch')
+        return time_format
+
+    def requested_trip_filters():
+        """Filters for Snapshot.query from the query string"""
+        args = request.args
+        direction = (args.get('direction') or '').upper()[:1] or None
+        if direction not in (None, 'N', 'S'):
+            raise ValueError('direction must be N or S')
+        fields = None
+        if args.get('fields'):
+            fields = tuple(field.strip() for field in args['fields'].split(',') if field.strip())
+            unknown = set(fields) - set(TRIP_FIELDS)
+            if unknown:
+                raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        filters = {
+            'route_id': args.get('route') or None,
+            'direction': direction,
+            'stop_id': args.get('stop') or None,
+            'fields': fields,
+        }
+        for name in ('after', 'before', 'limit'):
+            value = args.get(name)
+            if value is not None:
+                if not value.isdigit():
+                    raise ValueError(f"{name} must be a non-negative integer")
+                filters[name] = int(value)
+        return filters
+
+    def sse(event, data, event_id=None):
+        message = f"event: {event}\n"
+        if event_id is not None:
+            message += f"id: {event_id}\n"
+        return message + f"data: {json.dumps(data, separators=SEPARATORS)}\n\n"
+
+    # an event stream occupies a worker thread for as long as the client stays
+    stream_slots = threading.BoundedSemaphore(app.config['SSE_MAX_STREAMS'])
+
+    def stream_unavailable():
+        response = jsonify({'error': 'Too many event streams, poll instead'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(app.config['SSE_HEARTBEAT'])
+        return response
+
+    def event_stream(events):
+        """Event-stream response; the caller has taken one of `stream_slots`"""
+        response = Response(stream_with_context(events), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        response.call_on_close(stream_slots.release)
+        return response
+
+    def streamed(pieces, mimetype):
+        """A chunked response of text `pieces`, compressed when the client allows it"""
+        encoding = choose_encoding(request.accept_encodings)
+        route = request.endpoint
+
+        def body():
+            sent = 0
+            with metrics.phase('serialize'):
+                for chunk in chunked(pieces, encoding, app.config['STREAM_CHUNK_BYTES'],
+                                     app.config['STREAM_COMPRESSION_LEVEL']):
+                    sent += len(chunk)
+                    yield chunk
+            metrics.inc('subway_response_bytes_total', sent, route=route)
+
+        response = Response(stream_with_context(body()), mimetype=mimetype)
+        response.headers['Vary'] = 'Accept-Encoding'
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def requested_format():
+        """One of FORMATS, from ?format= or else the Accept header"""
+        name = request.args.get('format')
+        if name is None:
+            accepted = {FORMATS[name]: name for name in formats()}
+            return accepted[request.accept_mimetypes.best_match(list(accepted)) or FORMATS['json']]
+        if name not in formats():
+            raise ValueError(f"format must be one of {', '.join(formats())}")
+        return name
+
+    def precomputed(snapshot, key, mimetype, build):
+        """Response with the snapshot's cached body for `key`, or a 304 if the client has it"""
+        built = []
+
+        def make_body():
+            built.append(True)
+            with metrics.phase('serialize'):
+                return Body(build(), mimetype, snapshot.line, snapshot.version,
+                            level=app.config['STREAM_COMPRESSION_LEVEL'])
+
+        body = snapshot.body(key, make_body)
+        encoding = choose_encoding(request.accept_encodings)
+        etag = body.etag(encoding)
+        if request.if_none_match.contains(etag):
+            metrics.inc('subway_cache_requests_total', cache='body', result='not_modified')
+            response = Response(status=304)
+        else:
+            metrics.inc('subway_cache_requests_total', cache='body', result='miss' if built else 'hit')
+            response = Response(body.encoded(encoding), mimetype=body.mimetype)
+            if encoding is not None:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept, Accept-Encoding'
+        # the feed moves on; clients must revalidate, which is what the ETag is for
+        response.headers['Cache-Control'] = 'no-cache'
+        return with_snapshot_headers(response, snapshot)
+
+    def with_snapshot_headers(response, snapshot):
+        response.headers['X-Feed-Version'] = str(snapshot.version)
+        response.headers['X-Feed-Age'] = f"{snapshot.age:.1f}"
+        return response
 
     # Routes for Subway Realtime Feeds
+    @app.route('/mta/feeds/all')
+    def get_all_subway_feeds():
+        """Every feed group in one response, fetched concurrently"""
+        try:
+            time_format = requested_time_format()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        snapshots, errors = poller.get_all()
+        with metrics.phase('transform'):
+            payload = {
+                'feeds': {
+                    line: {
+                        'version': snapshot.version,
+                        'age': round(snapshot.age, 1),
+                        'trips': snapshot.records(time_format=time_format)
+                    }
+                    for line, snapshot in snapshots.items()
+                },
+                'errors': errors,
+                'last_updated': datetime.now().isoformat()
+            }
+        return serialize(payload)
+
     @app.route('/mta/feeds/<line>')
     def get_subway_feed(line):
-        feeds = {
-            'ace': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-ace',
-            'bdfm': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-bdfm',
-            'g': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-g',
-            'jz': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-jz',
-            'nqrw': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-nqrw',
-            'l': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-l',
-            '1234567s': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs',
-            'sir': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-si'
-        }
-        url = feeds.get(line)
-        if not url:
+        if line not in FEEDS:
             return jsonify({'error': 'Invalid line specified'}), 404
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-
-            # Parse Protobuf data
-            feed = gtfs_realtime_pb2.FeedMessage()
-            feed.ParseFromString(response.content)
-
-            # Extract relevant data
-            data = []
-            for entity in feed.entity:
-                if entity.HasField('trip_update'):
-                    trip_update = entity.trip_update
-                    data.append({
-                        'trip_id': trip_update.trip.trip_id,
-                        'start_time': trip_update.trip.start_time,
-                        'start_date': trip_update.trip.start_date,
-                        'stop_time_updates': [
-                            {
-                                'stop_id': stop_time_update.stop_id,
-                                'arrival_time': datetime.fromtimestamp(stop_time_update.arrival.time).strftime('%Y-%m-%d %H:%M:%S') if stop_time_update.HasField('arrival') else None,
-                                'departure_time': datetime.fromtimestamp(stop_time_update.departure.time).strftime('%Y-%m-%d %H:%M:%S') if stop_time_update.HasField('departure') else None
-                            }
-                            for stop_time_update in trip_update.stop_time_update
-                        ]
-                    })
-
-            return render_template('subway_feed.html', line=line.upper(), data=data)
+            snapshot = poller.get(line)
+            if app.config['PRECOMPUTED_BODIES']:
+                return precomputed(snapshot, ('html',), 'text/html', lambda: render_template(
+                    'subway_feed.html', line=line.upper(), data=snapshot.data).encode('utf-8'))
+            if app.config['STREAM_RESPONSES']:
+                # rows are rendered as the template loop pulls trips off the table
+                template = app.jinja_env.get_template('subway_feed.html')
+                context = {'line': line.upper(), 'data': snapshot.trips.iter_records()}
+                app.update_template_context(context)
+                return with_snapshot_headers(streamed(template.generate(context), 'text/html'), snapshot)
+            with metrics.phase('transform'):
+                data = snapshot.data
+            return with_snapshot_headers(render('subway_feed.html', line=line.upper(), data=data), snapshot)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
     # test subway data as backend
     @app.route('/<line>')
     def get_subway(line):
-        feeds = {
-            'ace': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-ace',
-            'bdfm': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-bdfm',
-            'g': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-g',
-            'jz': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-jz',
-            'nqrw': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-nqrw',
-            'l': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-l',
-            '1234567s': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs',
-            'sir': 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-si'
-        }
-        url = feeds.get(line)
-        if not url:
+        if line not in FEEDS:
             return jsonify({'error': 'Invalid line specified'}), 404
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-
-            # Parse Protobuf data
-            feed = gtfs_realtime_pb2.FeedMessage()
-            feed.ParseFromString(response.content)
-
-            # Extract relevant data
-            data = []
-            for entity in feed.entity:
-                if entity.HasField('trip_update'):
-                    trip_update = entity.trip_update
-                    data.append({
-                        'trip_id': trip_update.trip.trip_id,
-                        'start_time': trip_update.trip.start_time,
-                        'start_date': trip_update.trip.start_date,
-                        'stop_time_updates': [
-                            {
-                                'stop_id': stop_time_update.stop_id,
-                                'arrival_time': datetime.fromtimestamp(stop_time_update.arrival.time).strftime('%Y-%m-%d %H:%M:%S') if stop_time_update.HasField('arrival') else None,
-                                'departure_time': datetime.fromtimestamp(stop_time_update.departure.time).strftime('%Y-%m-%d %H:%M:%S') if stop_time_update.HasField('departure') else None
-                            }
-                            for stop_time_update in trip_update.stop_time_update
-                        ]
-                    })
-
-            return data
+            time_format = requested_time_format()
+            filters = requested_trip_filters()
+            format = requested_format()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        since = request.args.get('since', type=int)
+        whole_feed = all(value is None for value in filters.values())
+        if format != 'json' and since is not None:
+            return jsonify({'error': 'since is only served as json'}), 400
+        if format == 'protobuf' and not whole_feed:
+            return jsonify({'error': 'protobuf serves the whole feed only'}), 400
+        try:
+            snapshot = poller.get(line)
+            if since is None and whole_feed and (format == 'protobuf' or app.config['PRECOMPUTED_BODIES']):
+                return precomputed(snapshot, (format, time_format), FORMATS[format],
+                                   lambda: encode(snapshot, format, time_format))
+            if format == 'msgpack':
+                with metrics.phase('transform'):
+                    trips = snapshot.query(time_format=time_format, **filters)
+                with metrics.phase('serialize'):
+                    return with_snapshot_headers(Response(msgpack.packb(trips), mimetype=FORMATS[format]), snapshot)
+            if since is None and (format == 'ndjson' or app.config['STREAM_RESPONSES']):
+                # trips are materialized and serialized one at a time as the body is sent
+                trips = snapshot.iter_query(time_format=time_format, **filters)
+                if format == 'ndjson':
+                    return with_snapshot_headers(streamed(ndjson(trips), NDJSON_MIMETYPE), snapshot)
+                return with_snapshot_headers(streamed(json_array(trips), 'application/json'), snapshot)
+            if since is None:
+                # filters are applied to the decoded columns before serialization
+                with metrics.phase('transform'):
+                    trips = snapshot.query(time_format=time_format, **filters)
+                return with_snapshot_headers(serialize(trips), snapshot)
+
+            # Incremental update: only what changed after version `since`
+            if since == snapshot.version:
+                delta = {'version': since, 'since': since, 'added': [], 'changed': [], 'removed': []}
+            else:
+                delta = poller.deltas[line].since(since)
+            if delta is None:
+                # too old for the delta history; hand back the whole feed
+                return with_snapshot_headers(serialize({
+                    'version': snapshot.version,
+                    'since': since,
+                    'reset': True,
+                    'trips': snapshot.records(time_format=time_format)
+                }), snapshot)
+            return with_snapshot_headers(serialize(render_delta(delta, time_format)), snapshot)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    # Server-Sent Events: push each feed delta as soon as it is ingested
+    @app.route('/mta/feeds/<line>/events')
+    def stream_subway_feed(line):
+        if line not in FEEDS:
+            return jsonify({'error': 'Invalid line specified'}), 404
+        try:
+            time_format = requested_time_format()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # a reconnecting EventSource resumes from the last event it saw
+        since = request.headers.get('Last-Event-ID', type=int)
+        if since is None:
+            since = request.args.get('since', type=int)
+
+        if not stream_slots.acquire(blocking=False):
+            return stream_unavailable()
+        log = poller.deltas[line]
+        # subscribe before reading the snapshot so no delta falls in between
+        subscriber = log.subscribe()
+        try:
+            snapshot = poller.get(line)
+        except Exception as e:
+            log.unsubscribe(subscriber)
+            stream_slots.release()
+            return jsonify({'error': str(e)}), 500
+
+        def events():
+            try:
+                last_version = snapshot.version
+                if since is not None and since != snapshot.version:
+                    delta = log.since(since)
+                    if delta is None:
+                        yield sse('reset', {'version': snapshot.version}, snapshot.version)
+                    else:
+                        last_version = delta['version']
+                        yield sse('delta', render_delta(delta, time_format), last_version)
+                while True:
+                    try:
+                        delta = subscriber.get(timeout=app.config['SSE_HEARTBEAT'])
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if delta is None:
+                        yield sse('reset', {'version': last_version})
+                    elif delta['version'] > last_version:
+                        last_version = delta['version']
+                        yield sse('delta', render_delta(delta, time_format), last_version)
+            finally:
+                log.unsubscribe(subscriber)
+
+        return event_stream(events())
+
+    # Favorites and alerts
+    @app.route('/mta/subscriptions', methods=['POST'])
+    def create_subscription():
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({'error': 'expected a JSON object'}), 400
+        # subscribe() checks every value; anything but a string here is a 400
+        options = {key: body[key] for key in ('station', 'equipment', 'route', 'direction', 'webhook', 'min_delay')
+                   if body.get(key) is not None}
+        try:
+            subscription = subscriptions.subscribe(body.get('kind'), **options)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return serialize(subscription.describe()), 201
+
+    @app.route('/mta/subscriptions/<subscription_id>', methods=['GET'])
+    def get_subscription(subscription_id):
+        subscription = subscriptions.get(subscription_id)
+        if subscription is None:
+            return jsonify({'error': 'Unknown subscription'}), 404
+        return serialize(dict(subscription.describe(), events=list(subscription.events)))
+
+    @app.route('/mta/subscriptions/<subscription_id>', methods=['DELETE'])
+    def delete_subscription(subscription_id):
+        if not subscriptions.unsubscribe(subscription_id):
+            return jsonify({'error': 'Unknown subscription'}), 404
+        return '', 204
+
+    @app.route('/mta/subscriptions/<subscription_id>/events')
+    def stream_subscription(subscription_id):
+        if not stream_slots.acquire(blocking=False):
+            return stream_unavailable()
+        listener = subscriptions.listen(subscription_id)
+        if listener is None:
+            stream_slots.release()
+            return jsonify({'error': 'Unknown subscription'}), 404
+        # ids are per worker: a reconnect to another one resumes with live events
+        missed = subscriptions.history(subscription_id, request.headers.get('Last-Event-ID'))
+        replayed = {event['id'] for event in missed}
+
+        def events():
+            try:
+                for event in missed:
+                    yield sse(event['type'], event, event['id'])
+                while True:
+                    try:
+                        event = listener.get(timeout=app.config['SSE_HEARTBEAT'])
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if event is None:
+                        yield sse('deleted', {'subscription_id': subscription_id})
+                        return
+                    if event['id'] not in replayed:
+                        yield sse(event['type'], event, event['id'])
+            finally:
+                subscriptions.unlisten(subscription_id, listener)
+
+        return event_stream(events())
+
+    # Estimated positions of running trains, as GeoJSON or binary frames
+    @app.route('/mta/positions')
+    def get_train_positions():
+        route_id = request.args.get('route') or None
+        bbox = None
+        if request.args.get('bbox'):
+            try:
+                bbox = tuple(float(value) for value in request.args['bbox'].split(','))
+            except ValueError:
+                bbox = ()
+            if len(bbox) != 4:
+                return jsonify({'error': 'bbox must be min_lon,min_lat,max_lon,max_lat'}), 400
+        format = request.args.get('format', 'geojson')
+        if format not in ('geojson', 'binary'):
+            return jsonify({'error': 'format must be geojson or binary'}), 400
+
+        snapshots, errors = poller.get_all()
+        with metrics.phase('transform'):
+            frame = positions.frame(snapshots)
+            trains = frame.select(route_id, bbox)
+        if format == 'binary':
+            with metrics.phase('serialize'):
+                return Response(frame.to_bytes(trains), mimetype='application/octet-stream')
+        payload = frame.geojson(trains)
+        payload['errors'] = errors
+        return serialize(payload)
+
+    # Fastest journeys between two stations, with transfers
+    @app.route('/mta/plan')
+    def plan_journey():
+        try:
+            time_format = requested_time_format()
+            depart = parse_time(request.args.get('depart')) or clock()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        max_transfers = request.args.get('max_transfers', type=int)
+        ends = {}
+        for end in ('from', 'to'):
+            query = request.args.get(end, '')
+            # a GTFS stop id, or else the best station name match
+            station_id = stations.station_id(query)
+            if station_id is None:
+                matches = stations.search(query, 1)
+                station_id = matches[0]['stop_id'] if matches else None
+            if station_id is None:
+                return jsonify({'error': f"unknown {end} station: {query!r}"}), 404
+            ends[end] = station_id
+
+        snapshots, errors = poller.get_all()
+        with metrics.phase('transform'):
+            timetable = planner.timetable(snapshots)
+            journeys = planner.plan(timetable, ends['from'], ends['to'], depart, max_transfers)
+
+        def render_time(timestamp):
+            return int(timestamp) if time_format == 'epoch' else format_time(timestamp)
+
+        def render_leg(leg):
+            leg = dict(leg, from_name=stations.stop_name(leg['from']), to_name=stations.stop_name(leg['to']))
+            for key in ('departure', 'arrival'):
+                if key in leg:
+                    leg[key] = render_time(leg[key])
+            return leg
+
+        return serialize({
+            'from': stations.station(ends['from']),
+            'to': stations.station(ends['to']),
+            'depart': render_time(depart),
+            'journeys': [
+                dict(journey,
+                     departure=render_time(journey['departure']),
+                     arrival=render_time(journey['arrival']),
+                     duration=round(journey['arrival'] - depart),
+                     legs=[render_leg(leg) for leg in journey['legs']])
+                for journey in journeys
+            ],
+            'errors': errors,
+        })
+
+    # Circuit breaker state, errors and latency of every upstream
+    @app.route('/mta/health')
+    def get_upstream_health():
+        upstreams = upstream.describe_health()
+        return serialize({
+            'status': 'ok' if all(h['state'] == 'closed' for h in upstreams.values()) else 'degraded',
+            'upstreams': upstreams,
+            'leader': store.is_leader() if store is not None else None,
+            'last_updated': datetime.now().isoformat()
+        })
+
+    # System overview for the status dashboard, served from the aggregates
+    @app.route('/mta/status')
+    def get_service_status():
+        overview = status.overview()
+        overview['last_updated'] = datetime.now().isoformat()
+        return serialize(overview)
+
+    # Type-ahead station search over the GTFS static catalog
+    @app.route('/mta/stations')
+    def search_stations():
+        query = request.args.get('q', '')
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        with metrics.phase('transform'):
+            results = stations.search(query, limit)
+        return serialize({'query': query, 'stations': results})
+
+    @app.route('/mta/stations/<stop_id>')
+    def get_station(stop_id):
+        station = stations.station(stop_id)
+        if station is None:
+            return jsonify({'error': 'Unknown stop id'}), 404
+        return serialize(station)
+
+    # Arrival boards, answered from the per-snapshot stop index
+    @app.route('/mta/stops/<stop_id>/arrivals')
+    def get_stop_arrivals(stop_id):
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        route_id = request.args.get('route') or None
+        direction = (request.args.get('direction') or '').upper()[:1] or None
+        if direction not in (None, 'N', 'S'):
+            return jsonify({'error': 'direction must be N or S'}), 400
+
+        now = int(clock())
+        boards = []
+        snapshots, _ = poller.get_all()
+        for snapshot in snapshots.values():
+            arrivals = snapshot.next_arrivals(stop_id, now, limit, route_id, direction)
+            if arrivals:
+                boards.append(arrivals)
+
+        arrivals = [
+            {
+                'trip_id': trip_id,
+                'route_id': route,
+                'direction': trip_direction,
+                'stop_id': platform,
+                'stop_name': stop_name,
+                'arrival_time': format_time(timestamp),
+                'arrival_timestamp': timestamp,
+            }
+            for timestamp, trip_id, route, trip_direction, platform, stop_name in islice(merge(*boards), limit)
+        ]
+        return serialize({
+            'stop_id': stop_id,
+            'stop_name': stations.stop_name(stop_id),
+            'arrivals': arrivals,
+            'last_updated': datetime.now().isoformat()
+        })
+
     # Elevator and Accessibility Endpoints
     @app.route('/mta/elevator')
     def get_elevator_status():
         """Get elevator and escalator status from MTA"""
-        url = 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene.xml'
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            root = ET.fromstring(response.content)
-            
-            # Process elevator and escalator data
             accessibility_data = {
                 'elevators': [],
                 'escalators': [],
                 'last_updated': datetime.now().isoformat()
             }
-            
-            for equipment in root.findall('.//{http://www.mta.info/nyct/ene}equipment'):
-                equipment_type = equipment.get('equipmenttype')
-                station = equipment.find('{http://www.mta.info/nyct/ene}station').text
-                status = equipment.find('{http://www.mta.info/nyct/ene}status').text
-                location = equipment.find('{http://www.mta.info/nyct/ene}location').text
-                
-                equipment_data = {
-                    'station': station,
-                    'location': location,
-                    'status': status,
-                    'last_updated': datetime.now().isoformat()
-                }
-                
-                if equipment_type == 'EL':
-                    accessibility_data['elevators'].append(equipment_data)
-                elif equipment_type == 'ES':
-                    accessibility_data['escalators'].append(equipment_data)
-            
-            return jsonify(accessibility_data)
+
+            # the current outage document lists the equipment that is out of
+            # service; each <outage> is parsed as soon as its bytes arrive
+            chunks = upstream.fetch_chunks(ENE_FEEDS['current'])
+            with metrics.phase('parse'):
+                for outage in iter_current_outages(chunks):
+                    equipment_data = {
+                        'station': outage['station'],
+                        'location': outage['location'],
+                        'status': f"Out of Service - {outage['reason']}",
+                        'last_updated': datetime.now().isoformat()
+                    }
+
+                    if outage['equipment_type'] == 'EL':
+                        accessibility_data['elevators'].append(equipment_data)
+                    elif outage['equipment_type'] == 'ES':
+                        accessibility_data['escalators'].append(equipment_data)
+
+            return serialize(accessibility_data)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
     @app.route('/mta/accessibility/<station_id>')
     def get_station_accessibility(station_id):
-        """Get accessibility information for a specific station using all three MTA APIs"""
+        """Get accessibility information for a specific station from the indexed ENE store"""
         try:
-            print(f"Searching for station: {station_id}")
-            
-            # Initialize station data structure
-            station_data = {
-                'station_id': station_id,
-                'elevators': [],
-                'escalators': [],
-                'upcoming_outages': [],
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            # 1. First, get current outages
-            current_outages_url = 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene.xml'
-            try:
-                outages_response = requests.get(current_outages_url)
-                outages_response.raise_for_status()
-                outages_root = ET.fromstring(outages_response.content)
-                
-                # Find equipment for this station (case-insensitive, substring match)
-                for outage in outages_root.findall('.//outage'):
-                    station_elem = outage.find('./station')
-                    if station_elem is None or not station_elem.text:
-                        continue
-                        
-                    station = station_elem.text
-                    
-                    # Check if station name matches
-                    if station and (station_id.strip().lower() in station.strip().lower() or 
-                                station.strip().lower() in station_id.strip().lower()):
-                        
-                        # Get equipment details
-                        equipment_id_elem = outage.find('./equipment')
-                        equipment_id = equipment_id_elem.text if equipment_id_elem is not None else "Unknown"
-                        
-                        equipment_type_elem = outage.find('./equipmenttype')
-                        equipment_type = equipment_type_elem.text if equipment_type_elem is not None else ""
-                        
-                        location_elem = outage.find('./serving')
-                        location = location_elem.text if location_elem is not None else ""
-                        
-                        reason_elem = outage.find('./reason')
-                        status = reason_elem.text if reason_elem is not None else "Unknown"
-                        
-                        outage_date_elem = outage.find('./outagedate')
-                        outage_date = outage_date_elem.text if outage_date_elem is not None else ""
-                        
-                        return_date_elem = outage.find('./estimatedreturntoservice')
-                        return_date = return_date_elem.text if return_date_elem is not None else ""
-                        
-                        equipment_data = {
-                            'id': equipment_id,
-                            'location': location,
-                            'status': f"Out of Service - {status}",
-                            'outage_date': outage_date,
-                            'estimated_return': return_date,
-                            'is_working': False,
-                            'last_updated': datetime.now().isoformat()
-                        }
-                        
-                        # Check equipment type (EL = elevator, ES = escalator)
-                        if equipment_type == 'EL':
-                            station_data['elevators'].append(equipment_data)
-                        elif equipment_type == 'ES':
-                            station_data['escalators'].append(equipment_data)
-                print("Current outages processed successfully.")
-            except Exception as e:
-                print(f"Error processing current outages: {str(e)}")
-            
-            # 2. Next, get upcoming outages
-            upcoming_url = 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene_upcoming.xml'
-            try:
-                upcoming_response = requests.get(upcoming_url)
-                upcoming_response.raise_for_status()
-                
-                print(f"Upcoming response type: {type(upcoming_response.content)}")
-                
-                # Try to parse as XML first
-                try:
-                    upcoming_root = ET.fromstring(upcoming_response.content)
-                    print("Successfully parsed upcoming outages as XML")
-                    
-                    for outage in upcoming_root.findall('.//outage'):
-                        station_elem = outage.find('./station')
-                        if station_elem is None or not station_elem.text:
-                            continue
-                            
-                        station_name = station_elem.text
-                        
-                        # Check if station name matches
-                        if (station_id.strip().lower() in station_name.strip().lower() or 
-                            station_name.strip().lower() in station_id.strip().lower()):
-                            
-                            equipment_type_elem = outage.find('./equipmenttype')
-                            equipment_type = equipment_type_elem.text if equipment_type_elem is not None else ""
-                            
-                            reason_elem = outage.find('./reason')
-                            reason = reason_elem.text if reason_elem is not None else "Scheduled Maintenance"
-                            
-                            start_date_elem = outage.find('./startdate')
-                            start_date = start_date_elem.text if start_date_elem is not None else ""
-                            
-                            end_date_elem = outage.find('./estimatedreturntoservice')
-                            end_date = end_date_elem.text if end_date_elem is not None else ""
-                            
-                            outage_data = {
-                                'type': 'Elevator' if equipment_type == 'EL' else 'Escalator',
-                                'station': station_name,
-                                'start_date': start_date,
-                                'end_date': end_date,
-                                'reason': reason
-                            }
-                            
-                            station_data['upcoming_outages'].append(outage_data)
-                    
-                except ET.ParseError:
-                    # Fall back to text processing
-                    print("Upcoming outages not in XML format, processing as text")
-                    upcoming_outages = []
-                    if upcoming_response.text.strip():
-                        raw_text = upcoming_response.text
-                        rows = raw_text.strip().split('\n')
-                        for row in rows:
-                            if row and not row.startswith('0'):
-                                parts = row.split(' ')
-                                if len(parts) >= 10:
-                                    # Extract station name - bit more complex
-                                    el_index = -1
-                                    es_index = -1
-                                    try:
-                                        el_index = parts.index('EL')
-                                    except ValueError:
-                                        try:
-                                            es_index = parts.index('ES')
-                                        except ValueError:
-                                            pass
-                                    
-                                    if el_index > 0:
-                                        station_name = ' '.join(parts[:el_index])
-                                        equipment_type = 'EL'
-                                    elif es_index > 0:
-                                        station_name = ' '.join(parts[:es_index])
-                                        equipment_type = 'ES'
-                                    else:
-                                        continue
-                                    
-                                    # Check if station name matches
-                                    if (station_id.strip().lower() in station_name.strip().lower() or 
-                                        station_name.strip().lower() in station_id.strip().lower()):
-                                        
-                                        # Find dates in the string
-                                        date_pattern = r'(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2} [AP]M)'
-                                        dates = re.findall(date_pattern, row)
-                                        
-                                        # Extract reason which is typically between the second date and 'Y' or 'N'
-                                        reason_text = "Scheduled Maintenance"
-                                        if "Capital Replacement" in row:
-                                            reason_text = "Capital Replacement"
-                                        
-                                        outage_data = {
-                                            'type': 'Elevator' if equipment_type == 'EL' else 'Escalator',
-                                            'station': station_name,
-                                            'start_date': dates[0] if len(dates) > 0 else "",
-                                            'end_date': dates[1] if len(dates) > 1 else "",
-                                            'reason': reason_text
-                                        }
-                                        
-                                        station_data['upcoming_outages'].append(outage_data)
-                
-                print(f"Found {len(station_data['upcoming_outages'])} upcoming outages")
-            except Exception as e:
-                print(f"Error processing upcoming outages: {str(e)}")
-            
-            # 3. Finally, get equipment list
-            equipment_url = 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene_equipments.xml'
-            try:
-                equipment_response = requests.get(equipment_url)
-                equipment_response.raise_for_status()
-                
-                print(f"Equipment response type: {type(equipment_response.content)}")
-                
-                # Track IDs of equipment already added from outages
-                existing_elevator_ids = [e.get('id', '') for e in station_data['elevators']]
-                existing_escalator_ids = [e.get('id', '') for e in station_data['escalators']]
-                
-                # Counter for generating sequential IDs for working equipment
-                el_counter = 1
-                es_counter = 1
-                
-                # Try to parse as XML first
-                try:
-                    equipment_root = ET.fromstring(equipment_response.content)
-                    print("Successfully parsed equipment list as XML")
-                    
-                    for equipment in equipment_root.findall('.//equipment'):
-                        station_elem = equipment.find('./station')
-                        if station_elem is None or not station_elem.text:
-                            continue
-                            
-                        station_name = station_elem.text
-                        
-                        # Check if station name matches
-                        if (station_id.strip().lower() in station_name.strip().lower() or 
-                            station_name.strip().lower() in station_id.strip().lower()):
-                            
-                            equipment_type_elem = equipment.find('./equipmenttype')
-                            equipment_type = equipment_type_elem.text if equipment_type_elem is not None else ""
-                            
-                            equipment_id_elem = equipment.find('./equipmentnumber')
-                            equipment_id = equipment_id_elem.text if equipment_id_elem is not None and equipment_id_elem.text.strip() else None
-                            
-                            # Generate sequential ID if none provided
-                            if not equipment_id:
-                                if equipment_type == 'EL':
-                                    equipment_id = f"EL{el_counter:03d}"
-                                    el_counter += 1
-                                elif equipment_type == 'ES':
-                                    equipment_id = f"ES{es_counter:03d}"
-                                    es_counter += 1
-                                else:
-                                    equipment_id = "Unknown"
-                            
-                            location_elem = equipment.find('./serving')
-                            location = location_elem.text if location_elem is not None else ""
-                            
-                            # Skip if this equipment is already in the outages list
-                            if ((equipment_type == 'EL' and equipment_id in existing_elevator_ids) or 
-                                (equipment_type == 'ES' and equipment_id in existing_escalator_ids)):
-                                continue
-                            
-                            equipment_data = {
-                                'id': equipment_id,
-                                'location': location,
-                                'status': "In Service",
-                                'is_working': True,
-                                'last_updated': datetime.now().isoformat()
-                            }
-                            
-                            # Add to appropriate list
-                            if equipment_type == 'EL':
-                                station_data['elevators'].append(equipment_data)
-                            elif equipment_type == 'ES':
-                                station_data['escalators'].append(equipment_data)
-                
-                except ET.ParseError:
-                    # Fall back to text processing
-                    print("Equipment list not in XML format, processing as text")
-                    if equipment_response.text.strip():
-                        rows = equipment_response.text.strip().split('\n')
-                        
-                        for row in rows:
-                            if row and not row.startswith('0'):
-                                parts = row.split(' ')
-                                
-                                # Try to extract station name and equipment type
-                                el_index = -1
-                                es_index = -1
-                                try:
-                                    el_index = parts.index('EL')
-                                except ValueError:
-                                    try:
-                                        es_index = parts.index('ES')
-                                    except ValueError:
-                                        pass
-                                
-                                # Skip if we couldn't find equipment type markers
-                                if el_index <= 0 and es_index <= 0:
-                                    continue
-                                    
-                                if el_index > 0:
-                                    station_name = ' '.join(parts[:el_index])
-                                    equipment_type = 'EL'
-                                    equipment_id = parts[el_index + 1] if el_index + 1 < len(parts) and parts[el_index + 1].strip() else None
-                                    # Generate sequential ID if none found
-                                    if not equipment_id:
-                                        equipment_id = f"EL{el_counter:03d}"
-                                        el_counter += 1
-                                else:
-                                    station_name = ' '.join(parts[:es_index])
-                                    equipment_type = 'ES'
-                                    equipment_id = parts[es_index + 1] if es_index + 1 < len(parts) and parts[es_index + 1].strip() else None
-                                    # Generate sequential ID if none found
-                                    if not equipment_id:
-                                        equipment_id = f"ES{es_counter:03d}"
-                                        es_counter += 1
-                                
-                                # Check if station name matches
-                                if (station_id.strip().lower() in station_name.strip().lower() or 
-                                    station_name.strip().lower() in station_id.strip().lower()):
-                                    
-                                    # Skip if this equipment is already in the outages list
-                                    if ((equipment_type == 'EL' and equipment_id in existing_elevator_ids) or 
-                                        (equipment_type == 'ES' and equipment_id in existing_escalator_ids)):
-                                        continue
-                                    
-                                    # Extract serving/location info
-                                    serving_text = ""
-                                    if "serving" in row.lower():
-                                        serving_pattern = r'serving (.*?) [YN]'
-                                        serving_match = re.search(serving_pattern, row)
-                                        if serving_match:
-                                            serving_text = serving_match.group(1)
-                                    
-                                    equipment_data = {
-                                        'id': equipment_id,
-                                        'location': serving_text,
-                                        'status': "In Service",
-                                        'is_working': True,
-                                        'last_updated': datetime.now().isoformat()
-                                    }
-                                    
-                                    # Add to appropriate list
-                                    if equipment_type == 'EL':
-                                        station_data['elevators'].append(equipment_data)
-                                    elif equipment_type == 'ES':
-                                        station_data['escalators'].append(equipment_data)
-                
-                # If no working elevators/escalators were found, add some dummy data
-                # This handles the case when the MTA API is unavailable but we want to show something
-                if len(station_data['elevators']) == 0 and station_id:
-                    # Add dummy elevators based on station name
-                    print(f"No elevators found via API, adding dummy data for {station_id}")
-                    
-                    # Add dummy locations based on common elevator placements
-                    locations = [
-                        f"mezzanine to uptown platform",
-                        f"mezzanine to downtown platform",
-                        f"street to mezzanine"
-                    ]
-                    
-                    for i, loc in enumerate(locations):
-                        station_data['elevators'].append({
-                            'id': f"EL{i+1:03d}",
-                            'location': loc,
-                            'status': "In Service",
-                            'is_working': True,
-                            'last_updated': datetime.now().isoformat()
-                        })
-                    
-                # Debug print at end
-                print(f"Final counts:")
-                print(f"Total elevators: {len(station_data['elevators'])}")
-                print(f"Working elevators: {len([e for e in station_data['elevators'] if e.get('is_working', False)])}")
-                print(f"Total escalators: {len(station_data['escalators'])}")
-                print(f"Working escalators: {len([e for e in station_data['escalators'] if e.get('is_working', False)])}")
-                print(f"Upcoming outages: {len(station_data['upcoming_outages'])}")
-                
-                return jsonify(station_data)
-            except Exception as e:
-                print(f"Error processing equipment list: {str(e)}")
-                return jsonify(station_data)
+            index = accessibility.index()
+            # a GTFS stop id resolves to its station name, which ENE records use
+            query = stations.stop_name(station_id) or station_id
+            with metrics.phase('transform'):
+                station_data = index.lookup(query)
+                station_data['station_id'] = station_id
+
+            if app.logger.isEnabledFor(logging.DEBUG):
+                app.logger.debug(
+                    "accessibility station=%r elevators=%d working_elevators=%d escalators=%d "
+                    "working_escalators=%d upcoming_outages=%d",
+                    station_id,
+                    len(station_data['elevators']),
+                    sum(1 for e in station_data['elevators'] if e.get('is_working', False)),
+                    len(station_data['escalators']),
+                    sum(1 for e in station_data['escalators'] if e.get('is_working', False)),
+                    len(station_data['upcoming_outages']),
+                )
+
+            return serialize(station_data)
         except Exception as e:
-            print(f"Error in get_station_accessibility: {str(e)}")
+            app.logger.exception("accessibility lookup failed station=%r", station_id)
             return jsonify({'error': str(e)}), 500
 
     return app
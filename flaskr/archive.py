@@ -0,0 +1,594 @@
+"""Append-only history of every upstream document, and replay of it.
+
+Layout of an archive directory:
+
+    <start>.seg   records of one `segment_seconds` window, appended in time order
+    <start>.idx   (timestamp, offset, stream) of every keyframe in that segment
+
+A record is a RECORD header, the stream name and a zlib-compressed payload.
+The payload of a keyframe is the document itself. GTFS-realtime streams are
+otherwise stored as deltas against their previous document: entities that
+appeared in it, byte for byte once their (renumbered) entity id is set
+apart, are references into it, and only new entities are stored. Documents
+are rebuilt by byte concatenation, exactly as they were received, without
+decoding any protobuf. Every stream starts each segment with a keyframe and
+gets another one every `keyframe_interval` records, so a range read seeks
+to the nearest keyframe instead of the start of the segment, and a segment
+can be deleted without breaking the others.
+
+Usage:
+    python flaskr/archive.py instance/archive                  # per-stream totals
+    python flaskr/archive.py instance/archive --from 2025-04-01T08:00 --until 2025-04-01T09:00
+"""
+import argparse
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from datetime import datetime
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# timestamp, revision, base revision (deltas), kind, name length, payload length
+RECORD = struct.Struct('<dIIBHI')
+# keyframe timestamp, record offset, name length
+INDEX = struct.Struct('<dQH')
+
+KEYFRAME = 0
+DELTA = 1
+
+# delta operations
+LITERAL = 0      # a top-level field that is not an entity, verbatim
+REFERENCE = 1    # entity id + index of an entity body in the base document
+ENTITY = 2       # entity id + new entity body
+
+# protobuf keys: FeedMessage.entity (2, length-delimited), FeedEntity.id (1, length-delimited)
+ENTITY_KEY = 0x12
+ID_KEY = 0x0a
+
+
+def parse_time(value):
+    """Epoch seconds from a number or an ISO 8601 string (local time if naive)"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _varint(data, offset):
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def _encode_varint(value):
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def split_message(content):
+    """Top-level fields of a FeedMessage as ('field', raw) or ('entity', id, body).
+
+    `body` is the entity without its leading id field, so the same trip
+    keeps the same body when the feed renumbers its entities. Returns None
+    if `content` is not a protobuf this can split losslessly.
+    """
+    fields = []
+    offset, size = 0, len(content)
+    try:
+        while offset < size:
+            start = offset
+            key, offset = _varint(content, offset)
+            wire_type = key & 7
+            if wire_type == 0:
+                _, offset = _varint(content, offset)
+            elif wire_type == 1:
+                offset += 8
+            elif wire_type == 5:
+                offset += 4
+            elif wire_type == 2:
+                length, offset = _varint(content, offset)
+                if key == ENTITY_KEY and offset < size and content[offset] == ID_KEY:
+                    id_length, body = _varint(content, offset + 1)
+                    if body + id_length <= offset + length:
+                        entity_id = content[body:body + id_length]
+                        fields.append(('entity', entity_id, content[body + id_length:offset + length]))
+                        offset += length
+                        continue
+                offset += length
+            else:
+                return None
+            if offset > size:
+                return None
+            fields.append(('field', content[start:offset]))
+    except IndexError:
+        return None
+    return fields
+
+
+def join_message(fields):
+    """Inverse of split_message"""
+    parts = []
+    for field in fields:
+        if field[0] == 'field':
+            parts.append(field[1])
+            continue
+        _, entity_id, body = field
+        entity = bytes([ID_KEY]) + _encode_varint(len(entity_id)) + entity_id + body
+        parts.append(bytes([ENTITY_KEY]) + _encode_varint(len(entity)) + entity)
+    return b''.join(parts)
+
+
+def _bodies(fields):
+    return [field[2] for field in fields if field[0] == 'entity']
+
+
+def encode_delta(fields, base_bodies):
+    """Delta payload of `fields` against the entity bodies of the base document"""
+    positions = {body: index for index, body in enumerate(base_bodies)}
+    parts = []
+    for field in fields:
+        if field[0] == 'field':
+            parts.append(struct.pack('<BI', LITERAL, len(field[1])))
+            parts.append(field[1])
+            continue
+        _, entity_id, body = field
+        position = positions.get(body)
+        if position is not None:
+            parts.append(struct.pack('<BH', REFERENCE, len(entity_id)))
+            parts.append(entity_id)
+            parts.append(struct.pack('<I', position))
+        else:
+            parts.append(struct.pack('<BH', ENTITY, len(entity_id)))
+            parts.append(entity_id)
+            parts.append(struct.pack('<I', len(body)))
+            parts.append(body)
+    return b''.join(parts)
+
+
+def decode_delta(payload, base_bodies):
+    """Fields of the document a delta payload describes"""
+    fields = []
+    offset, size = 0, len(payload)
+    while offset < size:
+        op = payload[offset]
+        if op == LITERAL:
+            length, = struct.unpack_from('<I', payload, offset + 1)
+            offset += 5
+            fields.append(('field', payload[offset:offset + length]))
+            offset += length
+            continue
+        id_length, = struct.unpack_from('<H', payload, offset + 1)
+        offset += 3
+        entity_id = payload[offset:offset + id_length]
+        offset += id_length
+        value, = struct.unpack_from('<I', payload, offset)
+        offset += 4
+        if op == REFERENCE:
+            body = base_bodies[value]
+        else:
+            body = payload[offset:offset + value]
+            offset += value
+        fields.append(('entity', entity_id, body))
+    return fields
+
+
+class _Stream:
+    # what the writer or a reader knows about one stream's latest document
+    def __init__(self, revision, bodies):
+        self.revision = revision
+        self.bodies = bodies
+        self.since_keyframe = 0
+
+
+class Archive:
+    """Segmented, compressed, append-only store of upstream documents.
+
+    `append()` writes one document of a named stream. `read()` yields the
+    documents of a time range in order. Whole segments are deleted once
+    they are older than `max_age` seconds or the archive exceeds
+    `max_bytes`, checked at every segment roll and by `enforce_retention()`.
+
+    Each record is written under an exclusive flock of its segment, so
+    processes that briefly both record (around a poller lease handover)
+    interleave whole records; a reader skips the deltas whose base another
+    process wrote.
+    """
+
+    def __init__(self, directory, segment_seconds=3600, keyframe_interval=20, max_bytes=512 * 2 ** 20,
+                 max_age=7 * 86400, compression=6):
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.keyframe_interval = keyframe_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+        self._segment = None
+        self._files = None
+        self._streams = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def segments(self):
+        """Start times of the segments on disk, oldest first"""
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory)
+                      if name.endswith('.seg') and name[:-4].isdigit())
+
+    def _path(self, start, extension):
+        return os.path.join(self.directory, f"{start}{extension}")
+
+    def append(self, name, content, revision, timestamp=None, delta=False):
+        """Record `content` as revision `revision` of stream `name`.
+
+        With `delta`, `content` is a GTFS-realtime FeedMessage and is stored
+        against the previous document of the stream when possible.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        fields = split_message(content) if delta else None
+        if fields is not None and join_message(fields) != content:
+            # not something the delta encoding reproduces byte for byte
+            fields = None
+        with self._lock:
+            self._roll(int(timestamp - timestamp % self.segment_seconds))
+            state = self._streams.get(name)
+            if fields is not None and state is not None and state.bodies is not None \
+                    and state.since_keyframe < self.keyframe_interval:
+                kind, base, payload = DELTA, state.revision, encode_delta(fields, state.bodies)
+                state.since_keyframe += 1
+            else:
+                kind, base, payload = KEYFRAME, 0, content
+                state = self._streams[name] = _Stream(revision, None)
+            state.revision = revision
+            state.bodies = _bodies(fields) if fields is not None else None
+
+            data, index = self._files
+            encoded = name.encode('utf-8')
+            compressed = zlib.compress(payload, self.compression)
+            if fcntl is not None:
+                fcntl.flock(data, fcntl.LOCK_EX)
+            try:
+                # another process may have appended since our last write
+                offset = data.seek(0, os.SEEK_END)
+                data.write(RECORD.pack(timestamp, revision, base, kind, len(encoded), len(compressed))
+                           + encoded + compressed)
+                data.flush()
+                if kind == KEYFRAME:
+                    index.write(INDEX.pack(timestamp, offset, len(encoded)) + encoded)
+                    index.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(data, fcntl.LOCK_UN)
+        return len(compressed)
+
+    def _roll(self, start):
+        # caller holds the lock
+        if start == self._segment:
+            return
+        self._close()
+        self._files = (open(self._path(start, '.seg'), 'ab'), open(self._path(start, '.idx'), 'ab'))
+        self._segment = start
+        # every stream starts the segment with a keyframe
+        self._streams = {}
+        self._enforce_retention()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+            self._segment = None
+
+    def enforce_retention(self):
+        """Delete the segments past `max_age` or `max_bytes` now"""
+        with self._lock:
+            self._enforce_retention()
+
+    def _enforce_retention(self):
+        # caller holds the lock
+        cutoff = time.time() - self.max_age
+        sizes = {}
+        for start in self.segments():
+            try:
+                sizes[start] = os.path.getsize(self._path(start, '.seg'))
+            except FileNotFoundError:
+                # removed by another process meanwhile
+                pass
+        total = sum(sizes.values())
+        segments = [start for start in sizes if start != self._segment]
+        for start in segments:
+            if start + self.segment_seconds >= cutoff and total <= self.max_bytes:
+                break
+            for extension in ('.seg', '.idx'):
+                try:
+                    os.remove(self._path(start, extension))
+                except FileNotFoundError:
+                    pass
+            total -= sizes[start]
+            logger.info("archive segment removed start=%s", start)
+
+    def _keyframes(self, start):
+        keyframes = {}
+        try:
+            with open(self._path(start, '.idx'), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return keyframes
+        offset = 0
+        while offset + INDEX.size <= len(data):
+            timestamp, position, name_length = INDEX.unpack_from(data, offset)
+            offset += INDEX.size
+            name = data[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            keyframes.setdefault(name, []).append((timestamp, position))
+        return keyframes
+
+    def _seek_offset(self, segment, start, streams):
+        # latest offset from which every wanted stream can be decoded at `start`
+        keyframes = self._keyframes(segment)
+        offsets = []
+        for name, frames in keyframes.items():
+            if streams is not None and name not in streams:
+                continue
+            position = bisect_right(frames, (start, float('inf')))
+            if position == 0:
+                return 0
+            offsets.append(frames[position - 1][1])
+        return min(offsets) if offsets else 0
+
+    def read(self, start=None, end=None, streams=None, initial=False):
+        """Yield (timestamp, stream, revision, content) for [start, end], in order.
+
+        `streams` limits the read to those names. With `initial`, each
+        stream's last document before `start` is yielded first, so the
+        reader starts from the state of the archive at `start`; streams that
+        did not change in the segment holding `start` are looked up in the
+        segments before it.
+        """
+        streams = set(streams) if streams is not None else None
+        segments = self.segments()
+        first = 0
+        if start is not None:
+            first = max(0, bisect_right(segments, start - start % self.segment_seconds) - 1)
+        latest = {} if initial and start is not None else None
+
+        for segment in segments[first:]:
+            if end is not None and segment > end:
+                break
+            offset = self._seek_offset(segment, start, streams) if start is not None and segment <= start else 0
+            for record in self._records(segment, offset, streams, end):
+                timestamp, name = record[0], record[1]
+                if start is not None and timestamp < start:
+                    if latest is not None:
+                        latest[name] = record
+                    continue
+                if latest is not None:
+                    yield from self._initial(latest, segments[:first], streams)
+                    latest = None
+                yield record
+        if latest is not None:
+            yield from self._initial(latest, segments[:first], streams)
+
+    def _initial(self, latest, earlier, streams):
+        # `latest`, completed with the last document of the streams missing from it
+        for segment in reversed(earlier):
+            if streams is not None and streams <= latest.keys():
+                break
+            frames = {name: positions for name, positions in self._keyframes(segment).items()
+                      if name not in latest and (streams is None or name in streams)}
+            if not frames:
+                continue
+            # the last keyframe of each stream, and whatever deltas follow it
+            offset = min(positions[-1][1] for positions in frames.values())
+            found = {}
+            for record in self._records(segment, offset, set(frames)):
+                found[record[1]] = record
+            latest.update(found)
+        return sorted(latest.values())
+
+    def _records(self, segment, offset, streams=None, end=None):
+        # (timestamp, stream, revision, content) of a segment from `offset`
+        states = {}
+        with open(self._path(segment, '.seg'), 'rb') as f:
+            f.seek(offset)
+            while True:
+                header = f.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    break
+                timestamp, revision, base, kind, name_length, size = RECORD.unpack(header)
+                name = f.read(name_length).decode('utf-8')
+                if (streams is not None and name not in streams) or (end is not None and timestamp > end):
+                    f.seek(size, os.SEEK_CUR)
+                    continue
+                payload = zlib.decompress(f.read(size))
+                if kind == KEYFRAME:
+                    content = payload
+                    fields = split_message(content)
+                else:
+                    state = states.get(name)
+                    if state is None or state.revision != base or state.bodies is None:
+                        # its base was written by another process or lies before `offset`
+                        continue
+                    fields = decode_delta(payload, state.bodies)
+                    content = join_message(fields)
+                states[name] = _Stream(revision, _bodies(fields) if fields is not None else None)
+                yield timestamp, name, revision, content
+
+
+class ArchiveRecorder:
+    """Writes every new upstream document to an Archive from a daemon thread.
+
+    Register `record` with `UpstreamClient.add_listener`; documents are
+    queued, so the fetch path never waits on compression or disk. `streams`
+    maps URLs to stream names; those in `delta_streams` are GTFS-realtime.
+    Retention is applied when the recorder starts and every
+    `retention_interval` seconds, so an idle archive still shrinks.
+    """
+
+    def __init__(self, archive, streams, delta_streams=(), queue_size=256, retention_interval=300):
+        self.archive = archive
+        self.streams = streams
+        self.delta_streams = set(delta_streams)
+        self.retention_interval = retention_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='archive-recorder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.archive.close()
+
+    def record(self, entry):
+        name = self.streams.get(entry.url)
+        if name is None:
+            return
+        try:
+            self._queue.put_nowait((name, entry.content, entry.revision, entry.fetched_at))
+        except queue.Full:
+            logger.warning("archive queue full, document dropped stream=%s revision=%s", name, entry.revision)
+
+    def _run(self):
+        retained_at = 0
+        while not self._stop.is_set():
+            if time.monotonic() - retained_at >= self.retention_interval:
+                retained_at = time.monotonic()
+                try:
+                    self.archive.enforce_retention()
+                except OSError:
+                    logger.exception("archive retention failed")
+            try:
+                name, content, revision, fetched_at = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self.archive.append(name, content, revision, fetched_at, delta=name in self.delta_streams)
+            except Exception:
+                logger.exception("archive write failed stream=%s", name)
+
+
+class ReplayAdapter(BaseAdapter):
+    """A requests transport that answers from an Archive instead of the network.
+
+    Mounted on the UpstreamClient session, it serves each URL the document
+    its stream had at a virtual clock running from `start` at `speed` times
+    real time and stopping at `end`. Revisions double as ETags, so
+    revalidation still gets 304s.
+    """
+
+    def __init__(self, archive, streams, start, end=None, speed=1.0):
+        super().__init__()
+        self.streams = streams
+        self.start = start
+        self.end = end
+        self.speed = speed
+        self._started = time.monotonic()
+        self._records = archive.read(start, end, streams=set(streams.values()), initial=True)
+        self._pending = next(self._records, None)
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def now(self):
+        """The virtual time being replayed"""
+        virtual = self.start + (time.monotonic() - self._started) * self.speed
+        return min(virtual, self.end) if self.end is not None else virtual
+
+    def _advance(self):
+        now = self.now()
+        with self._lock:
+            while self._pending is not None and self._pending[0] <= now:
+                _, name, revision, content = self._pending
+                self._documents[name] = (revision, content)
+                self._pending = next(self._records, None)
+
+    def send(self, request, **kwargs):
+        self._advance()
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.headers = CaseInsensitiveDict()
+        name = self.streams.get(request.url)
+        document = self._documents.get(name) if name is not None else None
+        if document is None:
+            response.status_code = 404
+            response._content = b''
+            return response
+
+        revision, content = document
+        etag = f'"{name}-{revision}"'
+        response.headers['ETag'] = etag
+        if request.headers.get('If-None-Match') == etag:
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response._content = content
+        return response
+
+    def close(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory')
+    parser.add_argument('--from', dest='start', type=parse_time)
+    parser.add_argument('--until', dest='end', type=parse_time)
+    parser.add_argument('--stream', action='append', dest='streams')
+    args = parser.parse_args()
+
+    archive = Archive(args.directory)
+    started = time.perf_counter()
+    totals = {}
+    for timestamp, name, _, content in archive.read(args.start, args.end, args.streams):
+        count, size, first, last = totals.get(name, (0, 0, timestamp, timestamp))
+        totals[name] = (count + 1, size + len(content), first, timestamp)
+    elapsed = time.perf_counter() - started
+
+    disk = sum(os.path.getsize(os.path.join(args.directory, name)) for name in os.listdir(args.directory))
+    print(f"{'stream':<12}{'documents':>10}{'raw MB':>10}  first / last")
+    for name, (count, size, first, last) in sorted(totals.items()):
+        print(f"{name:<12}{count:>10}{size / 2 ** 20:>10.1f}  "
+              f"{datetime.fromtimestamp(first):%Y-%m-%d %H:%M:%S} / {datetime.fromtimestamp(last):%H:%M:%S}")
+    raw = sum(size for _, size, _, _ in totals.values())
+    print(f"read {raw / 2 ** 20:.1f} MB in {elapsed:.2f}s; {disk / 2 ** 20:.1f} MB on disk")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import json
+import threading
+
+from google.transit import gtfs_realtime_pb2
+
+from streaming import NDJSON_MIMETYPE, SEPARATORS, brotli
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Formats a whole feed can be served in, and their mimetypes
+FORMATS = {
+    'json': 'application/json',
+    'ndjson': NDJSON_MIMETYPE,
+    'msgpack': 'application/msgpack',
+    'protobuf': 'application/x-protobuf',
+}
+
+
+def formats():
+    """FORMATS this process can produce"""
+    return [name for name in FORMATS if name != 'msgpack' or msgpack is not None]
+
+
+def feed_message(table, timestamp):
+    """Project a TripTable back onto a GTFS-realtime FeedMessage.
+
+    Only what the table keeps survives: trip, route, start time/date, and
+    each stop time update's stop id and arrival/departure times.
+    """
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    feed.header.timestamp = int(timestamp)
+    strings = table.strings
+    for trip in range(len(table)):
+        entity = feed.entity.add()
+        trip_id = strings[table.trip_id[trip]]
+        entity.id = trip_id
+        descriptor = entity.trip_update.trip
+        descriptor.trip_id = trip_id
+        descriptor.route_id = strings[table.route_id[trip]]
+        descriptor.start_time = strings[table.start_time[trip]]
+        descriptor.start_date = strings[table.start_date[trip]]
+        for row in table.stop_rows(trip):
+            update = entity.trip_update.stop_time_update.add()
+            update.stop_id = strings[table.stop_id[row]]
+            if table.arrival[row]:
+                update.arrival.time = table.arrival[row]
+            if table.departure[row]:
+                update.departure.time = table.departure[row]
+    return feed
+
+
+def encode(snapshot, format, time_format='iso'):
+    """The whole of `snapshot` serialized as `format` (a FORMATS key)"""
+    if format == 'protobuf':
+        return feed_message(snapshot.trips, snapshot.fetched_at).SerializeToString()
+    records = snapshot.records(time_format=time_format)
+    if format == 'msgpack':
+        return msgpack.packb(records)
+    if format == 'ndjson':
+        return ''.join(json.dumps(record, separators=SEPARATORS) + '\n' for record in records).encode('utf-8')
+    return json.dumps(records, separators=SEPARATORS).encode('utf-8')
+
+
+class Body:
+    """One serialized response body, with its compressed variants built on demand.
+
+    The ETag combines the snapshot's line and version with a digest of the
+    bytes, so it is strong, identical across workers serving the same
+    version, and never reused for different content after a restart.
+    """
+
+    def __init__(self, content, mimetype, line, version, level=6):
+        self.content = content
+        self.mimetype = mimetype
+        self.level = level
+        digest = hashlib.blake2b(content, digest_size=8).hexdigest()
+        self.tag = f"{line}-{version}-{digest}"
+        self._encoded = {None: content}
+        self._lock = threading.Lock()
+
+    def etag(self, encoding=None):
+        return self.tag if encoding is None else f"{self.tag}-{encoding}"
+
+    def encoded(self, encoding=None):
+        """The body compressed with `encoding` ('gzip', 'br' or None), built once"""
+        content = self._encoded.get(encoding)
+        if content is None:
+            with self._lock:
+                content = self._encoded.get(encoding)
+                if content is None:
+                    if encoding == 'br':
+                        content = brotli.compress(self.content, quality=min(self.level, 11))
+                    else:
+                        content = gzip.compress(self.content, self.level, mtime=0)
+                    self._encoded[encoding] = content
+        return content
@@ -0,0 +1,237 @@
+import re
+import struct
+from array import array
+from datetime import datetime
+
+
+# NYCT trip ids look like "054850_A..N03R": route before the dots, direction after
+TRIP_ID_PATTERN = re.compile(r'^[^_]*_([^.]*)\.+([NS])?')
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Trip fields a response can be projected onto; the first four are the default shape
+DEFAULT_TRIP_FIELDS = ('trip_id', 'start_time', 'start_date', 'stop_time_updates')
+TRIP_FIELDS = DEFAULT_TRIP_FIELDS + ('route_id', 'direction')
+
+# Array columns of a TripTable, in serialized order
+COLUMNS = ('trip_id', 'route_id', 'direction', 'start_time', 'start_date', 'stop_start',
+           'stop_trip', 'stop_id', 'stop_name', 'arrival', 'departure')
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+def format_times(timestamps):
+    """Format many epoch seconds at once, as {timestamp: string}.
+
+    Predictions cluster within a few hours, so only one strftime per distinct
+    minute is needed; the seconds are appended as plain digits.
+    """
+    minutes = {}
+    formatted = {}
+    for timestamp in set(timestamps):
+        if not timestamp:
+            continue
+        second = timestamp % 60
+        prefix = minutes.get(timestamp - second)
+        if prefix is None:
+            prefix = minutes[timestamp - second] = format_time(timestamp - second)[:-2]
+        formatted[timestamp] = f"{prefix}{second:02d}"
+    return formatted
+
+
+def trip_route(trip):
+    """Route id of a TripDescriptor, falling back to the NYCT trip id"""
+    if trip.route_id:
+        return trip.route_id
+    match = TRIP_ID_PATTERN.match(trip.trip_id)
+    return match.group(1) if match else ''
+
+
+def trip_direction(trip_id, stop_id=''):
+    """'N' or 'S' from an NYCT trip id (or the platform stop id), else ''"""
+    match = TRIP_ID_PATTERN.match(trip_id)
+    if match and match.group(2):
+        return match.group(2)
+    if stop_id[-1:] in ('N', 'S'):
+        return stop_id[-1]
+    return ''
+
+
+def parent_stop(stop_id):
+    """Strip the N/S platform suffix from a stop id ("A32N" -> "A32")"""
+    if len(stop_id) > 1 and stop_id[-1] in ('N', 'S'):
+        return stop_id[:-1]
+    return stop_id
+
+
+class TripTable:
+    """Trip updates of one feed stored as typed columns.
+
+    Strings (trip, route, stop ids, ...) are interned once into `strings`
+    and referenced by index. Trips are rows of the trip columns; their stop
+    time updates are the rows `stop_start[i]:stop_start[i + 1]` of the stop
+    columns, and `stop_trip` maps a stop row back to its trip. Times are
+    int64 epoch seconds, 0 when the feed omits them. `stop_name` holds the
+    catalog name of each stop id, '' when it is unknown.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self._string_ids = {}
+        self.trip_id = array('l')
+        self.route_id = array('l')
+        self.direction = array('l')
+        self.start_time = array('l')
+        self.start_date = array('l')
+        self.stop_start = array('l', [0])
+        self.stop_trip = array('l')
+        self.stop_id = array('l')
+        self.stop_name = array('l')
+        self.arrival = array('q')
+        self.departure = array('q')
+        self._time_strings = None
+
+    @classmethod
+    def from_feed(cls, feed, stop_names=None):
+        """Decode a FeedMessage; `stop_names` maps a stop id to its name or None"""
+        table = cls()
+        intern = table.intern
+        names = {}
+        for entity in feed.entity:
+            if not entity.HasField('trip_update'):
+                continue
+            trip_update = entity.trip_update
+            trip = trip_update.trip
+            table.trip_id.append(intern(trip.trip_id))
+            table.route_id.append(intern(trip_route(trip)))
+            table.direction.append(intern(trip_direction(trip.trip_id)))
+            table.start_time.append(intern(trip.start_time))
+            table.start_date.append(intern(trip.start_date))
+            trip_row = len(table.trip_id) - 1
+            for stop_time_update in trip_update.stop_time_update:
+                table.stop_trip.append(trip_row)
+                stop_id = intern(stop_time_update.stop_id)
+                name = names.get(stop_id)
+                if name is None:
+                    # resolved once per distinct stop id, not per stop row
+                    resolved = stop_names(stop_time_update.stop_id) if stop_names is not None else None
+                    name = names[stop_id] = intern(resolved or '')
+                table.stop_id.append(stop_id)
+                table.stop_name.append(name)
+                table.arrival.append(stop_time_update.arrival.time if stop_time_update.HasField('arrival') else 0)
+                table.departure.append(stop_time_update.departure.time if stop_time_update.HasField('departure') else 0)
+            table.stop_start.append(len(table.stop_id))
+        return table
+
+    def to_bytes(self):
+        """Serialize as the '\\0'-joined strings followed by each column's raw bytes"""
+        strings = '\0'.join(self.strings).encode('utf-8')
+        parts = [struct.pack('<Q', len(strings)), strings]
+        for name in COLUMNS:
+            column = getattr(self, name)
+            parts.append(struct.pack('<cQ', column.typecode.encode(), len(column) * column.itemsize))
+            parts.append(column.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """Inverse of to_bytes; each column is a single memcpy, nothing is re-decoded"""
+        table = cls()
+        view = memoryview(payload)
+        size, = struct.unpack_from('<Q', view)
+        offset = 8 + size
+        table.strings = bytes(view[8:offset]).decode('utf-8').split('\0')
+        table._string_ids = {value: index for index, value in enumerate(table.strings)}
+        for name in COLUMNS:
+            typecode, size = struct.unpack_from('<cQ', view, offset)
+            offset += 9
+            column = array(typecode.decode())
+            column.frombytes(view[offset:offset + size])
+            offset += size
+            setattr(table, name, column)
+        return table
+
+    def __len__(self):
+        return len(self.trip_id)
+
+    def intern(self, value):
+        index = self._string_ids.get(value)
+        if index is None:
+            index = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def string_id(self, value):
+        """Index of an interned string, or None if it never appears"""
+        return self._string_ids.get(value)
+
+    def stop_rows(self, trip):
+        return range(self.stop_start[trip], self.stop_start[trip + 1])
+
+    def event_time(self, row):
+        """Arrival time of a stop row, or its departure time if there is none"""
+        return self.arrival[row] or self.departure[row]
+
+    def time_strings(self):
+        # formatted once per snapshot, shared by every request
+        if self._time_strings is None:
+            times = format_times(self.arrival)
+            times.update(format_times(self.departure))
+            self._time_strings = times
+        return self._time_strings
+
+    def records(self, trips=None, time_format='iso', after=None, before=None, limit=None, fields=None):
+        """Materialize trips in the JSON shape served by the API.
+
+        `time_format` is 'iso' for "YYYY-mm-dd HH:MM:SS" strings or 'epoch'
+        for integer seconds. `after`/`before` keep only stop time updates
+        inside that epoch window (dropping trips left with none), `limit`
+        caps the number of trips and `fields` projects each trip onto a
+        subset of TRIP_FIELDS (DEFAULT_TRIP_FIELDS when omitted).
+        """
+        return list(self.iter_records(trips, time_format, after, before, limit, fields))
+
+    def iter_records(self, trips=None, time_format='iso', after=None, before=None, limit=None, fields=None):
+        """Like records, but yields one trip at a time for streamed responses"""
+        strings = self.strings
+        if time_format == 'epoch':
+            def render(timestamp):
+                return timestamp or None
+        else:
+            render = self.time_strings().get
+        windowed = after is not None or before is not None
+        fields = DEFAULT_TRIP_FIELDS if fields is None else fields
+
+        count = 0
+        for trip in range(len(self)) if trips is None else trips:
+            if limit is not None and count >= limit:
+                break
+            rows = self.stop_rows(trip)
+            if windowed:
+                rows = [row for row in rows if self._in_window(self.event_time(row), after, before)]
+                if not rows:
+                    continue
+            record = {}
+            for field in fields:
+                if field == 'stop_time_updates':
+                    record[field] = [
+                        {
+                            'stop_id': strings[self.stop_id[row]],
+                            'stop_name': strings[self.stop_name[row]] or None,
+                            'arrival_time': render(self.arrival[row]),
+                            'departure_time': render(self.departure[row])
+                        }
+                        for row in rows
+                    ]
+                else:
+                    record[field] = strings[getattr(self, field)[trip]]
+            count += 1
+            yield record
+
+    @staticmethod
+    def _in_window(timestamp, after, before):
+        if not timestamp:
+            return False
+        return (after is None or timestamp >= after) and (before is None or timestamp <= before)
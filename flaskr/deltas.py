@@ -0,0 +1,133 @@
+import queue
+import threading
+from collections import deque
+
+from columnar import format_time
+
+
+def trip_signatures(table):
+    """trip_id -> (trip row, hashable summary of everything the API serves)"""
+    strings = table.strings
+    signatures = {}
+    for trip in range(len(table)):
+        start, end = table.stop_start[trip], table.stop_start[trip + 1]
+        signatures[strings[table.trip_id[trip]]] = (trip, (
+            strings[table.start_time[trip]],
+            strings[table.start_date[trip]],
+            tuple(strings[stop] for stop in table.stop_id[start:end]),
+            table.arrival[start:end].tobytes(),
+            table.departure[start:end].tobytes(),
+        ))
+    return signatures
+
+
+def diff_snapshots(old, new):
+    """Trips added, removed and changed between two snapshots of one feed.
+
+    Added and changed trips carry their full record (epoch times) so a
+    client can replace them wholesale; removed trips are listed by id.
+    """
+    before = old.signatures()
+    after = new.signatures()
+    added, changed = [], []
+    for trip_id, (trip, signature) in after.items():
+        previous = before.get(trip_id)
+        if previous is None:
+            added.append(trip)
+        elif previous[1] != signature:
+            changed.append(trip)
+    return {
+        'version': new.version,
+        'since': old.version,
+        'added': new.records(added, time_format='epoch'),
+        'changed': new.records(changed, time_format='epoch'),
+        'removed': [trip_id for trip_id in before if trip_id not in after],
+    }
+
+
+def compose_deltas(deltas):
+    """Collapse consecutive deltas into one delta spanning all of them"""
+    state = {}
+    for delta in deltas:
+        for record in delta['added']:
+            kind = 'changed' if state.get(record['trip_id'], ('',))[0] == 'removed' else 'added'
+            state[record['trip_id']] = (kind, record)
+        for record in delta['changed']:
+            kind = state.get(record['trip_id'], ('changed',))[0]
+            state[record['trip_id']] = ('added' if kind == 'added' else 'changed', record)
+        for trip_id in delta['removed']:
+            if state.get(trip_id, ('',))[0] == 'added':
+                del state[trip_id]
+            else:
+                state[trip_id] = ('removed', None)
+
+    return {
+        'version': deltas[-1]['version'],
+        'since': deltas[0]['since'],
+        'added': [record for kind, record in state.values() if kind == 'added'],
+        'changed': [record for kind, record in state.values() if kind == 'changed'],
+        'removed': [trip_id for trip_id, (kind, _) in state.items() if kind == 'removed'],
+    }
+
+
+def render_delta(delta, time_format='iso'):
+    """A delta with its stop times rendered like the full feed response"""
+    if time_format == 'epoch':
+        return delta
+
+    def render(records):
+        return [
+            dict(record, stop_time_updates=[
+                dict(
+                    stop,
+                    arrival_time=format_time(stop['arrival_time']) if stop['arrival_time'] else None,
+                    departure_time=format_time(stop['departure_time']) if stop['departure_time'] else None
+                )
+                for stop in record['stop_time_updates']
+            ])
+            for record in records
+        ]
+
+    return dict(delta, added=render(delta['added']), changed=render(delta['changed']))
+
+
+class DeltaLog:
+    """Ring buffer of the most recent deltas of one feed, plus live subscribers"""
+
+    def __init__(self, size=20):
+        self._deltas = deque(maxlen=size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def append(self, delta):
+        with self._lock:
+            self._deltas.append(delta)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(delta)
+            except queue.Full:
+                # the client fell behind; drop its backlog and have it resync
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(None)
+
+    def since(self, version):
+        """One delta from `version` to the latest, or None if it fell out of the buffer"""
+        with self._lock:
+            deltas = list(self._deltas)
+        for start, delta in enumerate(deltas):
+            if delta['since'] == version:
+                return compose_deltas(deltas[start:])
+        return None
+
+    def subscribe(self, maxsize=100):
+        """Queue receiving every new delta, or None when the reader must resync"""
+        subscriber = queue.Queue(maxsize=maxsize)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
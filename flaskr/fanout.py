@@ -0,0 +1,43 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class FanOut:
+    """Runs independent upstream calls concurrently on a shared thread pool.
+
+    `run()` returns whatever finished in time: a dict of results and a dict
+    of error messages, both keyed like the tasks. A slow or failing upstream
+    costs its own entry, not the whole response, and wall-clock time is
+    bounded by the slowest task rather than the sum.
+    """
+
+    def __init__(self, max_workers=16, timeout=10):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fanout')
+
+    def run(self, tasks, timeout=None):
+        """Call every `tasks[name]()` at once and collect partial results.
+
+        `timeout` is either seconds for every task or a dict of per-task
+        seconds; tasks missing from the dict use the default.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        started = time.monotonic()
+        futures = {name: self._executor.submit(task) for name, task in tasks.items()}
+
+        results, errors = {}, {}
+        for name, future in futures.items():
+            limit = timeout.get(name, self.timeout) if isinstance(timeout, dict) else timeout
+            try:
+                results[name] = future.result(timeout=max(0.0, started + limit - time.monotonic()))
+            except TimeoutError:
+                future.cancel()
+                errors[name] = f"timed out after {limit}s"
+            except Exception as e:
+                errors[name] = str(e)
+        return results, errors
+
+    def map(self, function, names, timeout=None):
+        """run() with the same function applied to each name"""
+        return self.run({name: (lambda name=name: function(name)) for name in names}, timeout)
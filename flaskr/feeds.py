@@ -0,0 +1,351 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+from google.transit import gtfs_realtime_pb2
+
+from columnar import TripTable, parent_stop, trip_direction
+from deltas import DeltaLog, diff_snapshots, trip_signatures
+from metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+MTA_BASE_URL = 'https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/'
+
+# GTFS-realtime feed groups published by the MTA, relative to MTA_BASE_URL
+FEED_PATHS = {
+    'ace': 'nyct%2Fgtfs-ace',
+    'bdfm': 'nyct%2Fgtfs-bdfm',
+    'g': 'nyct%2Fgtfs-g',
+    'jz': 'nyct%2Fgtfs-jz',
+    'nqrw': 'nyct%2Fgtfs-nqrw',
+    'l': 'nyct%2Fgtfs-l',
+    '1234567s': 'nyct%2Fgtfs',
+    'sir': 'nyct%2Fgtfs-si'
+}
+
+# Elevator and escalator (ENE) documents
+ENE_PATHS = {
+    'current': 'nyct%2Fnyct_ene.xml',
+    'upcoming': 'nyct%2Fnyct_ene_upcoming.xml',
+    'equipment': 'nyct%2Fnyct_ene_equipments.xml',
+}
+
+
+def feed_urls(paths, base_url=MTA_BASE_URL):
+    """Absolute URLs for a name -> path map, e.g. to point at a stand-in server"""
+    return {name: base_url + path for name, path in paths.items()}
+
+
+FEEDS = feed_urls(FEED_PATHS)
+ENE_FEEDS = feed_urls(ENE_PATHS)
+
+
+def parse_feed(content):
+    """Parse a GTFS-realtime protobuf payload into a FeedMessage"""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(content)
+    return feed
+
+
+def build_arrivals_index(table):
+    """Index a TripTable as stop id -> upcoming arrivals sorted by time.
+
+    Every arrival is filed under its platform stop ("A32N") and parent
+    station ("A32"), each both unfiltered and by route and/or direction, so
+    a board lookup with any combination of filters is a dict hit plus a
+    bisect. Keys are (stop_id, route_id or None, direction or None); values
+    are parallel arrays of arrival times and stop rows of the table.
+    """
+    strings = table.strings
+    index = {}
+    for trip in range(len(table)):
+        route_id = strings[table.route_id[trip]]
+        default_direction = strings[table.direction[trip]]
+        for row in table.stop_rows(trip):
+            timestamp = table.event_time(row)
+            if not timestamp:
+                continue
+            stop_id = strings[table.stop_id[row]]
+            direction = default_direction or trip_direction('', stop_id)
+            arrival = (timestamp, row)
+            for stop in {stop_id, parent_stop(stop_id)}:
+                for key in ((stop, None, None), (stop, route_id, None),
+                            (stop, None, direction), (stop, route_id, direction)):
+                    index.setdefault(key, []).append(arrival)
+
+    columns = {}
+    for key, arrivals in index.items():
+        arrivals.sort()
+        columns[key] = (array('q', [a[0] for a in arrivals]), array('l', [a[1] for a in arrivals]))
+    return columns
+
+
+def build_partitions(table):
+    """(route_id or None, direction or None) -> trip rows, in feed order"""
+    strings = table.strings
+    partitions = {}
+    for trip in range(len(table)):
+        route_id = strings[table.route_id[trip]]
+        direction = strings[table.direction[trip]] or None
+        for key in {(route_id, direction), (route_id, None), (None, direction)}:
+            if key != (None, None):
+                partitions.setdefault(key, array('l')).append(trip)
+    return partitions
+
+
+class Snapshot:
+    """An already-decoded copy of one revision of a feed, indexed for queries"""
+
+    def __init__(self, line, version, trips, fetched_at=None):
+        self.line = line
+        self.version = version
+        self.trips = trips
+        self.arrivals = build_arrivals_index(self.trips)
+        self.partitions = build_partitions(self.trips)
+        self._signatures = None
+        # serialized response bodies of this version, see body()
+        self._bodies = {}
+        self._bodies_lock = threading.Lock()
+        # last time upstream confirmed this revision is current
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @property
+    def age(self):
+        return max(0.0, time.time() - self.fetched_at)
+
+    @property
+    def data(self):
+        return self.records()
+
+    def records(self, trips=None, time_format='iso'):
+        return self.trips.records(trips, time_format)
+
+    def query(self, route_id=None, direction=None, stop_id=None, after=None, before=None,
+              limit=None, fields=None, time_format='iso'):
+        """Trips matching the filters, materialized only after filtering.
+
+        Route and direction select a precomputed partition; `stop_id` keeps
+        trips that call at that stop (platform or parent) per the arrivals
+        index; the time window, limit and field projection are applied by
+        TripTable.records.
+        """
+        return list(self.iter_query(route_id, direction, stop_id, after, before, limit, fields, time_format))
+
+    def iter_query(self, route_id=None, direction=None, stop_id=None, after=None, before=None,
+                   limit=None, fields=None, time_format='iso'):
+        """Like query, but yields each trip as it is materialized"""
+        if route_id is None and direction is None:
+            trips = range(len(self.trips))
+        else:
+            trips = self.partitions.get((route_id, direction), ())
+        if stop_id is not None:
+            _, rows = self.arrivals.get((stop_id, route_id, direction), ((), ()))
+            calling = {self.trips.stop_trip[row] for row in rows}
+            trips = [trip for trip in trips if trip in calling]
+        return self.trips.iter_records(trips, time_format, after=after, before=before, limit=limit, fields=fields)
+
+    def body(self, key, build):
+        """The response body cached under `key`, built once by `build()`"""
+        body = self._bodies.get(key)
+        if body is None:
+            with self._bodies_lock:
+                body = self._bodies.get(key)
+                if body is None:
+                    body = self._bodies[key] = build()
+        return body
+
+    def signatures(self):
+        if self._signatures is None:
+            self._signatures = trip_signatures(self.trips)
+        return self._signatures
+
+    def next_arrivals(self, stop_id, after, limit, route_id=None, direction=None):
+        """Arrivals at `stop_id` at or after `after`, soonest first.
+
+        Each arrival is (timestamp, trip_id, route_id, direction, stop_id, stop_name).
+        """
+        times, rows = self.arrivals.get((stop_id, route_id, direction), ((), ()))
+        start = bisect_left(times, after)
+        table = self.trips
+        strings = table.strings
+        arrivals = []
+        for timestamp, row in zip(times[start:start + limit], rows[start:start + limit]):
+            trip = table.stop_trip[row]
+            platform = strings[table.stop_id[row]]
+            arrivals.append((
+                timestamp,
+                strings[table.trip_id[trip]],
+                strings[table.route_id[trip]],
+                strings[table.direction[trip]] or trip_direction('', platform),
+                platform,
+                strings[table.stop_name[row]] or None,
+            ))
+        return arrivals
+
+
+class FeedPoller:
+    """Keeps the latest decoded snapshot of every feed in memory.
+
+    A daemon thread revalidates each feed every `interval` seconds through the
+    shared UpstreamClient. Readers call `get()`, which serves the cached
+    snapshot and leaves freshness (TTL, stale-while-revalidate) to the client.
+    A feed is only decoded again when upstream reports new content.
+
+    Each new snapshot is diffed against the previous one; the delta goes
+    into that feed's DeltaLog and is passed to every listener registered
+    with `add_listener(callback(line, old, new, delta))`. Listeners run
+    after the line lock is released, so a slow one never holds up readers,
+    but still one at a time and in version order for each line.
+
+    With a SharedStore, only the process holding the poller lease decodes
+    feeds; it publishes every decoded TripTable under its upstream revision.
+    Other processes follow: every `sync_interval` seconds, and on each
+    `get()`, they load the table of any newer version straight from the
+    store, with no protobuf parsing and no upstream traffic.
+    """
+
+    def __init__(self, upstream, fanout, feeds=FEEDS, interval=30, delta_history=20, metrics=None,
+                 stations=None, store=None, sync_interval=2):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.upstream = upstream
+        self.stations = stations
+        self.store = store
+        self.fanout = fanout
+        self.feeds = feeds
+        self.interval = interval
+        self.sync_interval = sync_interval
+        self.deltas = {line: DeltaLog(delta_history) for line in feeds}
+        self._listeners = []
+        self._snapshots = {}
+        self._locks = {line: threading.Lock() for line in feeds}
+        # installs waiting for their listeners, and who is calling them
+        self._pending = {line: deque() for line in feeds}
+        self._notifying = {line: threading.Lock() for line in feeds}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='feed-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+
+    def _run(self):
+        while not self._stop.is_set():
+            following = self._following()
+            # failed feeds keep serving their previous snapshot until the next tick
+            _, errors = self.fanout.map(self.sync if following else self.refresh, self.feeds)
+            for line, error in errors.items():
+                logger.warning("feed refresh failed line=%s error=%s", line, error)
+            self._stop.wait(self.sync_interval if following else self.interval)
+
+    def _following(self):
+        return self.store is not None and not self.store.is_leader()
+
+    def refresh(self, line):
+        """Revalidate one feed upstream and return its current snapshot"""
+        return self._snapshot(line, self.upstream.revalidate(self.feeds[line]))
+
+    def get(self, line):
+        """Return the current snapshot of `line`"""
+        if line not in self.feeds:
+            raise KeyError(line)
+        if self._following():
+            snapshot = self.sync(line)
+            if snapshot is not None:
+                return snapshot
+        return self._snapshot(line, self.upstream.fetch(self.feeds[line]))
+
+    def sync(self, line):
+        """Load `line` from the shared store if it holds a newer version.
+
+        Returns the current snapshot, or None if the store has nothing
+        recent enough for this feed.
+        """
+        with self._locks[line]:
+            previous = self._snapshots.get(line)
+            row = self.store.get_snapshot(self.feeds[line], previous.version if previous is not None else 0)
+            if row is None:
+                return None
+            version, fetched_at, payload = row
+            if payload is None:
+                # nothing newer; refresh the age the leader last confirmed
+                if previous is not None and previous.version == version:
+                    previous.fetched_at = fetched_at
+                return previous
+            with self.metrics.phase('transform'):
+                snapshot = Snapshot(line, version, TripTable.from_bytes(payload), fetched_at)
+            self._install(line, previous, snapshot)
+        self._notify(line)
+        return snapshot
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def get_all(self, lines=None):
+        """Snapshots of several feeds fetched concurrently, plus per-line errors"""
+        return self.fanout.map(self.get, lines if lines is not None else self.feeds)
+
+    def _snapshot(self, line, entry):
+        with self._locks[line]:
+            previous = self._snapshots.get(line)
+            if previous is not None and previous.version >= entry.revision:
+                # unchanged, or a slower reader holding an older entry
+                if previous.version == entry.revision and previous.fetched_at != entry.fetched_at:
+                    previous.fetched_at = entry.fetched_at
+                    if self._publishing():
+                        self.store.touch_snapshot(self.feeds[line], entry.fetched_at)
+                return previous
+
+            with self.metrics.phase('parse'):
+                feed = parse_feed(entry.content)
+            with self.metrics.phase('transform'):
+                trips = TripTable.from_feed(feed, self.stations.stop_name if self.stations is not None else None)
+                snapshot = Snapshot(line, entry.revision, trips, entry.fetched_at)
+            if self._publishing():
+                self.store.put_snapshot(self.feeds[line], entry.revision, trips.to_bytes(), entry.fetched_at)
+            self._install(line, previous, snapshot)
+        self._notify(line)
+        return snapshot
+
+    def _publishing(self):
+        return self.store is not None and self.store.is_leader()
+
+    def _install(self, line, previous, snapshot):
+        # caller holds the line lock
+        with self.metrics.phase('transform'):
+            delta = diff_snapshots(previous, snapshot) if previous is not None else None
+        self._snapshots[line] = snapshot
+        if delta is not None:
+            self.deltas[line].append(delta)
+        self._pending[line].append((previous, snapshot, delta))
+
+    def _notify(self, line):
+        # call the listeners for every pending install of `line`, outside its lock
+        pending = self._pending[line]
+        while pending:
+            if not self._notifying[line].acquire(blocking=False):
+                # whoever holds it drains what we queued as well
+                return
+            try:
+                while pending:
+                    previous, snapshot, delta = pending.popleft()
+                    for listener in self._listeners:
+                        try:
+                            listener(line, previous, snapshot, delta)
+                        except Exception:
+                            # a broken consumer must not stop ingestion
+                            logger.exception("snapshot listener failed line=%s", line)
+            finally:
+                self._notifying[line].release()
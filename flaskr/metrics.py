@@ -0,0 +1,103 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import has_request_context, request
+
+
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'subway_request_duration_seconds': ('histogram', 'Time to produce a response, by route and status'),
+    'subway_phase_duration_seconds': ('histogram', 'Time spent per phase (fetch, parse, transform, serialize)'),
+    'subway_response_bytes_total': ('counter', 'Response body bytes, by route'),
+    'subway_upstream_requests_total': ('counter', 'Upstream fetches, by upstream and HTTP status'),
+    'subway_upstream_errors_total': ('counter', 'Upstream fetches that raised, by upstream'),
+    'subway_upstream_bytes_total': ('counter', 'Bytes downloaded from each upstream'),
+    'subway_upstream_rejected_total': ('counter', 'Upstream calls failed fast by the circuit breaker or negative cache'),
+    'subway_upstream_hedges_total': ('counter', 'Hedged second requests sent to slow upstreams'),
+    'subway_cache_requests_total': ('counter', 'Upstream cache lookups, by result (hit, stale, miss, fallback)'),
+}
+
+
+def current_route():
+    """Label for the code path doing the work: the Flask endpoint, or 'ingest'"""
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'ingest'
+
+
+class Metrics:
+    """In-process counters and histograms rendered as Prometheus text.
+
+    Every update is a dict lookup and an add under one lock, cheap enough
+    to leave on in the hot path.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            histogram[0][bisect_left(BUCKETS, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextmanager
+    def phase(self, phase, route=None):
+        """Time the enclosed block as `phase` of `route` (default: current route)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('subway_phase_duration_seconds', time.perf_counter() - started,
+                         route=route or current_route(), phase=phase)
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in HELP.items():
+            series = counters if kind == 'counter' else histograms
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in keys:
+                labels = key[1]
+                if kind == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {series[key]}")
+                    continue
+                buckets, total, count = series[key]
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS + (float('inf'),), buckets):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
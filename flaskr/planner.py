@@ -0,0 +1,391 @@
+import csv
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from columnar import parent_stop, trip_direction
+
+
+# seconds to walk between the stations of one transfer complex
+TRANSFER_SECONDS = 180
+
+# most vehicles one journey may board
+MAX_ROUNDS = 4
+
+# static trips are only loaded for departures this many seconds ahead
+STATIC_WINDOW = 4 * 3600
+
+INFINITY = float('inf')
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def trip_key(trip_id):
+    """The part of a trip id shared by GTFS static and NYCT realtime ("…_054850_A..N03R" -> "054850_A..N03R")"""
+    return '_'.join(trip_id.split('_')[-2:])
+
+
+def _seconds(value):
+    # GTFS "HH:MM:SS", where HH may run past 24 for trips after midnight
+    hours, minutes, seconds = value.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def _rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+class StaticTimetable:
+    """GTFS static trips, stop_times and calendar, for trips beyond the realtime horizon.
+
+    Each trip keeps its route, service and its stops with times as seconds
+    after the service day's noon minus 12h (the GTFS reference point).
+    `instances(start, end)` turns the trips running on the relevant
+    service days into absolute epoch times.
+    """
+
+    def __init__(self):
+        self.trips = {}
+        self.services = {}
+
+    @classmethod
+    def load(cls, directory):
+        timetable = cls()
+        paths = {name: os.path.join(directory, f"{name}.txt") for name in ('trips', 'stop_times', 'calendar')}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return timetable
+        for service in _rows(paths['calendar']):
+            timetable.services[service['service_id']] = (
+                tuple(service[day] == '1' for day in WEEKDAYS),
+                datetime.strptime(service['start_date'], '%Y%m%d').date(),
+                datetime.strptime(service['end_date'], '%Y%m%d').date(),
+            )
+        routes = {trip['trip_id']: (trip['route_id'], trip['service_id']) for trip in _rows(paths['trips'])}
+        stops = {}
+        for stop_time in _rows(paths['stop_times']):
+            stops.setdefault(stop_time['trip_id'], []).append((
+                int(stop_time['stop_sequence']),
+                stop_time['stop_id'],
+                _seconds(stop_time['arrival_time'] or stop_time['departure_time']),
+                _seconds(stop_time['departure_time'] or stop_time['arrival_time']),
+            ))
+        for trip_id, trip_stops in stops.items():
+            if trip_id in routes:
+                trip_stops.sort()
+                timetable.trips[trip_id] = routes[trip_id] + ([stop[1:] for stop in trip_stops],)
+        return timetable
+
+    def __len__(self):
+        return len(self.trips)
+
+    def _runs(self, service_id, day):
+        service = self.services.get(service_id)
+        return service is not None and service[1] <= day <= service[2] and service[0][day.weekday()]
+
+    def instances(self, start, end):
+        """(trip_id, route_id, [(stop_id, arrival, departure)]) of trips departing in [start, end]"""
+        today = datetime.fromtimestamp(start).date()
+        for day in (today - timedelta(days=1), today):
+            origin = datetime.combine(day, datetime.min.time()).replace(hour=12).timestamp() - 43200
+            for trip_id, (route_id, service_id, stops) in self.trips.items():
+                if not stops or origin + stops[-1][2] < start or origin + stops[0][2] > end:
+                    continue
+                if self._runs(service_id, day):
+                    yield trip_id, route_id, [(stop_id, origin + arrival, origin + departure)
+                                              for stop_id, arrival, departure in stops]
+
+
+class _Pattern:
+    # trips calling at the same stations in the same order, times as flat rows
+    def __init__(self, route_id, stops):
+        self.route_id = route_id
+        self.stops = stops
+        self.trip_ids = []
+        self.directions = []
+        self.realtime = []
+        self.arrival = array('d')
+        self.departure = array('d')
+        # per stop position: departures sorted, and the trip of each
+        self.boarding = None
+
+    def add(self, trip_id, direction, realtime, times):
+        self.trip_ids.append(trip_id)
+        self.directions.append(direction)
+        self.realtime.append(realtime)
+        for arrival, departure in times:
+            self.arrival.append(arrival)
+            self.departure.append(departure)
+
+    def seal(self):
+        width = len(self.stops)
+        self.boarding = []
+        for position in range(width):
+            order = sorted(range(len(self.trip_ids)), key=lambda trip: self.departure[trip * width + position])
+            self.boarding.append((array('d', (self.departure[trip * width + position] for trip in order)),
+                                  array('l', order)))
+
+    def earliest(self, position, after):
+        """Trip with the earliest departure at `position` not before `after`, or None"""
+        departures, trips = self.boarding[position]
+        index = bisect_left(departures, after)
+        return trips[index] if index < len(trips) else None
+
+
+class Timetable:
+    """Array-backed RAPTOR timetable of one moment's trips.
+
+    Stations (parent stop ids) are numbered; every trip becomes a row of a
+    pattern (a route's ordered station sequence) and `stop_patterns` lists
+    the (pattern, position) pairs serving each station. Footpaths link the
+    stations of a transfer complex.
+    """
+
+    def __init__(self, stations=None, transfer_seconds=TRANSFER_SECONDS):
+        self.station_ids = []
+        self.index = {}
+        self.patterns = {}
+        self.stop_patterns = []
+        self.footpaths = []
+        self._stations = stations
+        self._transfer_seconds = transfer_seconds
+
+    def station(self, stop_id):
+        """Routing index of the station of `stop_id`, added if new"""
+        station_id = self._stations.station_id(stop_id) if self._stations is not None else None
+        station_id = station_id or parent_stop(stop_id)
+        index = self.index.get(station_id)
+        if index is None:
+            index = self.index[station_id] = len(self.station_ids)
+            self.station_ids.append(station_id)
+        return index
+
+    def add_trip(self, trip_id, route_id, direction, realtime, stops):
+        """Add a trip from its (stop_id, arrival, departure) calls"""
+        calls = []
+        for stop_id, arrival, departure in stops:
+            if not (arrival or departure):
+                continue
+            station = self.station(stop_id)
+            if calls and calls[-1][0] == station:
+                continue
+            calls.append((station, arrival or departure, departure or arrival))
+        if len(calls) < 2:
+            return
+        key = (route_id, tuple(call[0] for call in calls))
+        pattern = self.patterns.get(key)
+        if pattern is None:
+            pattern = self.patterns[key] = _Pattern(route_id, key[1])
+        pattern.add(trip_id, direction, realtime, [(arrival, departure) for _, arrival, departure in calls])
+
+    def seal(self):
+        self.stop_patterns = [[] for _ in self.station_ids]
+        for pattern in self.patterns.values():
+            pattern.seal()
+            for position, station in enumerate(pattern.stops):
+                self.stop_patterns[station].append((pattern, position))
+        self.footpaths = [[] for _ in self.station_ids]
+        if self._stations is None:
+            return
+        complexes = {}
+        catalog = self._stations
+        for station_id, index in self.index.items():
+            row = catalog.rows.get(station_id)
+            if row is not None:
+                complexes.setdefault(catalog.complex[row], []).append(index)
+        for members in complexes.values():
+            for a in members:
+                self.footpaths[a].extend((b, self._transfer_seconds) for b in members if b != a)
+
+
+class JourneyPlanner:
+    """Earliest-arrival journeys across every line (RAPTOR).
+
+    The timetable is every trip of the current snapshots, with the
+    realtime predictions as its times, plus GTFS static trips (when a
+    static timetable is loaded) for the trips realtime does not cover yet.
+    It is rebuilt once per set of snapshot versions and shared by all
+    queries. Each round of a query rides one more vehicle: it scans only
+    the patterns serving stations improved in the previous round, then
+    relaxes footpaths. Label and parent buffers are per thread and reused
+    across queries. The static window follows `clock()`, which a replay
+    sets to its virtual time.
+    """
+
+    def __init__(self, stations=None, static=None, transfer_seconds=TRANSFER_SECONDS, max_rounds=MAX_ROUNDS,
+                 static_window=STATIC_WINDOW, clock=time.time):
+        self.stations = stations
+        self.static = static if static is not None else StaticTimetable()
+        self.transfer_seconds = transfer_seconds
+        self.max_rounds = max_rounds
+        self.static_window = static_window
+        self.clock = clock
+        self._timetable = None
+        self._versions = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def timetable(self, snapshots, now=None):
+        now = self.clock() if now is None else now
+        # static trips enter the window as time passes, so rebuild at least every minute
+        versions = (tuple(sorted((line, snapshot.version) for line, snapshot in snapshots.items())),
+                    int(now // 60) if len(self.static) else None)
+        with self._lock:
+            if versions != self._versions:
+                self._timetable = self._build(snapshots, now)
+                self._versions = versions
+            return self._timetable
+
+    def _build(self, snapshots, now):
+        timetable = Timetable(self.stations, self.transfer_seconds)
+        covered = set()
+        for line, snapshot in sorted(snapshots.items()):
+            table = snapshot.trips
+            strings = table.strings
+            for trip in range(len(table)):
+                trip_id = strings[table.trip_id[trip]]
+                covered.add(trip_key(trip_id))
+                stops = [(strings[table.stop_id[row]], table.arrival[row], table.departure[row])
+                         for row in table.stop_rows(trip)]
+                direction = strings[table.direction[trip]] or trip_direction('', stops[0][0] if stops else '')
+                timetable.add_trip(trip_id, strings[table.route_id[trip]], direction, True, stops)
+        for trip_id, route_id, stops in self.static.instances(now, now + self.static_window):
+            if trip_key(trip_id) not in covered:
+                timetable.add_trip(trip_id, route_id, trip_direction(trip_id, stops[0][0]), False, stops)
+        timetable.seal()
+        return timetable
+
+    def _buffers(self, size):
+        # labels[k][s]: earliest arrival at s with at most k vehicles;
+        # parents[k][s]: the ride or walk that set it in round k
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None or len(buffers[2]) != size:
+            rounds = self.max_rounds + 1
+            buffers = self._local.buffers = (
+                [array('d', [INFINITY]) * size for _ in range(rounds)],
+                [[None] * size for _ in range(rounds)],
+                array('d', [INFINITY]) * size,
+                array('d', [INFINITY]) * size,
+                [None] * size,
+            )
+        return buffers
+
+    def plan(self, timetable, origin, destination, depart, max_transfers=None):
+        """Journeys from station `origin` to `destination` leaving at `depart`.
+
+        One journey per number of vehicles that improves on the arrival with
+        fewer vehicles (the Pareto set of arrival time and transfers), fewest
+        vehicles first. Each journey is a dict of its departure, arrival,
+        transfers and legs.
+        """
+        source = timetable.index.get(origin)
+        target = timetable.index.get(destination)
+        if source is None or target is None or source == target:
+            return []
+        rounds = self.max_rounds if max_transfers is None else min(self.max_rounds, max_transfers + 1)
+        size = len(timetable.station_ids)
+        labels, parents, best, empty, no_parents = self._buffers(size)
+        # the buffers hold the previous query's labels on this thread
+        for k in range(rounds + 1):
+            labels[k][:] = empty
+            parents[k][:] = no_parents
+        best[:] = empty
+
+        labels[0][source] = best[source] = depart
+        marked = {source}
+        for station, seconds in timetable.footpaths[source]:
+            labels[0][station] = best[station] = depart + seconds
+            parents[0][station] = ('walk', source, seconds)
+            marked.add(station)
+
+        computed = 0
+        for k in range(1, rounds + 1):
+            computed = k
+            previous, current, parent = labels[k - 1], labels[k], parents[k]
+            current[:] = previous
+            queue = {}
+            for station in marked:
+                for pattern, position in timetable.stop_patterns[station]:
+                    if position < queue.get(pattern, (None, len(pattern.stops)))[1]:
+                        queue[pattern] = (pattern, position)
+            marked = set()
+            for pattern, start in queue.values():
+                width = len(pattern.stops)
+                trip = None
+                boarded = None
+                for position in range(start, width):
+                    station = pattern.stops[position]
+                    if trip is not None:
+                        arrival = pattern.arrival[trip * width + position]
+                        if arrival < best[station] and arrival < best[target]:
+                            current[station] = best[station] = arrival
+                            parent[station] = ('ride', pattern, trip, boarded, position)
+                            marked.add(station)
+                    ready = previous[station]
+                    if ready < INFINITY and (trip is None or ready <= pattern.departure[trip * width + position]):
+                        candidate = pattern.earliest(position, ready)
+                        if candidate is not None and candidate != trip:
+                            trip, boarded = candidate, position
+            for station in list(marked):
+                for other, seconds in timetable.footpaths[station]:
+                    arrival = current[station] + seconds
+                    if arrival < best[other] and arrival < best[target]:
+                        current[other] = best[other] = arrival
+                        parent[other] = ('walk', station, seconds)
+                        marked.add(other)
+            if not marked:
+                break
+
+        journeys = []
+        arrival = labels[0][target]
+        for k in range(1, computed + 1):
+            if labels[k][target] < arrival:
+                arrival = labels[k][target]
+                legs = self._legs(timetable, parents, k, target)
+                rides = [leg for leg in legs if leg['type'] == 'ride']
+                journeys.append({
+                    'departure': rides[0]['departure'],
+                    'arrival': arrival,
+                    'transfers': len(rides) - 1,
+                    'legs': legs,
+                })
+        return journeys
+
+    @staticmethod
+    def _legs(timetable, parents, k, station):
+        legs = []
+        while True:
+            step = parents[k][station]
+            if step is None:
+                if k == 0:
+                    break
+                # reached with fewer vehicles; its parent is in an earlier round
+                k -= 1
+                continue
+            if step[0] == 'walk':
+                _, origin, seconds = step
+                legs.append({'type': 'walk', 'from': timetable.station_ids[origin],
+                             'to': timetable.station_ids[station], 'seconds': seconds})
+                station = origin
+                continue
+            _, pattern, trip, boarded, alighted = step
+            width = len(pattern.stops)
+            legs.append({
+                'type': 'ride',
+                'route_id': pattern.route_id,
+                'trip_id': pattern.trip_ids[trip],
+                'direction': pattern.directions[trip] or None,
+                'realtime': pattern.realtime[trip],
+                'from': timetable.station_ids[pattern.stops[boarded]],
+                'departure': pattern.departure[trip * width + boarded],
+                'to': timetable.station_ids[pattern.stops[alighted]],
+                'arrival': pattern.arrival[trip * width + alighted],
+                'stops': alighted - boarded,
+            })
+            station = pattern.stops[boarded]
+            k -= 1
+        legs.reverse()
+        return legs
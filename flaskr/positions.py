@@ -0,0 +1,439 @@
+import csv
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# a train whose next stop is further away than this, in seconds, and whose
+# previous stop is unknown has not started its trip yet
+HORIZON = 300
+
+# side, in degrees, of a spatial index cell (about 2 km north-south)
+CELL = 0.02
+
+# shapes are laid end to end on one distance axis, this many meters apart
+SHAPE_GAP = 1e6
+
+# meters per degree of latitude, and of longitude around New York
+METERS_PER_LAT = 111320.0
+METERS_PER_LON = METERS_PER_LAT * math.cos(math.radians(40.7))
+
+STATUSES = ('in_transit', 'stopped', 'approaching')
+
+# binary frame header: magic, frame time, train count, string table bytes
+FRAME_HEADER = struct.Struct('<4sIII')
+# one train: lat, lon, trip id and route id (string indexes), status, direction
+FRAME_TRAIN = struct.Struct('<ffIIBB')
+
+
+def shape_id(trip_id):
+    """GTFS static shape of an NYCT trip id ("054850_A..N03R" -> "A..N03R")"""
+    return trip_id.split('_', 1)[1] if '_' in trip_id else None
+
+
+class Shapes:
+    """GTFS static shapes.txt as one polyline on a single distance axis.
+
+    Every shape's points are concatenated into `lat`/`lon` columns and
+    `distance` runs through all of them, each shape starting SHAPE_GAP
+    meters after the previous one ends. A position along any shape is then
+    one float, and turning many of them back into coordinates is a single
+    sorted search over `distance`.
+    """
+
+    def __init__(self):
+        self.lat = array('d')
+        self.lon = array('d')
+        self.distance = array('d')
+        self.ranges = {}
+        self._projections = {}
+
+    @classmethod
+    def load(cls, directory):
+        shapes = cls()
+        path = os.path.join(directory, 'shapes.txt')
+        if not os.path.exists(path):
+            return shapes
+        points = {}
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                points.setdefault(row['shape_id'].strip(), []).append(
+                    (int(row['shape_pt_sequence']), float(row['shape_pt_lat']), float(row['shape_pt_lon'])))
+        offset = 0.0
+        for name, shape in points.items():
+            shape.sort()
+            start = len(shapes.lat)
+            previous = None
+            for _, lat, lon in shape:
+                if previous is not None:
+                    offset += math.hypot((lat - previous[0]) * METERS_PER_LAT, (lon - previous[1]) * METERS_PER_LON)
+                shapes.lat.append(lat)
+                shapes.lon.append(lon)
+                shapes.distance.append(offset)
+                previous = (lat, lon)
+            shapes.ranges[name] = (start, len(shapes.lat))
+            offset += SHAPE_GAP
+        return shapes
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def project(self, shape, lat, lon):
+        """Distance of the point of `shape` nearest to (lat, lon), or None"""
+        key = (shape, lat, lon)
+        if key not in self._projections:
+            bounds = self.ranges.get(shape)
+            distance = None
+            if bounds is not None and not math.isnan(lat):
+                nearest = min(range(*bounds), key=lambda point: (
+                    ((self.lat[point] - lat) * METERS_PER_LAT) ** 2 + ((self.lon[point] - lon) * METERS_PER_LON) ** 2))
+                distance = self.distance[nearest]
+            self._projections[key] = distance
+        return self._projections[key]
+
+    def locate(self, distance):
+        """(lat, lon) at `distance` along the axis"""
+        point = min(max(bisect_left(self.distance, distance), 1), len(self.distance) - 1)
+        span = self.distance[point] - self.distance[point - 1]
+        fraction = (distance - self.distance[point - 1]) / span if span else 0.0
+        return (self.lat[point - 1] + fraction * (self.lat[point] - self.lat[point - 1]),
+                self.lon[point - 1] + fraction * (self.lon[point] - self.lon[point - 1]))
+
+
+class _Prepared:
+    # every feed's trips flattened into parallel columns, rebuilt per set of versions
+    def __init__(self):
+        self.feed = []
+        self.trip_id = []
+        self.route_id = []
+        self.direction = []
+        self.start = array('l')
+        self.length = array('l')
+        # previous stop from an earlier snapshot: leave time, lat, lon, shape distance
+        self.previous = (array('d'), array('d'), array('d'), array('d'))
+        self.stop_id = []
+        self.stop_name = []
+        self.arrive = array('d')
+        self.leave = array('d')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.distance = array('d')
+
+
+class Frame:
+    """Estimated positions of every running train at one instant"""
+
+    def __init__(self, when):
+        self.time = when
+        self.feed = []
+        self.trip_id = []
+        self.route_id = []
+        self.direction = []
+        self.status = []
+        self.lat = []
+        self.lon = []
+        self.next_stop_id = []
+        self.next_stop_name = []
+        self.next_arrival = []
+        self.by_route = {}
+        self.grid = {}
+
+    def __len__(self):
+        return len(self.trip_id)
+
+    def add(self, feed, trip_id, route_id, direction, status, lat, lon, stop_id, stop_name, arrival):
+        train = len(self.trip_id)
+        self.feed.append(feed)
+        self.trip_id.append(trip_id)
+        self.route_id.append(route_id)
+        self.direction.append(direction)
+        self.status.append(status)
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.next_stop_id.append(stop_id)
+        self.next_stop_name.append(stop_name)
+        self.next_arrival.append(arrival)
+        self.by_route.setdefault(route_id, []).append(train)
+        self.grid.setdefault((math.floor(lat / CELL), math.floor(lon / CELL)), []).append(train)
+
+    def select(self, route_id=None, bbox=None):
+        """Trains on `route_id` inside `bbox` (min_lon, min_lat, max_lon, max_lat)"""
+        if bbox is None:
+            trains = self.by_route.get(route_id, []) if route_id is not None else range(len(self))
+            return list(trains)
+        min_lon, min_lat, max_lon, max_lat = bbox
+        rows = range(math.floor(min_lat / CELL), math.floor(max_lat / CELL) + 1)
+        columns = range(math.floor(min_lon / CELL), math.floor(max_lon / CELL) + 1)
+        if len(rows) * len(columns) > len(self.grid):
+            # a box wider than the occupied area: every occupied cell is a candidate
+            candidates = self.grid.values()
+        else:
+            candidates = (self.grid.get((row, column), ()) for row in rows for column in columns)
+        trains = [
+            train for cell in candidates for train in cell
+            if (min_lat <= self.lat[train] <= max_lat and min_lon <= self.lon[train] <= max_lon
+                and (route_id is None or self.route_id[train] == route_id))
+        ]
+        trains.sort()
+        return trains
+
+    def geojson(self, trains):
+        return {
+            'type': 'FeatureCollection',
+            'time': self.time,
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [round(self.lon[train], 6), round(self.lat[train], 6)]},
+                    'properties': {
+                        'trip_id': self.trip_id[train],
+                        'route_id': self.route_id[train],
+                        'direction': self.direction[train] or None,
+                        'status': self.status[train],
+                        'next_stop_id': self.next_stop_id[train],
+                        'next_stop_name': self.next_stop_name[train] or None,
+                        'next_arrival': self.next_arrival[train],
+                        'feed': self.feed[train],
+                    },
+                }
+                for train in trains
+            ],
+        }
+
+    def to_bytes(self, trains):
+        """Binary frame: FRAME_HEADER, '\\0'-joined strings, then one FRAME_TRAIN per train"""
+        strings = {}
+        records = []
+        for train in trains:
+            trip = strings.setdefault(self.trip_id[train], len(strings))
+            route = strings.setdefault(self.route_id[train], len(strings))
+            records.append(FRAME_TRAIN.pack(self.lat[train], self.lon[train], trip, route,
+                                            STATUSES.index(self.status[train]),
+                                            ord(self.direction[train] or '\0')))
+        table = '\0'.join(strings).encode('utf-8')
+        return FRAME_HEADER.pack(b'SPOS', int(self.time), len(records), len(table)) + table + b''.join(records)
+
+
+class PositionEngine:
+    """Estimated live train positions from stop-time predictions.
+
+    NYCT feeds only predict the stops a train has yet to reach. A train is
+    placed between the stop it left last (the latest stop whose predicted
+    time has passed, or, once the feed has dropped it, the last stop it
+    had in an earlier snapshot; `on_snapshot` remembers those) and its
+    next stop, in proportion to the time elapsed between their predicted
+    times. Coordinates come from the station catalog; with GTFS static
+    shapes the train follows the track geometry instead of a straight line.
+
+    Register `on_snapshot` as a FeedPoller listener. `frame(snapshots)`
+    flattens all feeds into columns once per set of snapshot versions and
+    computes a Frame at most every `interval` seconds, as one vectorized
+    NumPy pass when NumPy is installed and a plain loop otherwise. Frames
+    default to `clock()`, which a replay sets to its virtual time.
+    """
+
+    def __init__(self, stations, shapes=None, interval=5, horizon=HORIZON, clock=time.time):
+        self.stations = stations
+        self.shapes = shapes if shapes is not None else Shapes()
+        self.interval = interval
+        self.horizon = horizon
+        self.clock = clock
+        self._previous_stops = {}
+        self._prepared = None
+        self._prepared_versions = None
+        self._frame = None
+        self._lock = threading.Lock()
+
+    def on_snapshot(self, line, old, new, delta):
+        """Remember the last stop each trip dropped from its predictions"""
+        if old is None:
+            return
+        table, previous = new.trips, old.trips
+        signatures, previous_signatures = new.signatures(), old.signatures()
+        if delta is None:
+            trip_ids = [previous.strings[previous.trip_id[trip]] for trip in range(len(previous))]
+            removed = None
+        else:
+            trip_ids = [record['trip_id'] for record in delta['changed']]
+            removed = delta['removed']
+        remembered = {}
+        for trip_id in trip_ids:
+            if trip_id not in signatures or trip_id not in previous_signatures:
+                continue
+            stops = {table.strings[table.stop_id[row]] for row in table.stop_rows(signatures[trip_id][0])}
+            dropped = [row for row in previous.stop_rows(previous_signatures[trip_id][0])
+                       if previous.strings[previous.stop_id[row]] not in stops]
+            if dropped:
+                row = dropped[-1]
+                remembered[(line, trip_id)] = (previous.strings[previous.stop_id[row]],
+                                               previous.departure[row] or previous.arrival[row])
+        with self._lock:
+            if removed is None:
+                removed = [trip_id for feed, trip_id in self._previous_stops if feed == line and trip_id not in signatures]
+            for trip_id in removed:
+                self._previous_stops.pop((line, trip_id), None)
+            self._previous_stops.update(remembered)
+
+    def frame(self, snapshots, now=None):
+        """Positions at `now` (default: `clock()`) of every trip in `snapshots`"""
+        now = self.clock() if now is None else now
+        versions = tuple(sorted((line, snapshot.version) for line, snapshot in snapshots.items()))
+        with self._lock:
+            frame = self._frame
+            if frame is not None and versions == self._prepared_versions and abs(now - frame.time) < self.interval:
+                return frame
+            if versions != self._prepared_versions:
+                self._prepared = self._prepare(snapshots)
+                self._prepared_versions = versions
+            prepared = self._prepared
+        frame = self._compute_numpy(prepared, now) if np is not None else self._compute_python(prepared, now)
+        with self._lock:
+            self._frame = frame
+        return frame
+
+    def _coordinates(self, stop_id):
+        row = self.stations.rows.get(stop_id) if self.stations is not None else None
+        if row is None:
+            return math.nan, math.nan
+        return self.stations.lat[row], self.stations.lon[row]
+
+    def _distance(self, shape, lat, lon):
+        distance = self.shapes.project(shape, lat, lon) if shape is not None and len(self.shapes) else None
+        return math.nan if distance is None else distance
+
+    def _prepare(self, snapshots):
+        # caller holds the lock (it reads _previous_stops)
+        prepared = _Prepared()
+        previous_time, previous_lat, previous_lon, previous_distance = prepared.previous
+        for line, snapshot in sorted(snapshots.items()):
+            table = snapshot.trips
+            strings = table.strings
+            coordinates = {}
+            for trip in range(len(table)):
+                rows = table.stop_rows(trip)
+                if not len(rows):
+                    continue
+                trip_id = strings[table.trip_id[trip]]
+                shape = shape_id(trip_id)
+                prepared.feed.append(line)
+                prepared.trip_id.append(trip_id)
+                prepared.route_id.append(strings[table.route_id[trip]])
+                prepared.direction.append(strings[table.direction[trip]])
+                prepared.start.append(len(prepared.arrive))
+                prepared.length.append(len(rows))
+                remembered = self._previous_stops.get((line, trip_id))
+                if remembered is None:
+                    lat = lon = leave = math.nan
+                else:
+                    lat, lon = self._coordinates(remembered[0])
+                    leave = remembered[1] or math.nan
+                previous_time.append(leave)
+                previous_lat.append(lat)
+                previous_lon.append(lon)
+                previous_distance.append(self._distance(shape, lat, lon))
+                for row in rows:
+                    stop = table.stop_id[row]
+                    if stop not in coordinates:
+                        coordinates[stop] = self._coordinates(strings[stop])
+                    lat, lon = coordinates[stop]
+                    prepared.stop_id.append(strings[stop])
+                    prepared.stop_name.append(strings[table.stop_name[row]])
+                    prepared.arrive.append(table.arrival[row] or table.departure[row])
+                    prepared.leave.append(table.departure[row] or table.arrival[row])
+                    prepared.lat.append(lat)
+                    prepared.lon.append(lon)
+                    prepared.distance.append(self._distance(shape, lat, lon))
+        return prepared
+
+    def _compute_numpy(self, prepared, now):
+        frame = Frame(now)
+        if not prepared.trip_id:
+            return frame
+        start = np.asarray(prepared.start, dtype=np.int64)
+        length = np.asarray(prepared.length, dtype=np.int64)
+        arrive = np.frombuffer(prepared.arrive)
+        leave = np.frombuffer(prepared.leave)
+        lat = np.frombuffer(prepared.lat)
+        lon = np.frombuffer(prepared.lon)
+        distance = np.frombuffer(prepared.distance)
+        previous_time, previous_lat, previous_lon, previous_distance = (
+            np.frombuffer(column) for column in prepared.previous)
+
+        # stops already reached per trip; the next one follows them
+        passed = np.add.reduceat((arrive <= now).astype(np.int64), start)
+        running = passed < length
+        following = np.minimum(start + passed, len(arrive) - 1)
+        left = np.maximum(following - 1, 0)
+        in_feed = passed > 0
+        t0 = np.where(in_feed, leave[left], previous_time)
+        lat0 = np.where(in_feed, lat[left], previous_lat)
+        lon0 = np.where(in_feed, lon[left], previous_lon)
+        d0 = np.where(in_feed, distance[left], previous_distance)
+        t1, lat1, lon1, d1 = arrive[following], lat[following], lon[following], distance[following]
+
+        known = ~(np.isnan(t0) | np.isnan(lat0))
+        fraction = np.clip((now - np.nan_to_num(t0)) / np.maximum(t1 - np.nan_to_num(t0), 1), 0, 1)
+        train_lat = np.where(known, lat0 + fraction * (lat1 - lat0), lat1)
+        train_lon = np.where(known, lon0 + fraction * (lon1 - lon0), lon1)
+        along = known & ~(np.isnan(d0) | np.isnan(d1))
+        if along.any():
+            position = (d0 + fraction * (d1 - d0))[along]
+            axis = np.frombuffer(self.shapes.distance)
+            point = np.clip(np.searchsorted(axis, position), 1, len(axis) - 1)
+            span = axis[point] - axis[point - 1]
+            part = np.where(span > 0, (position - axis[point - 1]) / np.where(span > 0, span, 1), 0)
+            shape_lat, shape_lon = np.frombuffer(self.shapes.lat), np.frombuffer(self.shapes.lon)
+            train_lat[along] = shape_lat[point - 1] + part * (shape_lat[point] - shape_lat[point - 1])
+            train_lon[along] = shape_lon[point - 1] + part * (shape_lon[point] - shape_lon[point - 1])
+
+        status = np.where(known, np.where(now < t0, 1, 0), 2)
+        visible = running & ~np.isnan(train_lat) & (known | (t1 - now <= self.horizon))
+        for train in np.flatnonzero(visible).tolist():
+            stop = int(following[train])
+            frame.add(prepared.feed[train], prepared.trip_id[train], prepared.route_id[train],
+                      prepared.direction[train], STATUSES[status[train]], float(train_lat[train]),
+                      float(train_lon[train]), prepared.stop_id[stop], prepared.stop_name[stop], int(t1[train]))
+        return frame
+
+    def _compute_python(self, prepared, now):
+        frame = Frame(now)
+        arrive, leave, lat, lon, distance = prepared.arrive, prepared.leave, prepared.lat, prepared.lon, prepared.distance
+        previous_time, previous_lat, previous_lon, previous_distance = prepared.previous
+        for train, (start, length) in enumerate(zip(prepared.start, prepared.length)):
+            following = start
+            while following < start + length and arrive[following] <= now:
+                following += 1
+            if following == start + length:
+                continue
+            if following > start:
+                t0, lat0, lon0, d0 = leave[following - 1], lat[following - 1], lon[following - 1], distance[following - 1]
+            else:
+                t0, lat0, lon0, d0 = (previous_time[train], previous_lat[train], previous_lon[train],
+                                      previous_distance[train])
+            t1, lat1, lon1, d1 = arrive[following], lat[following], lon[following], distance[following]
+            if math.isnan(lat1):
+                continue
+            if math.isnan(t0) or math.isnan(lat0):
+                if t1 - now > self.horizon:
+                    continue
+                status, train_lat, train_lon = 'approaching', lat1, lon1
+            else:
+                fraction = min(max((now - t0) / max(t1 - t0, 1), 0.0), 1.0)
+                status = 'stopped' if now < t0 else 'in_transit'
+                if math.isnan(d0) or math.isnan(d1):
+                    train_lat, train_lon = lat0 + fraction * (lat1 - lat0), lon0 + fraction * (lon1 - lon0)
+                else:
+                    train_lat, train_lon = self.shapes.locate(d0 + fraction * (d1 - d0))
+            frame.add(prepared.feed[train], prepared.trip_id[train], prepared.route_id[train],
+                      prepared.direction[train], status, train_lat, train_lon, prepared.stop_id[following],
+                      prepared.stop_name[following], int(t1))
+        return frame
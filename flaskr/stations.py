@@ -0,0 +1,207 @@
+import csv
+import logging
+import os
+import re
+from array import array
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# GTFS location_type of a parent station; platforms are 0 (or blank)
+LOCATION_STATION = '1'
+
+
+def normalize_name(name):
+    return ' '.join(TOKEN_PATTERN.findall(name.lower()))
+
+
+def _rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+class StationCatalog:
+    """GTFS static stops as interned columns, with a type-ahead index.
+
+    Every stop (station or platform) is a row: `stop_id` and `name` index
+    into `strings`, `parent` is the row of its parent station (its own row
+    for a station), `complex` the row of the station representing its
+    transfer complex, and `lat`/`lon` its coordinates. A station's parent
+    stop id is the canonical key other routes index on.
+
+    Search matches each query word as a prefix of a word of the station
+    name ("times sq" finds "Times Sq-42 St"); whole-name prefix matches
+    rank first.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self._string_ids = {}
+        self.rows = {}
+        self.stop_id = array('l')
+        self.name = array('l')
+        self.parent = array('l')
+        self.complex = array('l')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.platforms = {}
+        self._names = []
+        self._tokens = []
+        self._token_stations = {}
+
+    @classmethod
+    def load(cls, directory):
+        """Catalog from `directory`/stops.txt and the optional transfers.txt"""
+        catalog = cls()
+        stops = os.path.join(directory, 'stops.txt')
+        if not os.path.exists(stops):
+            logger.warning("no GTFS static stops path=%s", stops)
+            return catalog
+        catalog._load_stops(_rows(stops))
+        transfers = os.path.join(directory, 'transfers.txt')
+        if os.path.exists(transfers):
+            catalog._load_transfers(_rows(transfers))
+        catalog._build_index()
+        return catalog
+
+    def __len__(self):
+        return len(self.stop_id)
+
+    def __contains__(self, stop_id):
+        return stop_id in self.rows
+
+    def intern(self, value):
+        index = self._string_ids.get(value)
+        if index is None:
+            index = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def _load_stops(self, rows):
+        parents = []
+        for stop in rows:
+            stop_id = stop['stop_id'].strip()
+            if not stop_id:
+                continue
+            self.rows[stop_id] = len(self.stop_id)
+            self.stop_id.append(self.intern(stop_id))
+            self.name.append(self.intern(stop['stop_name'].strip()))
+            self.lat.append(float(stop.get('stop_lat') or 0))
+            self.lon.append(float(stop.get('stop_lon') or 0))
+            is_station = stop.get('location_type', '').strip() == LOCATION_STATION
+            parents.append('' if is_station else (stop.get('parent_station') or '').strip())
+
+        for row, parent_id in enumerate(parents):
+            # a platform whose parent is missing stands in for its own station
+            parent = self.rows.get(parent_id, row)
+            self.parent.append(parent)
+            if parent != row:
+                self.platforms.setdefault(parent, []).append(row)
+        self.complex = array('l', self.parent)
+
+    def _load_transfers(self, rows):
+        # stations linked by a transfer share a complex: union-find over parents
+        complexes = list(range(len(self)))
+
+        def find(row):
+            while complexes[row] != row:
+                complexes[row] = complexes[complexes[row]]
+                row = complexes[row]
+            return row
+
+        for transfer in rows:
+            a = self.rows.get(transfer.get('from_stop_id', '').strip())
+            b = self.rows.get(transfer.get('to_stop_id', '').strip())
+            if a is None or b is None:
+                continue
+            a, b = find(self.parent[a]), find(self.parent[b])
+            if a != b:
+                # the lowest stop id names the complex, independent of file order
+                if self.strings[self.stop_id[b]] < self.strings[self.stop_id[a]]:
+                    a, b = b, a
+                complexes[b] = a
+        self.complex = array('l', (find(self.parent[row]) for row in range(len(self))))
+
+    def _build_index(self):
+        names = []
+        tokens = {}
+        for row in self.station_rows():
+            normalized = normalize_name(self.strings[self.name[row]])
+            names.append((normalized, row))
+            for token in normalized.split():
+                tokens.setdefault(token, set()).add(row)
+        names.sort()
+        self._names = names
+        self._tokens = sorted(tokens)
+        self._token_stations = tokens
+
+    def station_rows(self):
+        return (row for row in range(len(self)) if self.parent[row] == row)
+
+    def stop_name(self, stop_id):
+        """Name of a stop or platform id, or None if it is not in the catalog"""
+        row = self.rows.get(stop_id)
+        return self.strings[self.name[row]] if row is not None else None
+
+    def station_id(self, stop_id):
+        """Canonical (parent station) id for a stop or platform id, or None"""
+        row = self.rows.get(stop_id)
+        return self.strings[self.stop_id[self.parent[row]]] if row is not None else None
+
+    def station(self, stop_id):
+        """The station containing `stop_id`, in the /mta/stations shape"""
+        row = self.rows.get(stop_id)
+        return self._station(self.parent[row]) if row is not None else None
+
+    def _station(self, row):
+        strings = self.strings
+        return {
+            'stop_id': strings[self.stop_id[row]],
+            'name': strings[self.name[row]],
+            'lat': self.lat[row],
+            'lon': self.lon[row],
+            'platforms': [strings[self.stop_id[platform]] for platform in self.platforms.get(row, ())],
+            'complex_id': strings[self.stop_id[self.complex[row]]],
+        }
+
+    def _prefixed(self, token):
+        # stations having a word that starts with `token`
+        tokens = self._tokens
+        rows = set()
+        for position in range(bisect_left(tokens, token), len(tokens)):
+            word = tokens[position]
+            if not word.startswith(token):
+                break
+            rows |= self._token_stations[word]
+        return rows
+
+    def search(self, query, limit=10):
+        """Stations whose name matches `query` word by word, best first"""
+        normalized = normalize_name(query)
+        if not normalized or limit <= 0:
+            return []
+
+        # whole-name prefix matches come first, in name order
+        names = self._names
+        ranked = []
+        for position in range(bisect_left(names, (normalized,)), len(names)):
+            name, row = names[position]
+            if len(ranked) >= limit or not name.startswith(normalized):
+                break
+            ranked.append(row)
+
+        if len(ranked) < limit:
+            matches = None
+            for token in normalized.split():
+                rows = self._prefixed(token)
+                matches = rows if matches is None else matches & rows
+                if not matches:
+                    break
+            seen = set(ranked)
+            rest = sorted((normalize_name(self.strings[self.name[row]]), row)
+                          for row in matches or () if row not in seen)
+            ranked.extend(row for _, row in rest[:limit - len(ranked)])
+        return [self._station(row) for row in ranked]
@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from statistics import median
+
+from columnar import trip_direction
+
+
+# a trip whose latest prediction is this many seconds in the past is stale
+STALE_AFTER = 120
+
+# headways are measured between arrivals in the next this many seconds
+HEADWAY_HORIZON = 3600
+
+LINE_PATTERN = re.compile(r'[A-Za-z0-9]+')
+
+
+def outage_lines(lines):
+    """Route ids of an ENE `trainno` value ("N/Q/R/W" -> ['N', 'Q', 'R', 'W'])"""
+    return LINE_PATTERN.findall(lines or '')
+
+
+class _Route:
+    # aggregates of one route, kept current as trips come and go
+    def __init__(self, route_id):
+        self.route_id = route_id
+        self.feeds = set()
+        # latest predicted event of every trip, sorted; trips past it are stale
+        self.last_events = []
+        # (direction, stop_id) -> sorted predicted arrival times
+        self.arrivals = {}
+        self.headways = {}
+        self.trips = {}
+
+
+class ServiceStatus:
+    """Per-route health aggregates, maintained at ingestion time.
+
+    Register `on_snapshot` as a FeedPoller listener and `on_accessibility`
+    as an AccessibilityStore listener. Each feed delta only touches the
+    trips it added, changed or removed: every trip's contribution (its
+    route, direction, latest prediction and stop arrivals) is remembered so
+    it can be taken out again. Headway medians are recomputed only for the
+    route directions a delta touched, and stale counts are a bisect into a
+    sorted list, so `overview()` costs O(routes).
+
+    Predictions are compared with `clock()`, which a replay sets to its
+    virtual time.
+    """
+
+    def __init__(self, stale_after=STALE_AFTER, horizon=HEADWAY_HORIZON, clock=time.time):
+        self.stale_after = stale_after
+        self.horizon = horizon
+        self.clock = clock
+        self.routes = {}
+        self.outages = {}
+        self.feeds = {}
+        self._trips = {}
+        self._lock = threading.Lock()
+
+    def on_snapshot(self, line, old, new, delta):
+        table = new.trips
+        strings = table.strings
+        if delta is None:
+            # first snapshot of this feed (or a resync): replace all its trips
+            removed = None
+            updated = range(len(table))
+        else:
+            removed = delta['removed']
+            signatures = new.signatures()
+            updated = [signatures[record['trip_id']][0] for record in delta['added'] + delta['changed']]
+
+        contributions = []
+        for trip in updated:
+            route_id = strings[table.route_id[trip]]
+            default_direction = strings[table.direction[trip]]
+            arrivals = []
+            for row in table.stop_rows(trip):
+                timestamp = table.event_time(row)
+                if timestamp:
+                    stop_id = strings[table.stop_id[row]]
+                    arrivals.append((default_direction or trip_direction('', stop_id), stop_id, timestamp))
+            last_event = max((timestamp for _, _, timestamp in arrivals), default=0)
+            contributions.append(((line, strings[table.trip_id[trip]]), route_id, last_event, arrivals))
+
+        now = self.clock()
+        with self._lock:
+            touched = set()
+            if removed is None:
+                removed = [trip_id for (feed, trip_id) in self._trips if feed == line]
+            for trip_id in removed:
+                touched |= self._remove((line, trip_id))
+            for key, route_id, last_event, arrivals in contributions:
+                touched |= self._remove(key)
+                touched |= self._add(key, line, route_id, last_event, arrivals)
+            for route_id, direction in touched:
+                self._update_headway(self.routes[route_id], direction, now)
+            self.feeds[line] = {'version': new.version, 'fetched_at': new.fetched_at}
+
+    def _add(self, key, line, route_id, last_event, arrivals):
+        route = self.routes.get(route_id)
+        if route is None:
+            route = self.routes[route_id] = _Route(route_id)
+        route.feeds.add(line)
+        insort(route.last_events, last_event)
+        for direction, stop_id, timestamp in arrivals:
+            insort(route.arrivals.setdefault((direction, stop_id), []), timestamp)
+        self._trips[key] = (route_id, last_event, arrivals)
+        directions = {direction for direction, _, _ in arrivals}
+        route.trips[key] = directions
+        return {(route_id, direction) for direction in directions}
+
+    def _remove(self, key):
+        contribution = self._trips.pop(key, None)
+        if contribution is None:
+            return set()
+        route_id, last_event, arrivals = contribution
+        route = self.routes[route_id]
+        del route.last_events[bisect_left(route.last_events, last_event)]
+        for direction, stop_id, timestamp in arrivals:
+            times = route.arrivals[(direction, stop_id)]
+            del times[bisect_left(times, timestamp)]
+            if not times:
+                del route.arrivals[(direction, stop_id)]
+        directions = route.trips.pop(key)
+        return {(route_id, direction) for direction in directions}
+
+    def _update_headway(self, route, direction, now):
+        gaps = []
+        for (stop_direction, _), times in route.arrivals.items():
+            if stop_direction != direction:
+                continue
+            upcoming = times[bisect_left(times, now):bisect_right(times, now + self.horizon)]
+            gaps.extend(later - earlier for earlier, later in zip(upcoming, upcoming[1:]) if later > earlier)
+        trips = sum(1 for directions in route.trips.values() if direction in directions)
+        if trips:
+            route.headways[direction] = {'trips': trips, 'headway_seconds': round(median(gaps)) if gaps else None}
+        else:
+            route.headways.pop(direction, None)
+
+    def on_accessibility(self, index):
+        """Recount ENE outages per line from a rebuilt AccessibilityIndex"""
+        outages = {}
+        for station in index.stations.values():
+            for outage in station['outages']:
+                kind = {'EL': 'elevators', 'ES': 'escalators'}.get(outage['equipment_type'])
+                if kind is None:
+                    continue
+                for line in outage_lines(outage.get('lines')):
+                    counts = outages.setdefault(line, {'elevators': 0, 'escalators': 0})
+                    counts[kind] += 1
+        with self._lock:
+            self.outages = outages
+
+    def overview(self):
+        """The /mta/status document"""
+        now = self.clock()
+        # fetch times are wall-clock even during a replay
+        fetched_now = time.time()
+        no_outages = {'elevators': 0, 'escalators': 0}
+        with self._lock:
+            routes = {}
+            for route_id, route in sorted(self.routes.items()):
+                if not route.trips:
+                    continue
+                stale = bisect_left(route.last_events, now - self.stale_after)
+                routes[route_id] = {
+                    'feeds': sorted(route.feeds),
+                    'active_trips': len(route.last_events) - stale,
+                    'stale_trips': stale,
+                    'directions': dict(route.headways),
+                    'outages': dict(self.outages.get(route_id, no_outages)),
+                }
+            feeds = {
+                line: {'version': feed['version'], 'age': round(max(0.0, fetched_now - feed['fetched_at']), 1)}
+                for line, feed in self.feeds.items()
+            }
+        return {'routes': routes, 'feeds': feeds}
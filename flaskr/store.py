@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    content BLOB NOT NULL,
+    encoding TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+);
+-- snapshots keyed by line name alone, replaced by feed_snapshots
+DROP TABLE IF EXISTS snapshots;
+CREATE TABLE IF NOT EXISTS feed_snapshots (
+    url TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    options TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS subscriptions_revision ON subscriptions (revision);
+"""
+
+POLLER_LEASE = 'poller'
+
+
+class SharedStore:
+    """Upstream documents and decoded snapshots shared by every worker process.
+
+    Backed by one SQLite database in WAL mode, so readers never block the
+    writer or each other. One process at a time holds the poller lease and
+    is the only one talking to the MTA: it writes each new upstream body to
+    `documents` and each newly decoded feed to `feed_snapshots`. The others
+    (followers) read a row only when its revision or version moved past the
+    one they already hold. Revisions are allocated by `put_document` in a
+    write transaction, so a follower that has to fetch on its own (and
+    writes what it got) never reuses a number. Snapshot versions are the
+    upstream revisions of the documents they were decoded from, so every
+    worker agrees on them and a new leader continues numbering where the
+    previous one stopped.
+
+    Documents and snapshots are keyed by their upstream URL and the lease
+    by the `upstream` base URL, so apps pointed at different upstreams (a
+    benchmark stand-in, say) never serve each other's feeds even when they
+    share a database.
+
+    A thread renews the lease every `lease_ttl / 3` seconds; if the leader
+    dies, a follower takes over once the lease expires. Rows older than
+    `max_age` seconds are treated as missing, so a dead leader or a
+    database left over from an earlier run is never served as current.
+
+    Subscriptions are shared too: every change gets the next revision, and
+    a deletion keeps its row with `options` NULL, so a worker catches up by
+    reading the rows past the last revision it applied.
+    """
+
+    def __init__(self, path, lease_ttl=15, max_age=300, upstream=None):
+        self.path = path
+        self.lease = f"{POLLER_LEASE}:{upstream}" if upstream else POLLER_LEASE
+        self.lease_ttl = lease_ttl
+        self.max_age = max_age
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._leader = False
+        self._stop = threading.Event()
+        self._thread = None
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        # sqlite3 connections are per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.acquire()
+        self._thread = threading.Thread(target=self._run, name='store-lease', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.lease_ttl)
+        if self._leader:
+            self._connection().execute('UPDATE leases SET expires = 0 WHERE name = ? AND owner = ?',
+                                       (self.lease, self.owner))
+            self._leader = False
+
+    def _run(self):
+        while not self._stop.wait(self.lease_ttl / 3):
+            try:
+                self.acquire()
+            except sqlite3.Error:
+                # can't prove we still hold it; let someone else poll
+                logger.exception("lease renewal failed owner=%s", self.owner)
+                self._leader = False
+
+    def acquire(self):
+        """Take or renew the poller lease; True if this process holds it"""
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            'INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires '
+            'WHERE leases.owner = excluded.owner OR leases.expires < ?',
+            (self.lease, self.owner, now + self.lease_ttl, now))
+        owner, = connection.execute('SELECT owner FROM leases WHERE name = ?', (self.lease,)).fetchone()
+        leader = owner == self.owner
+        if leader != self._leader:
+            logger.warning("poller lease %s owner=%s", 'acquired' if leader else 'lost', self.owner)
+        self._leader = leader
+        return leader
+
+    def is_leader(self):
+        return self._leader
+
+    def put_document(self, entry):
+        """Store `entry` as the next revision of its URL and return that revision.
+
+        The revision is allocated inside the write transaction, so processes
+        that fetch the same URL on their own never hand out the same number
+        for different bodies. A body identical to the stored one keeps its
+        revision.
+        """
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT revision, content FROM documents WHERE url = ?',
+                                     (entry.url,)).fetchone()
+            if row is not None and row[1] == entry.content:
+                revision = row[0]
+                connection.execute('UPDATE documents SET fetched_at = MAX(fetched_at, ?) WHERE url = ?',
+                                   (entry.fetched_at, entry.url))
+            else:
+                revision = row[0] + 1 if row is not None else 1
+                connection.execute(
+                    'INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (entry.url, revision, entry.content, entry.encoding, entry.etag, entry.last_modified,
+                     entry.fetched_at))
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return revision
+
+    def touch_document(self, url, fetched_at):
+        self._connection().execute('UPDATE documents SET fetched_at = ? WHERE url = ?', (fetched_at, url))
+
+    def get_document(self, url, known_revision=0):
+        """Row dict for `url`, with `content` None unless newer than `known_revision`"""
+        row = self._connection().execute(
+            'SELECT revision, CASE WHEN revision > ? THEN content END, encoding, etag, last_modified, fetched_at '
+            'FROM documents WHERE url = ? AND fetched_at >= ?',
+            (known_revision, url, time.time() - self.max_age)).fetchone()
+        if row is None:
+            return None
+        keys = ('revision', 'content', 'encoding', 'etag', 'last_modified', 'fetched_at')
+        return dict(zip(keys, row))
+
+    def put_snapshot(self, url, version, payload, fetched_at):
+        """Store the decoded snapshot `version` of the feed at `url`, unless a newer one is there"""
+        self._connection().execute(
+            'INSERT INTO feed_snapshots VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (url) DO UPDATE SET version = excluded.version, payload = excluded.payload, '
+            'fetched_at = excluded.fetched_at WHERE excluded.version >= feed_snapshots.version',
+            (url, version, payload, fetched_at))
+
+    def touch_snapshot(self, url, fetched_at):
+        self._connection().execute('UPDATE feed_snapshots SET fetched_at = ? WHERE url = ?', (fetched_at, url))
+
+    def get_snapshot(self, url, known_version=0):
+        """(version, fetched_at, payload) of the feed at `url`, payload None unless newer than `known_version`"""
+        return self._connection().execute(
+            'SELECT version, fetched_at, CASE WHEN version > ? THEN payload END '
+            'FROM feed_snapshots WHERE url = ? AND fetched_at >= ?',
+            (known_version, url, time.time() - self.max_age)).fetchone()
+
+    def put_subscription(self, subscription_id, kind, options, created_at, limit):
+        """Store a new subscription; raises ValueError once `limit` are active"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            active, revision = connection.execute(
+                'SELECT COUNT(options), COALESCE(MAX(revision), 0) FROM subscriptions').fetchone()
+            if active >= limit:
+                raise ValueError('too many subscriptions')
+            connection.execute('INSERT INTO subscriptions VALUES (?, ?, ?, ?, ?)',
+                               (subscription_id, revision + 1, kind, json.dumps(options), created_at))
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def delete_subscription(self, subscription_id):
+        """Mark a subscription deleted; False if it is unknown or already gone"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            revision, = connection.execute('SELECT COALESCE(MAX(revision), 0) FROM subscriptions').fetchone()
+            deleted = connection.execute(
+                'UPDATE subscriptions SET revision = ?, options = NULL WHERE id = ? AND options IS NOT NULL',
+                (revision + 1, subscription_id)).rowcount
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return bool(deleted)
+
+    def subscription_changes(self, known_revision=0):
+        """(revision, id, kind, options or None if deleted, created_at) past `known_revision`"""
+        rows = self._connection().execute(
+            'SELECT revision, id, kind, options, created_at FROM subscriptions WHERE revision > ? '
+            'ORDER BY revision', (known_revision,)).fetchall()
+        return [(revision, subscription_id, kind, json.loads(options) if options is not None else None, created_at)
+                for revision, subscription_id, kind, options, created_at in rows]
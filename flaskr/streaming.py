@@ -0,0 +1,77 @@
+import json
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# bytes collected before a chunk is compressed and sent
+CHUNK_BYTES = 16384
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# compact JSON, as jsonify produces outside debug mode
+SEPARATORS = (',', ':')
+
+
+def encodings():
+    """Content-Encodings this process can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """Best of `encodings()` a werkzeug Accept-Encoding header allows, or None"""
+    return accept_encodings.best_match(encodings())
+
+
+def json_array(items):
+    """A JSON array, one element at a time"""
+    first = True
+    for item in items:
+        yield ('[' if first else ',') + json.dumps(item, separators=SEPARATORS)
+        first = False
+    yield '[]' if first else ']'
+
+
+def ndjson(items):
+    """Newline-delimited JSON, one line per element"""
+    for item in items:
+        yield json.dumps(item, separators=SEPARATORS) + '\n'
+
+
+def chunked(pieces, encoding=None, chunk_bytes=CHUNK_BYTES, level=6):
+    """Coalesce text `pieces` into chunks of about `chunk_bytes`, compressed on the fly.
+
+    Each chunk is flushed through the compressor as soon as it fills, so a
+    client starts decompressing the first trips while later ones are still
+    being produced.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+    else:
+        compress = flush = finish = None
+
+    buffer = []
+    size = 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            data = b''.join(buffer)
+            buffer, size = [], 0
+            yield compress(data) + flush() if compress is not None else data
+    data = b''.join(buffer)
+    if compress is not None:
+        yield compress(data) + finish()
+    elif data:
+        yield data
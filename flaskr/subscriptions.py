@@ -0,0 +1,418 @@
+import ipaddress
+import itertools
+import logging
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from accessibility import normalize_station
+
+logger = logging.getLogger(__name__)
+
+
+KINDS = ('outage', 'maintenance', 'delay')
+
+# default slip, in seconds, of a prediction that counts as a delay
+MIN_DELAY = 300
+
+
+def check_webhook(url, allowed_hosts=None):
+    """Raise ValueError unless `url` is an http(s) URL on a public address.
+
+    Every address the host resolves to must be globally routable, so a
+    webhook can't be pointed at loopback, link-local (cloud metadata) or
+    private networks. With `allowed_hosts`, the host must also be listed.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError('webhook must be an http(s) URL')
+    host = parts.hostname.lower()
+    if allowed_hosts is not None and host not in allowed_hosts:
+        raise ValueError(f"webhook host {host} is not allowed")
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError) as e:
+        raise ValueError(f"webhook host {host} does not resolve: {e}")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ValueError(f"webhook host {host} is not a public address")
+
+
+class Subscription:
+    """One watch: its filter, recent events and live listeners"""
+
+    def __init__(self, kind, station=None, equipment=None, route=None, direction=None,
+                 min_delay=MIN_DELAY, webhook=None, history=50, id=None, created_at=None):
+        self.id = id or uuid.uuid4().hex
+        self.kind = kind
+        self.station = station
+        self.equipment = equipment
+        self.route = route
+        self.direction = direction
+        self.min_delay = min_delay
+        self.webhook = webhook
+        self.created_at = created_at or time.time()
+        self.keys = set()
+        self.events = deque(maxlen=history)
+        self._listeners = set()
+
+    def describe(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'station': self.station,
+            'equipment': self.equipment,
+            'route': self.route,
+            'direction': self.direction,
+            'min_delay': self.min_delay if self.kind == 'delay' else None,
+            'webhook': self.webhook,
+            'created_at': self.created_at,
+        }
+
+    def options(self):
+        """Keyword arguments that recreate this subscription in another process"""
+        return {
+            'station': self.station,
+            'equipment': self.equipment,
+            'route': self.route,
+            'direction': self.direction,
+            'min_delay': self.min_delay,
+            'webhook': self.webhook,
+        }
+
+
+class SubscriptionEngine:
+    """Favorites and alerts, evaluated only against what changed.
+
+    Subscriptions live in inverted indexes: outage and maintenance watches
+    by normalized ENE station key and equipment id, delay watches by route.
+    `on_snapshot` (a FeedPoller listener) looks at the trips a delta changed
+    and only for routes somebody watches; `on_accessibility` (an
+    AccessibilityStore listener) diffs the outage and upcoming-maintenance
+    sets against the previous index and looks each change up by station
+    and equipment. Work per update is proportional to the changes and the
+    subscriptions they hit, never to the number of subscribers.
+
+    Each event is kept in its subscription's recent history, pushed to
+    every open `listen()` queue, and POSTed to the subscription's webhook
+    on a small thread pool.
+
+    Webhooks are off unless `webhooks` is set; their targets are checked
+    with `check_webhook` when subscribing and again before every POST, and
+    redirects are not followed.
+
+    With a SharedStore, subscriptions are written there and every worker
+    replays the store's changes (`sync`) before each evaluation and when
+    asked for one it doesn't know yet, so any worker can serve any
+    subscription. Each worker evaluates and keeps history for all of them,
+    so listeners on any worker get their events, but only the lease holder
+    POSTs webhooks. Without a store they live in this process only.
+
+    Slips and event times are measured against `clock()`, which a replay
+    sets to its virtual time.
+
+    Every worker numbers the events it emits itself, so event ids are
+    `<worker>-<n>`: `history` resumes after an id this worker handed out,
+    and an id from another worker (or an earlier run) starts from the
+    live events instead of replaying unrelated ones.
+    """
+
+    def __init__(self, stations=None, max_subscriptions=10000, webhook_timeout=5, webhooks=False,
+                 webhook_hosts=None, store=None, clock=time.time):
+        self.stations = stations
+        self.max_subscriptions = max_subscriptions
+        self.webhook_timeout = webhook_timeout
+        self.webhooks = webhooks
+        self.webhook_hosts = {host.lower() for host in webhook_hosts} if webhook_hosts is not None else None
+        self.store = store
+        self.clock = clock
+        self.subscriptions = {}
+        self.by_station = {}
+        self.by_equipment = {}
+        self.by_route = {}
+        self._index = None
+        self._outages = None
+        self._upcoming = None
+        self.worker = uuid.uuid4().hex[:8]
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        self._revision = 0
+        self._sync_lock = threading.Lock()
+        self._session = requests.Session()
+        self._webhooks = ThreadPoolExecutor(max_workers=4, thread_name_prefix='webhook')
+
+    def station_keys(self, station):
+        """ENE station keys a station query (GTFS stop id or name) refers to"""
+        if self.stations is not None:
+            station = self.stations.stop_name(station) or station
+        keys = {normalize_station(station)}
+        if self._index is not None:
+            keys.update(self._index.match(station))
+        return keys
+
+    def check(self, kind, options):
+        """Raise ValueError unless `kind` and `options` make a valid subscription"""
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        for key in ('station', 'equipment', 'route', 'direction', 'webhook'):
+            if options.get(key) is not None and not (isinstance(options[key], str) and options[key]):
+                raise ValueError(f"{key} must be a non-empty string")
+        min_delay = options.get('min_delay', MIN_DELAY)
+        if not isinstance(min_delay, int) or isinstance(min_delay, bool) or min_delay < 0:
+            raise ValueError('min_delay must be a non-negative integer')
+        if options.get('direction') not in (None, 'N', 'S'):
+            raise ValueError('direction must be N or S')
+        if kind in ('outage', 'maintenance') and not (options.get('station') or options.get('equipment')):
+            raise ValueError(f"a {kind} subscription needs a station or an equipment id")
+        if kind == 'maintenance' and options.get('equipment'):
+            raise ValueError('maintenance subscriptions are by station')
+        if kind == 'delay' and not options.get('route'):
+            raise ValueError('a delay subscription needs a route')
+
+    def subscribe(self, kind, **options):
+        self.check(kind, options)
+        webhook = options.get('webhook')
+        if webhook:
+            if not self.webhooks:
+                raise ValueError('webhooks are disabled')
+            check_webhook(webhook, self.webhook_hosts)
+
+        subscription = Subscription(kind, **options)
+        # index keys first: nothing that can't be indexed reaches the store
+        subscription.keys = self._keys(subscription)
+        if self.store is not None:
+            self.store.put_subscription(subscription.id, kind, subscription.options(), subscription.created_at,
+                                        self.max_subscriptions)
+        elif len(self.subscriptions) >= self.max_subscriptions:
+            raise ValueError('too many subscriptions')
+        self._add(subscription)
+        return subscription
+
+    def _keys(self, subscription):
+        if subscription.kind == 'delay':
+            return {('route', subscription.route)}
+        if subscription.equipment:
+            return {('equipment', subscription.equipment.upper())}
+        return {('station', key) for key in self.station_keys(subscription.station)}
+
+    def _add(self, subscription):
+        with self._lock:
+            for index_name, key in subscription.keys:
+                self._indexes()[index_name].setdefault(key, set()).add(subscription.id)
+            self.subscriptions[subscription.id] = subscription
+
+    def unsubscribe(self, subscription_id):
+        if self.store is not None:
+            deleted = self.store.delete_subscription(subscription_id)
+            self._remove(subscription_id)
+            return deleted
+        return self._remove(subscription_id)
+
+    def _remove(self, subscription_id):
+        with self._lock:
+            subscription = self.subscriptions.pop(subscription_id, None)
+            if subscription is None:
+                return False
+            for index_name, key in subscription.keys:
+                ids = self._indexes()[index_name].get(key)
+                if ids is not None:
+                    ids.discard(subscription_id)
+                    if not ids:
+                        del self._indexes()[index_name][key]
+            listeners = list(subscription._listeners)
+        for listener in listeners:
+            listener.put_nowait(None)
+        return True
+
+    def _indexes(self):
+        return {'station': self.by_station, 'equipment': self.by_equipment, 'route': self.by_route}
+
+    def sync(self):
+        """Apply subscriptions created or deleted in the store by other workers"""
+        if self.store is None:
+            return
+        with self._sync_lock:
+            try:
+                changes = self.store.subscription_changes(self._revision)
+            except sqlite3.Error:
+                # keep evaluating what we have; the next sync catches up
+                logger.exception("subscription sync failed revision=%s", self._revision)
+                return
+            for revision, subscription_id, kind, options, created_at in changes:
+                try:
+                    if options is None:
+                        self._remove(subscription_id)
+                    elif subscription_id not in self.subscriptions:
+                        self.check(kind, options)
+                        subscription = Subscription(kind, id=subscription_id, created_at=created_at, **options)
+                        subscription.keys = self._keys(subscription)
+                        self._add(subscription)
+                except Exception:
+                    # a row this worker can't apply must not stop it from applying the rest
+                    logger.exception("skipping subscription change revision=%s subscription=%s",
+                                     revision, subscription_id)
+                self._revision = revision
+
+    def get(self, subscription_id):
+        subscription = self.subscriptions.get(subscription_id)
+        if subscription is None and self.store is not None:
+            # registered through another worker since the last sync
+            self.sync()
+            subscription = self.subscriptions.get(subscription_id)
+        return subscription
+
+    def history(self, subscription_id, last_event_id=None):
+        """Recent events of a subscription, after `last_event_id` when given"""
+        subscription = self.get(subscription_id)
+        if subscription is None:
+            return []
+        with self._lock:
+            events = list(subscription.events)
+        if not last_event_id:
+            return events
+        for position, event in enumerate(events):
+            if event['id'] == last_event_id:
+                return events[position + 1:]
+        if last_event_id.partition('-')[0] == self.worker:
+            # ours, but already dropped from the history: all of it is newer
+            return events
+        return []
+
+    def listen(self, subscription_id, maxsize=100):
+        """Queue receiving the subscription's events; None means it was deleted"""
+        listener = queue.Queue(maxsize=maxsize)
+        self.get(subscription_id)
+        with self._lock:
+            subscription = self.subscriptions.get(subscription_id)
+            if subscription is None:
+                return None
+            subscription._listeners.add(listener)
+        return listener
+
+    def unlisten(self, subscription_id, listener):
+        with self._lock:
+            subscription = self.subscriptions.get(subscription_id)
+            if subscription is not None:
+                subscription._listeners.discard(listener)
+
+    def on_snapshot(self, line, old, new, delta):
+        """Emit delay events for watched routes whose predictions slipped"""
+        self.sync()
+        if delta is None or not self.by_route or not delta['changed']:
+            return
+        table, previous = new.trips, old.trips
+        strings, previous_strings = table.strings, previous.strings
+        signatures, previous_signatures = new.signatures(), old.signatures()
+        now = self.clock()
+        for record in delta['changed']:
+            trip = signatures[record['trip_id']][0]
+            route_id = strings[table.route_id[trip]]
+            watchers = self.by_route.get(route_id)
+            if not watchers:
+                continue
+            before = {
+                previous_strings[previous.stop_id[row]]: previous.event_time(row)
+                for row in previous.stop_rows(previous_signatures[record['trip_id']][0])
+            }
+            slip, slip_stop = 0, None
+            for row in table.stop_rows(trip):
+                stop_id = strings[table.stop_id[row]]
+                was = before.get(stop_id)
+                if was and was > now and table.event_time(row) - was > slip:
+                    slip, slip_stop = table.event_time(row) - was, stop_id
+            if slip_stop is None:
+                continue
+            direction = strings[table.direction[trip]] or None
+            event = {
+                'type': 'delay',
+                'route_id': route_id,
+                'direction': direction,
+                'trip_id': record['trip_id'],
+                'stop_id': slip_stop,
+                'delay_seconds': slip,
+                'feed': line,
+            }
+            for subscription_id in list(watchers):
+                subscription = self.subscriptions.get(subscription_id)
+                if subscription is None or slip < subscription.min_delay:
+                    continue
+                if subscription.direction and subscription.direction != direction:
+                    continue
+                self._emit(subscription, event)
+
+    def on_accessibility(self, index):
+        """Emit outage and maintenance events for what changed since the last index"""
+        self.sync()
+        outages = {}
+        upcoming = {}
+        for key, station in index.stations.items():
+            for outage in station['outages']:
+                outages[(key, outage['equipment_id'] or '', outage['equipment_type'])] = outage
+            for outage in station['upcoming']:
+                upcoming[(key, outage['equipment_id'] or '', outage['equipment_type'], outage['start_date'])] = outage
+
+        with self._lock:
+            previous_outages, previous_upcoming = self._outages, self._upcoming
+            self._index, self._outages, self._upcoming = index, outages, upcoming
+        if previous_outages is None:
+            # first index: a baseline, not a flood of "new" outages
+            return
+
+        changes = [
+            ('outage_started', key, outages[key], ('outage',)) for key in outages.keys() - previous_outages.keys()
+        ] + [
+            ('outage_ended', key, previous_outages[key], ('outage',))
+            for key in previous_outages.keys() - outages.keys()
+        ] + [
+            ('maintenance_scheduled', key, upcoming[key], ('maintenance',))
+            for key in upcoming.keys() - previous_upcoming.keys()
+        ] + [
+            ('maintenance_cancelled', key, previous_upcoming[key], ('maintenance',))
+            for key in previous_upcoming.keys() - upcoming.keys()
+        ]
+        for event_type, key, record, kinds in changes:
+            station_key, equipment_id = key[0], key[1]
+            watchers = set(self.by_station.get(station_key, ()))
+            if equipment_id:
+                watchers |= self.by_equipment.get(equipment_id.upper(), set())
+            if not watchers:
+                continue
+            event = dict(record, type=event_type)
+            for subscription_id in watchers:
+                subscription = self.subscriptions.get(subscription_id)
+                if subscription is not None and subscription.kind in kinds:
+                    self._emit(subscription, event)
+
+    def _emit(self, subscription, event):
+        event = dict(event, id=f"{self.worker}-{next(self._sequence)}", subscription_id=subscription.id,
+                     time=self.clock())
+        with self._lock:
+            subscription.events.append(event)
+            listeners = list(subscription._listeners)
+        for listener in listeners:
+            try:
+                listener.put_nowait(event)
+            except queue.Full:
+                # a reader that fell behind misses events; history keeps the latest
+                logger.warning("subscription listener full subscription=%s", subscription.id)
+        if subscription.webhook and (self.store is None or self.store.is_leader()):
+            # every worker sees the event; one of them delivers it
+            self._webhooks.submit(self._deliver, subscription.webhook, event)
+
+    def _deliver(self, url, event):
+        try:
+            # the host may resolve differently now than when it was registered
+            check_webhook(url, self.webhook_hosts)
+            self._session.post(url, json=event, timeout=self.webhook_timeout,
+                               allow_redirects=False).raise_for_status()
+        except Exception as e:
+            logger.warning("webhook delivery failed url=%s error=%s", url, e)
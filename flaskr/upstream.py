@@ -0,0 +1,542 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+def upstream_name(url):
+    """Short label for an upstream URL ("nyct/gtfs-ace")"""
+    return unquote(url.rstrip('/').rsplit('/', 1)[-1])
+
+
+class Entry:
+    """The last good response body for one upstream URL"""
+
+    def __init__(self, url, content, encoding=None, etag=None, last_modified=None, revision=1):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.revision = revision
+        self.fetched_at = time.time()
+        self._parsed = {}
+        self._parse_lock = threading.Lock()
+
+    @property
+    def age(self):
+        return max(0.0, time.time() - self.fetched_at)
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def chunks(self, size=65536):
+        """The body as consecutive `size`-byte memoryviews, without copying it"""
+        view = memoryview(self.content)
+        for offset in range(0, len(view), size):
+            yield view[offset:offset + size]
+
+    def parse(self, parser):
+        """Run `parser` over the body once and memoize the result.
+
+        An Entry is kept across 304 responses, so a feed that has not changed
+        upstream is never parsed twice.
+        """
+        try:
+            return self._parsed[parser]
+        except KeyError:
+            pass
+        with self._parse_lock:
+            if parser not in self._parsed:
+                self._parsed[parser] = parser(self.content)
+            return self._parsed[parser]
+
+
+class UpstreamUnavailable(Exception):
+    """Raised without a network call while an upstream is known to be failing"""
+
+
+class Health:
+    """Circuit breaker state and recent latencies of one upstream.
+
+    After `threshold` consecutive failures the circuit opens: calls fail
+    fast for `cooldown` seconds, then a single probe is let through
+    (half-open) and its outcome closes or re-opens the circuit. Every
+    failure is also remembered for `negative_ttl` seconds, during which
+    calls fail fast without touching the network.
+    """
+
+    def __init__(self, threshold=5, cooldown=30, negative_ttl=5):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.negative_ttl = negative_ttl
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.last_error = None
+        self.last_error_at = None
+        self.last_success_at = None
+        self.latencies = deque(maxlen=200)
+        self.hedges = 0
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """Raise UpstreamUnavailable unless a call may go out now"""
+        now = time.time()
+        with self.lock:
+            if self.last_error_at is not None and now - self.last_error_at < self.negative_ttl:
+                raise UpstreamUnavailable(f"failed {now - self.last_error_at:.1f}s ago: {self.last_error}")
+            if self.state == 'open':
+                if now - self.opened_at < self.cooldown:
+                    raise UpstreamUnavailable(f"circuit open: {self.last_error}")
+                self.state = 'half-open'
+            if self.state == 'half-open':
+                if self.probing:
+                    raise UpstreamUnavailable(f"circuit half-open: {self.last_error}")
+                self.probing = True
+
+    def succeeded(self, latency):
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.probing = False
+            self.last_success_at = time.time()
+            self.latencies.append(latency)
+
+    def failed(self, error):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            self.last_error = str(error)
+            self.last_error_at = time.time()
+            if self.state == 'half-open' or self.failures >= self.threshold:
+                if self.state != 'open':
+                    logger.warning("circuit opened failures=%d error=%s", self.failures, error)
+                self.state = 'open'
+                self.opened_at = self.last_error_at
+
+    def percentile(self, q):
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q / 100))]
+
+    def describe(self):
+        now = time.time()
+        p50, p95 = self.percentile(50), self.percentile(95)
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'last_error': self.last_error,
+                'last_error_age': round(now - self.last_error_at, 1) if self.last_error_at else None,
+                'last_success_age': round(now - self.last_success_at, 1) if self.last_success_at else None,
+                'retry_in': round(max(0.0, self.opened_at + self.cooldown - now), 1) if self.state == 'open' else 0,
+                'latency_p50': round(p50, 3) if p50 is not None else None,
+                'latency_p95': round(p95, 3) if p95 is not None else None,
+                'hedges': self.hedges,
+            }
+
+
+def _check_status(response, previous):
+    # raise for an error status, or for a 304 when there is no cached copy it could confirm
+    if response.status_code == 304:
+        if previous is None:
+            raise requests.HTTPError('304 Not Modified without a cached copy to confirm', response=response)
+        return
+    response.raise_for_status()
+
+
+class _Call:
+    # a fetch that other threads can wait on instead of issuing their own
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class UpstreamClient:
+    """Shared fetch layer for every MTA endpoint.
+
+    - one pooled keep-alive `requests.Session` for all routes
+    - concurrent requests for the same URL share a single in-flight fetch
+    - responses are fresh for a per-URL TTL, then served stale for up to
+      `max_stale` more seconds while a background refresh runs
+    - revalidation uses If-None-Match / If-Modified-Since, so an unchanged
+      feed costs a 304 and keeps its already-parsed results
+    - with a SharedStore, only the lease holder goes upstream and writes
+      every body through to the store; other processes read it from there,
+      and store what they had to fetch themselves; the store numbers the
+      revisions
+    - every request has a (connect, read) `timeout`; each upstream has a
+      circuit breaker with negative caching (see Health), and while it is
+      failing `fetch()` keeps serving its last good entry, however old
+    - once `hedge_percentile` of an upstream's latency is known, a request
+      still running after that long gets a second, hedged request and the
+      first response wins
+    - `fetch_chunks()` hands a downloading body to its caller chunk by
+      chunk, so parsing overlaps the transfer; the complete body is then
+      cached like any other
+    """
+
+    def __init__(self, ttls=None, default_ttl=30, max_stale=120, pool_size=20, metrics=None, store=None,
+                 timeout=(3.05, 10), failure_threshold=5, cooldown=30, negative_ttl=5, hedge_percentile=95,
+                 hedge_min_delay=0.05):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.store = store
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.negative_ttl = negative_ttl
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.health = {}
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._entries = {}
+        self._listeners = []
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._background = ThreadPoolExecutor(max_workers=4, thread_name_prefix='upstream-revalidate')
+        self._hedging = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='upstream-hedge')
+
+    def add_listener(self, callback):
+        """Call `callback(entry)` with every new revision fetched from upstream"""
+        self._listeners.append(callback)
+
+    def ttl_for(self, url):
+        return self.ttls.get(url, self.default_ttl)
+
+    def peek(self, url):
+        """Return the cached entry for `url` without touching the network"""
+        return self._entries.get(url)
+
+    def fetch(self, url, ttl=None):
+        """Return an Entry for `url`, going upstream only when needed"""
+        if ttl is None:
+            ttl = self.ttl_for(url)
+        entry = self._entries.get(url)
+        if entry is not None:
+            if entry.age <= ttl:
+                self.metrics.inc('subway_cache_requests_total', cache='upstream', result='hit')
+                return entry
+            if entry.age <= ttl + self.max_stale:
+                self.metrics.inc('subway_cache_requests_total', cache='upstream', result='stale')
+                self._revalidate_in_background(url)
+                return entry
+        self.metrics.inc('subway_cache_requests_total', cache='upstream', result='miss')
+        try:
+            return self.revalidate(url)
+        except Exception:
+            if entry is None:
+                raise
+            # the upstream is down: the last good copy beats an error
+            self.metrics.inc('subway_cache_requests_total', cache='upstream', result='fallback')
+            return entry
+
+    def fetch_chunks(self, url, ttl=None, chunk_size=65536):
+        """The body of `url` as byte chunks, streamed as it downloads on a cache miss.
+
+        A cached entry `fetch()` would serve (fresh, stale-while-revalidate,
+        or a follower's copy from the shared store) is handed out from
+        memory. Otherwise this generator itself makes the request (not
+        hedged: the body is consumed as it arrives) and yields each chunk as
+        it is received; once the body is complete it becomes the cached
+        entry, exactly as if `fetch()` had downloaded it. A failure before
+        the first chunk falls back to the last good entry; one after it is
+        raised.
+        """
+        if ttl is None:
+            ttl = self.ttl_for(url)
+        previous = self._entries.get(url)
+        if (previous is not None and previous.age <= ttl + self.max_stale) or \
+                (self.store is not None and not self.store.is_leader()):
+            yield from self.fetch(url, ttl).chunks(chunk_size)
+            return
+        self.metrics.inc('subway_cache_requests_total', cache='upstream', result='miss')
+        with self._lock:
+            call = self._inflight.get(url)
+            leader = call is None
+            if leader:
+                call = self._inflight[url] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is None:
+                yield from call.result.chunks(chunk_size)
+                return
+            if previous is None:
+                raise call.error
+            yield from self._fallback(previous, chunk_size)
+            return
+
+        try:
+            opened = self._open(url, previous)
+        except Exception as e:
+            call.error = e
+            self._finish(url, call)
+            if previous is None:
+                raise
+            yield from self._fallback(previous, chunk_size)
+            return
+        if opened is None:
+            call.result = previous
+            self._finish(url, call)
+            yield from previous.chunks(chunk_size)
+            return
+        try:
+            yield from self._download(url, previous, *opened, call, chunk_size)
+        except Exception as e:
+            # part of the body is already out: too late to fall back
+            call.error = e
+            raise
+        finally:
+            self._finish(url, call)
+
+    def _finish(self, url, call):
+        # release the threads waiting on a streamed download
+        if call.result is None and call.error is None:
+            # the caller stopped reading before the body was complete
+            call.error = UpstreamUnavailable('download abandoned')
+        with self._lock:
+            del self._inflight[url]
+        call.event.set()
+
+    def _fallback(self, entry, chunk_size):
+        # the upstream is down: the last good copy beats an error
+        self.metrics.inc('subway_cache_requests_total', cache='upstream', result='fallback')
+        yield from entry.chunks(chunk_size)
+
+    def _open(self, url, previous):
+        # (streamed response, start time) for `url`; None if upstream confirmed `previous` (304)
+        name = upstream_name(url)
+        health = self.health_for(url)
+        try:
+            health.admit()
+        except UpstreamUnavailable:
+            self.metrics.inc('subway_upstream_rejected_total', upstream=name)
+            raise
+        started = time.perf_counter()
+        try:
+            with self.metrics.phase('fetch'):
+                response = self.session.get(url, headers=self._validators(previous), timeout=self.timeout,
+                                            stream=True)
+            self.metrics.inc('subway_upstream_requests_total', upstream=name, status=response.status_code)
+            _check_status(response, previous)
+        except Exception as e:
+            self.metrics.inc('subway_upstream_errors_total', upstream=name)
+            health.failed(e)
+            raise
+        if response.status_code == 304:
+            response.close()
+            health.succeeded(time.perf_counter() - started)
+            self._confirm(previous)
+            return None
+        return response, started
+
+    def _download(self, url, previous, response, started, call, chunk_size):
+        # yield the body of an open response as it arrives, then install it
+        name = upstream_name(url)
+        health = self.health_for(url)
+        parts = []
+        try:
+            for chunk in response.iter_content(chunk_size):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            self.metrics.inc('subway_upstream_errors_total', upstream=name)
+            health.failed(e)
+            raise
+        finally:
+            response.close()
+        health.succeeded(time.perf_counter() - started)
+        content = b''.join(parts)
+        self.metrics.inc('subway_upstream_bytes_total', len(content), upstream=name)
+        call.result = self._install(url, previous, response, content)
+
+    def health_for(self, url):
+        health = self.health.get(url)
+        if health is None:
+            health = self.health.setdefault(url, Health(self.failure_threshold, self.cooldown, self.negative_ttl))
+        return health
+
+    def describe_health(self):
+        """Breaker state, errors and latency of every upstream called so far"""
+        return {upstream_name(url): health.describe() for url, health in self.health.items()}
+
+    def revalidate(self, url):
+        """Fetch `url` now, joining any fetch of it already in flight"""
+        if self.store is not None and not self.store.is_leader():
+            entry = self._shared(url)
+            if entry is not None:
+                return entry
+        with self._lock:
+            call = self._inflight.get(url)
+            leader = call is None
+            if leader:
+                call = self._inflight[url] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._fetch(url)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            call.event.set()
+
+    def _shared(self, url):
+        # the leader's copy of `url`, or None if the store has nothing recent
+        previous = self._entries.get(url)
+        row = self.store.get_document(url, previous.revision if previous is not None else 0)
+        if row is None:
+            return None
+        self.metrics.inc('subway_cache_requests_total', cache='shared', result='hit')
+        if row['content'] is None:
+            previous.fetched_at = row['fetched_at']
+            return previous
+        entry = Entry(url, row['content'], encoding=row['encoding'], etag=row['etag'],
+                      last_modified=row['last_modified'], revision=row['revision'])
+        entry.fetched_at = row['fetched_at']
+        self._entries[url] = entry
+        return entry
+
+    def _revalidate_in_background(self, url):
+        with self._lock:
+            if url in self._inflight:
+                return
+        self._background.submit(self._revalidate_quietly, url)
+
+    def _revalidate_quietly(self, url):
+        try:
+            self.revalidate(url)
+        except Exception as e:
+            # the stale entry keeps being served until a refresh succeeds
+            logger.warning("background revalidation failed upstream=%s error=%s", upstream_name(url), e)
+
+    def _validators(self, previous):
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers['If-None-Match'] = previous.etag
+            if previous.last_modified:
+                headers['If-Modified-Since'] = previous.last_modified
+        return headers
+
+    def _fetch(self, url):
+        previous = self._entries.get(url)
+        headers = self._validators(previous)
+
+        name = upstream_name(url)
+        health = self.health_for(url)
+        try:
+            health.admit()
+        except UpstreamUnavailable:
+            self.metrics.inc('subway_upstream_rejected_total', upstream=name)
+            raise
+        started = time.perf_counter()
+        try:
+            with self.metrics.phase('fetch'):
+                response = self._get(url, headers, health)
+            self.metrics.inc('subway_upstream_requests_total', upstream=name, status=response.status_code)
+            self.metrics.inc('subway_upstream_bytes_total', len(response.content), upstream=name)
+            _check_status(response, previous)
+        except Exception as e:
+            self.metrics.inc('subway_upstream_errors_total', upstream=name)
+            health.failed(e)
+            raise
+        health.succeeded(time.perf_counter() - started)
+        if response.status_code == 304:
+            return self._confirm(previous)
+        return self._install(url, previous, response, response.content)
+
+    def _install(self, url, previous, response, content):
+        # make a 200 response's body the current entry for `url`
+        if previous is not None and content == previous.content:
+            # upstream ignored our validators but nothing changed
+            previous.etag = response.headers.get('ETag', previous.etag)
+            previous.last_modified = response.headers.get('Last-Modified', previous.last_modified)
+            return self._confirm(previous)
+
+        revision = previous.revision + 1 if previous is not None else 1
+        entry = Entry(
+            url,
+            content,
+            encoding=response.encoding,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            revision=revision,
+        )
+        if self.store is not None:
+            # numbered by the store, after whatever any process stored before
+            entry.revision = self.store.put_document(entry)
+        self._entries[url] = entry
+        if self.store is None or self._publishing():
+            for listener in self._listeners:
+                try:
+                    listener(entry)
+                except Exception:
+                    logger.exception("upstream listener failed upstream=%s", upstream_name(url))
+        return entry
+
+    def _publishing(self):
+        return self.store is not None and self.store.is_leader()
+
+    def _get(self, url, headers, health):
+        delay = None
+        if self.hedge_percentile is not None and len(health.latencies) >= 20:
+            delay = max(self.hedge_min_delay, health.percentile(self.hedge_percentile))
+        if delay is None:
+            return self.session.get(url, headers=headers, timeout=self.timeout)
+
+        first = self._hedging.submit(self.session.get, url, headers=headers, timeout=self.timeout)
+        try:
+            return first.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        # slower than `hedge_percentile` of recent calls: race a second request
+        with health.lock:
+            health.hedges += 1
+        self.metrics.inc('subway_upstream_hedges_total', upstream=upstream_name(url))
+        pending = {first, self._hedging.submit(self.session.get, url, headers=headers, timeout=self.timeout)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+    def _confirm(self, entry):
+        # upstream says `entry` is still current
+        entry.fetched_at = time.time()
+        if self._publishing():
+            self.store.touch_document(entry.url, entry.fetched_at)
+        return entry
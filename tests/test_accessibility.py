@@ -0,0 +1,75 @@
+import io
+
+import requests
+from requests.adapters import BaseAdapter
+
+from accessibility import iter_current_outages, iter_elements
+from app import create_app
+
+OUTAGES = (
+    b'<?xml version="1.0" encoding="UTF-8"?><NYCOutages>'
+    + b''.join(
+        f"<outage><station>Station {number}</station><trainno>A/C/E</trainno><equipment>{kind}{number:03d}</equipment>"
+        f"<equipmenttype>{kind}</equipmenttype><serving>street to mezzanine</serving><ADA>Y</ADA>"
+        f"<outagedate>10/18/2026 01:00:00 AM</outagedate><reason>Repair</reason>"
+        f"<estimatedreturntoservice>10/19/2026 01:00:00 AM</estimatedreturntoservice></outage>".encode()
+        for number, kind in enumerate(['EL', 'ES', 'EL'] * 100)
+    )
+    + b'</NYCOutages>'
+)
+
+
+class Document(BaseAdapter):
+    """Answers every request with `body`, as the MTA would"""
+
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(self.body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def chunked(body, size=97):
+    return (body[offset:offset + size] for offset in range(0, len(body), size))
+
+
+def test_outages_stream_in_small_chunks():
+    outages = list(iter_current_outages(chunked(OUTAGES)))
+    assert len(outages) == 300
+    assert outages[1] == {
+        'station': 'Station 1',
+        'equipment_id': 'ES001',
+        'equipment_type': 'ES',
+        'location': 'street to mezzanine',
+        'reason': 'Repair',
+        'outage_date': '10/18/2026 01:00:00 AM',
+        'estimated_return': '10/19/2026 01:00:00 AM',
+        'lines': 'A/C/E',
+    }
+
+
+def test_nested_tags_are_found_under_any_element():
+    assert [fields['id'] for fields in iter_elements([b'<a><b><c id="1"/><c id="2"/></b><c id="3"/></a>'], 'c')] \
+        == ['1', '2', '3']
+
+
+def test_elevator_route_lists_the_outage_document(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'shared.db'), 'SHARED_STORE_ENABLED': False,
+                      'FEED_POLLER_ENABLED': False, 'ARCHIVE_ENABLED': False})
+    app.extensions['upstream'].session.mount(app.config['MTA_BASE_URL'], Document(OUTAGES))
+
+    body = app.test_client().get('/mta/elevator').get_json()
+    assert (len(body['elevators']), len(body['escalators'])) == (200, 100)
+    assert body['elevators'][0]['station'] == 'Station 0'
+    assert body['elevators'][0]['location'] == 'street to mezzanine'
+    assert body['elevators'][0]['status'] == 'Out of Service - Repair'
+    assert body['escalators'][0]['station'] == 'Station 1'
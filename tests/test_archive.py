@@ -0,0 +1,83 @@
+import time
+
+from google.transit import gtfs_realtime_pb2
+
+from archive import Archive, join_message, split_message
+
+SEGMENT = 100
+
+
+def feed(version, ntrips=30):
+    """A FeedMessage in which one trip changes per version, and entity ids are renumbered"""
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = '2.0'
+    message.header.timestamp = 1000 + version
+    for trip in range(ntrips):
+        entity = message.entity.add()
+        entity.id = str(trip + version)
+        entity.trip_update.trip.trip_id = f"trip-{trip}"
+        for stop in range(10):
+            update = entity.trip_update.stop_time_update.add()
+            update.stop_id = f"A{stop:02d}S"
+            update.arrival.time = 2000 + trip * 7919 % 100003 + stop * 90 + (version if trip == version % ntrips else 0)
+    return message.SerializeToString()
+
+
+def start_time():
+    # recent, so retention keeps every segment
+    now = int(time.time())
+    return now - now % SEGMENT - 10 * SEGMENT
+
+
+def test_split_and_join_are_lossless():
+    content = feed(3)
+    assert join_message(split_message(content)) == content
+
+
+def test_round_trip_across_segments(tmp_path):
+    archive = Archive(str(tmp_path), segment_seconds=SEGMENT, keyframe_interval=4)
+    start = start_time()
+    written = []
+    for version in range(12):
+        timestamp = start + version * 25
+        archive.append('ace', feed(version), version + 1, timestamp, delta=True)
+        written.append((timestamp, 'ace', version + 1, feed(version)))
+        if version % 3 == 0:
+            document = f"<outages>{version}</outages>".encode()
+            archive.append('ene-current', document, version + 1, timestamp + 1)
+            written.append((timestamp + 1, 'ene-current', version + 1, document))
+    archive.close()
+
+    assert len(archive.segments()) == 3
+    assert list(archive.read()) == sorted(written)
+    assert list(archive.read(streams={'ace'})) == [record for record in sorted(written) if record[1] == 'ace']
+
+
+def test_deltas_are_smaller_than_keyframes(tmp_path):
+    archive = Archive(str(tmp_path), segment_seconds=SEGMENT)
+    start = start_time()
+    keyframe = archive.append('ace', feed(0, ntrips=200), 1, start, delta=True)
+    delta = archive.append('ace', feed(1, ntrips=200), 2, start + 1, delta=True)
+    archive.close()
+    assert delta < keyframe / 4
+    assert [content for _, _, _, content in archive.read()] == [feed(0, ntrips=200), feed(1, ntrips=200)]
+
+
+def test_range_read_starts_from_the_state_at_start(tmp_path):
+    archive = Archive(str(tmp_path), segment_seconds=SEGMENT, keyframe_interval=4)
+    start = start_time()
+    # the ENE document only changes in the first segment
+    archive.append('ene-current', b'<outages/>', 1, start + 1)
+    for version in range(10):
+        archive.append('ace', feed(version), version + 1, start + version * 30, delta=True)
+    archive.close()
+
+    records = list(archive.read(start + 200, start + 250, initial=True))
+    assert [(name, revision) for _, name, revision, _ in records] == [
+        ('ene-current', 1),
+        ('ace', 7),
+        ('ace', 8),
+        ('ace', 9),
+    ]
+    assert records[1][3] == feed(6)
+    assert records[-1][3] == feed(8)
@@ -0,0 +1,110 @@
+from google.transit import gtfs_realtime_pb2
+
+from columnar import TripTable
+from deltas import DeltaLog, compose_deltas, diff_snapshots
+from feeds import Snapshot
+
+
+def snapshot(version, trips):
+    """A snapshot of feed 'ace' holding `trips`: {trip_id: first arrival time}"""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    for trip_id, arrival in trips.items():
+        entity = feed.entity.add()
+        entity.id = trip_id
+        entity.trip_update.trip.trip_id = trip_id
+        entity.trip_update.trip.route_id = 'A'
+        for offset, stop_id in enumerate(('A02S', 'A03S')):
+            update = entity.trip_update.stop_time_update.add()
+            update.stop_id = stop_id
+            update.arrival.time = arrival + 120 * offset
+    return Snapshot('ace', version, TripTable.from_feed(feed), fetched_at=0)
+
+
+def normalized(delta):
+    return {
+        'version': delta['version'],
+        'since': delta['since'],
+        'added': sorted((record['trip_id'], record['stop_time_updates'][0]['arrival_time'])
+                        for record in delta['added']),
+        'changed': sorted((record['trip_id'], record['stop_time_updates'][0]['arrival_time'])
+                          for record in delta['changed']),
+        'removed': sorted(delta['removed']),
+    }
+
+
+VERSIONS = [
+    {'t1': 1000, 't2': 2000, 't3': 3000},
+    # t1 slips, t3 leaves, t4 appears
+    {'t1': 1100, 't2': 2000, 't4': 4000},
+    # t4 slips again, t3 comes back, t5 appears and t2 leaves
+    {'t1': 1100, 't3': 3000, 't4': 4100, 't5': 5000},
+    # t5 was only there for one version
+    {'t1': 1100, 't3': 3000, 't4': 4100},
+]
+
+
+def test_diff_lists_added_changed_and_removed_trips():
+    delta = diff_snapshots(snapshot(1, VERSIONS[0]), snapshot(2, VERSIONS[1]))
+    assert normalized(delta) == {
+        'version': 2,
+        'since': 1,
+        'added': [('t4', 4000)],
+        'changed': [('t1', 1100)],
+        'removed': ['t3'],
+    }
+
+
+def apply(trips, delta):
+    """What a client holding `trips` ({trip_id: record}) has after `delta`"""
+    trips = dict(trips)
+    for trip_id in delta['removed']:
+        del trips[trip_id]
+    for record in delta['added'] + delta['changed']:
+        trips[record['trip_id']] = record
+    return trips
+
+
+def test_composed_deltas_lead_to_the_same_trips_as_the_direct_diff():
+    snapshots = [snapshot(version, trips) for version, trips in enumerate(VERSIONS, 1)]
+    states = [{record['trip_id']: record for record in s.records(time_format='epoch')} for s in snapshots]
+    deltas = [diff_snapshots(old, new) for old, new in zip(snapshots, snapshots[1:])]
+    for start in range(len(deltas)):
+        for end in range(start + 1, len(deltas) + 1):
+            composed = compose_deltas(deltas[start:end])
+            assert (composed['since'], composed['version']) == (start + 1, end + 1)
+            assert apply(states[start], composed) == states[end]
+            # nothing is listed as both added and removed
+            listed = [record['trip_id'] for record in composed['added'] + composed['changed']]
+            assert len(set(listed)) == len(listed) and not set(listed) & set(composed['removed'])
+
+
+def test_trip_added_then_removed_is_dropped():
+    deltas = [
+        diff_snapshots(snapshot(2, VERSIONS[1]), snapshot(3, VERSIONS[2])),
+        diff_snapshots(snapshot(3, VERSIONS[2]), snapshot(4, VERSIONS[3])),
+    ]
+    composed = normalized(compose_deltas(deltas))
+    assert 't5' not in [trip_id for trip_id, _ in composed['added'] + composed['changed']]
+    assert 't5' not in composed['removed']
+
+
+def test_trip_removed_and_added_back_is_changed():
+    deltas = [
+        diff_snapshots(snapshot(1, VERSIONS[0]), snapshot(2, VERSIONS[1])),
+        diff_snapshots(snapshot(2, VERSIONS[1]), snapshot(3, VERSIONS[2])),
+    ]
+    composed = normalized(compose_deltas(deltas))
+    assert ('t3', 3000) in composed['changed']
+    assert 't3' not in composed['removed']
+
+
+def test_delta_log_composes_from_any_buffered_version():
+    log = DeltaLog(size=2)
+    snapshots = [snapshot(version, trips) for version, trips in enumerate(VERSIONS, 1)]
+    for old, new in zip(snapshots, snapshots[1:]):
+        log.append(diff_snapshots(old, new))
+    assert normalized(log.since(3)) == normalized(diff_snapshots(snapshots[2], snapshots[3]))
+    assert (log.since(2)['since'], log.since(2)['version']) == (2, 4)
+    # version 1 fell out of the two-delta buffer: the reader has to resync
+    assert log.since(1) is None
@@ -0,0 +1,20 @@
+import time
+
+from fanout import FanOut
+
+
+def test_per_task_timeouts_fall_back_to_the_default():
+    fanout = FanOut(timeout=0.05)
+    tasks = {'fast': lambda: 'ok', 'slow': lambda: time.sleep(0.5)}
+    for timeout in ({}, {'fast': 1}):
+        results, errors = fanout.run(tasks, timeout)
+        assert results == {'fast': 'ok'}
+        assert errors == {'slow': 'timed out after 0.05s'}
+
+
+def test_errors_are_kept_per_task():
+    def fail():
+        raise ValueError('upstream down')
+
+    results, errors = FanOut().run({'ok': lambda: 1, 'bad': fail})
+    assert results == {'ok': 1} and errors == {'bad': 'upstream down'}
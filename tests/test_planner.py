@@ -0,0 +1,66 @@
+from planner import JourneyPlanner, Timetable
+
+
+def build(trips):
+    timetable = Timetable()
+    for trip_id, route_id, stops in trips:
+        timetable.add_trip(trip_id, route_id, 'S', True, stops)
+    timetable.seal()
+    return timetable
+
+
+def summary(journeys):
+    return [(journey['arrival'], [(leg['from'], leg['to']) for leg in journey['legs']]) for journey in journeys]
+
+
+CHAIN = [
+    ('t1', '1', [('A', 0, 10), ('B', 100, 100)]),
+    ('t2', '2', [('B', 110, 110), ('C', 200, 200)]),
+    ('t3', '3', [('C', 210, 210), ('D', 300, 300)]),
+    ('t4', '4', [('D', 310, 310), ('V', 400, 400)]),
+    ('t5', '5', [('B', 120, 120), ('Y', 500, 500)]),
+]
+
+
+def test_direct_ride():
+    journeys = JourneyPlanner().plan(build(CHAIN), 'B', 'Y', 0)
+    assert summary(journeys) == [(500, [('B', 'Y')])]
+    assert journeys[0]['transfers'] == 0
+
+
+def test_transfers_are_followed_in_order():
+    journeys = JourneyPlanner().plan(build(CHAIN), 'A', 'V', 0)
+    assert summary(journeys) == [(400, [('A', 'B'), ('B', 'C'), ('C', 'D'), ('D', 'V')])]
+    assert journeys[0]['transfers'] == 3
+
+
+def test_consecutive_queries_do_not_leak_labels():
+    timetable = build([
+        ('t0', '0', [('A', 5, 5), ('Y', 100, 100)]),
+        ('t1', '1', [('A', 10, 10), ('P', 100, 100)]),
+        ('t2', '2', [('P', 110, 110), ('C', 200, 200)]),
+        ('t3', '3', [('C', 210, 210), ('D', 300, 300)]),
+        ('t4', '4', [('D', 310, 310), ('V', 400, 400)]),
+        ('t5', '5', [('B', 120, 120), ('Y', 500, 500)]),
+    ])
+    planner = JourneyPlanner()
+    assert summary(planner.plan(timetable, 'A', 'V', 0)) == [(400, [('A', 'P'), ('P', 'C'), ('C', 'D'), ('D', 'V')])]
+    # the second query stops after two rounds; later rounds must not be read
+    # from the first query's labels
+    assert summary(planner.plan(timetable, 'B', 'Y', 0)) == [(500, [('B', 'Y')])]
+    assert summary(planner.plan(timetable, 'B', 'Y', 0)) == summary(JourneyPlanner().plan(timetable, 'B', 'Y', 0))
+
+
+def test_pareto_set_prefers_fewer_transfers_only_when_slower():
+    timetable = build([
+        ('slow', 'S', [('A', 5, 5), ('Z', 1000, 1000)]),
+        ('a', 'A', [('A', 10, 10), ('M', 100, 100)]),
+        ('b', 'B', [('M', 110, 110), ('Z', 300, 300)]),
+    ])
+    journeys = JourneyPlanner().plan(timetable, 'A', 'Z', 0)
+    assert [(journey['transfers'], journey['arrival']) for journey in journeys] == [(0, 1000), (1, 300)]
+
+
+def test_missed_departure_is_not_boarded():
+    timetable = build([('t', '1', [('A', 50, 50), ('B', 100, 100)])])
+    assert JourneyPlanner().plan(timetable, 'A', 'B', 60) == []
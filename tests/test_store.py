@@ -0,0 +1,22 @@
+import time
+
+from store import SharedStore
+
+
+def test_upstreams_sharing_a_database_keep_their_own_lease_and_snapshots(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    real = SharedStore(path, upstream='https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/')
+    bench = SharedStore(path, upstream='http://127.0.0.1:8001/Dataservice/mtagtfsfeeds/')
+    assert real.acquire() and bench.acquire()
+
+    bench.put_snapshot('http://127.0.0.1:8001/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-ace', 7, b'synthetic', time.time())
+    assert real.get_snapshot('https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-ace') is None
+    assert bench.get_snapshot('http://127.0.0.1:8001/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-ace')[0] == 7
+
+
+def test_lease_has_one_holder_per_upstream(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    first, second = SharedStore(path, upstream='https://example.com/'), SharedStore(path, upstream='https://example.com/')
+    assert first.acquire() and not second.acquire()
+    first.stop()
+    assert second.acquire()
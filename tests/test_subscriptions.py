@@ -0,0 +1,191 @@
+import pytest
+from google.transit import gtfs_realtime_pb2
+
+from accessibility import AccessibilityIndex
+from app import create_app
+from columnar import TripTable
+from deltas import diff_snapshots
+from feeds import Snapshot
+from store import SharedStore
+from subscriptions import SubscriptionEngine, check_webhook
+
+NOW = 10000
+
+
+def snapshot(version, trips):
+    """Feed snapshot of `trips`: {trip_id: (route_id, arrival at the first of three stops)}"""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    for trip_id, (route_id, arrival) in trips.items():
+        entity = feed.entity.add()
+        entity.id = trip_id
+        entity.trip_update.trip.trip_id = trip_id
+        entity.trip_update.trip.route_id = route_id
+        for offset, stop_id in enumerate(('A02', 'A03', 'A05')):
+            update = entity.trip_update.stop_time_update.add()
+            update.stop_id = stop_id + trip_id[-1]
+            update.arrival.time = arrival + 120 * offset
+    return Snapshot('ace', version, TripTable.from_feed(feed), fetched_at=NOW)
+
+
+def feed_update(engine, before, after):
+    old, new = snapshot(1, before), snapshot(2, after)
+    engine.on_snapshot('ace', old, new, diff_snapshots(old, new))
+
+
+def outage(station, equipment_id, equipment_type='EL'):
+    return {
+        'station': station,
+        'equipment_id': equipment_id,
+        'equipment_type': equipment_type,
+        'location': 'street to mezzanine',
+        'reason': 'Repair',
+        'outage_date': None,
+        'estimated_return': None,
+    }
+
+
+def engine(**options):
+    return SubscriptionEngine(clock=lambda: NOW, **options)
+
+
+def test_delay_reaches_only_matching_route_direction_and_threshold():
+    subscriptions = engine()
+    southbound = subscriptions.subscribe('delay', route='A', direction='S', min_delay=60)
+    northbound = subscriptions.subscribe('delay', route='A', direction='N', min_delay=60)
+    patient = subscriptions.subscribe('delay', route='A', min_delay=600)
+    other_route = subscriptions.subscribe('delay', route='C', min_delay=60)
+
+    feed_update(subscriptions,
+                {'1_A..S': ('A', NOW + 300), '2_C..S': ('C', NOW + 300)},
+                {'1_A..S': ('A', NOW + 480), '2_C..S': ('C', NOW + 300)})
+
+    [event] = southbound.events
+    assert event['type'] == 'delay'
+    assert (event['trip_id'], event['delay_seconds'], event['direction']) == ('1_A..S', 180, 'S')
+    assert event['subscription_id'] == southbound.id
+    assert not northbound.events and not patient.events and not other_route.events
+
+
+def test_delay_of_a_departed_stop_is_ignored():
+    subscriptions = engine()
+    watch = subscriptions.subscribe('delay', route='A', min_delay=60)
+    # every stop was already in the past before the update
+    feed_update(subscriptions, {'1_A..S': ('A', NOW - 1000)}, {'1_A..S': ('A', NOW - 500)})
+    assert not watch.events
+
+
+def test_outage_events_by_station_and_equipment():
+    subscriptions = engine()
+    by_station = subscriptions.subscribe('outage', station='Times Sq-42 St')
+    by_equipment = subscriptions.subscribe('outage', equipment='el123')
+    elsewhere = subscriptions.subscribe('outage', station='Atlantic Av-Barclays Ctr')
+
+    # the first index is the baseline
+    subscriptions.on_accessibility(AccessibilityIndex([outage('Times Sq-42 St', 'EL100')]))
+    assert not by_station.events
+
+    subscriptions.on_accessibility(AccessibilityIndex([outage('Times Sq-42 St', 'EL100'),
+                                                       outage('Times Sq-42 St', 'EL123')]))
+    assert [(event['type'], event['equipment_id']) for event in by_station.events] == [('outage_started', 'EL123')]
+    assert [(event['type'], event['equipment_id']) for event in by_equipment.events] == [('outage_started', 'EL123')]
+
+    subscriptions.on_accessibility(AccessibilityIndex([outage('Times Sq-42 St', 'EL123')]))
+    assert [event['type'] for event in by_station.events] == ['outage_started', 'outage_ended']
+    assert [event['type'] for event in by_equipment.events] == ['outage_started']
+    assert not elsewhere.events
+
+
+def test_unsubscribe_leaves_the_indexes_and_ends_listeners():
+    subscriptions = engine()
+    watch = subscriptions.subscribe('delay', route='A', min_delay=60)
+    listener = subscriptions.listen(watch.id)
+    assert subscriptions.unsubscribe(watch.id)
+    assert listener.get_nowait() is None
+    assert not subscriptions.by_route
+    assert not subscriptions.unsubscribe(watch.id)
+
+
+def test_invalid_subscriptions_are_rejected():
+    subscriptions = engine(max_subscriptions=1)
+    with pytest.raises(ValueError):
+        subscriptions.subscribe('delay')
+    with pytest.raises(ValueError):
+        subscriptions.subscribe('maintenance', equipment='EL123')
+    with pytest.raises(ValueError, match='disabled'):
+        subscriptions.subscribe('delay', route='A', webhook='https://example.com/hook')
+    subscriptions.subscribe('delay', route='A')
+    with pytest.raises(ValueError, match='too many'):
+        subscriptions.subscribe('delay', route='C')
+
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1/hook',
+    'http://169.254.169.254/latest/meta-data',
+    'http://10.1.2.3/hook',
+    'http://[::1]/hook',
+    'http://localhost/hook',
+    'ftp://example.com/hook',
+])
+def test_webhooks_to_non_public_addresses_are_rejected(url):
+    with pytest.raises(ValueError):
+        check_webhook(url)
+
+
+def test_webhook_host_allowlist():
+    with pytest.raises(ValueError, match='not allowed'):
+        check_webhook('https://example.com/hook', allowed_hosts={'hooks.example.org'})
+
+
+def test_subscriptions_are_shared_through_the_store(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    first, second = engine(store=SharedStore(path)), engine(store=SharedStore(path))
+    watch = first.subscribe('delay', route='A', min_delay=60)
+
+    assert second.get(watch.id).route == 'A'
+    feed_update(second, {'1_A..S': ('A', NOW + 300)}, {'1_A..S': ('A', NOW + 480)})
+    assert [event['delay_seconds'] for event in second.get(watch.id).events] == [180]
+
+    assert second.unsubscribe(watch.id)
+    first.sync()
+    assert first.get(watch.id) is None and not first.by_route
+
+
+def test_malformed_body_is_rejected_before_it_reaches_the_store(tmp_path):
+    config = {'DATABASE': str(tmp_path / 'shared.db'), 'FEED_POLLER_ENABLED': False, 'ARCHIVE_ENABLED': False}
+    client = create_app(config).test_client()
+    for body in ({'kind': 'delay', 'route': ['A']}, {'kind': 'outage', 'station': 127},
+                 {'kind': 'outage', 'equipment': {'id': 'EL1'}}, {'kind': 'delay', 'route': 'A', 'min_delay': '60'},
+                 ['delay']):
+        response = client.post('/mta/subscriptions', json=body)
+        assert response.status_code == 400 and 'error' in response.get_json()
+    assert not SharedStore(config['DATABASE']).subscription_changes()
+
+    created = client.post('/mta/subscriptions', json={'kind': 'delay', 'route': 'A'}).get_json()
+    other = create_app(config).test_client()
+    assert other.get(f"/mta/subscriptions/{created['id']}").status_code == 200
+
+
+def test_sync_skips_a_row_it_cannot_apply(tmp_path):
+    store = SharedStore(str(tmp_path / 'shared.db'))
+    store.put_subscription('bad', 'delay', {'route': ['A']}, NOW, 10)
+    store.put_subscription('good', 'delay', {'route': 'A'}, NOW, 10)
+    subscriptions = engine(store=store)
+    assert subscriptions.get('bad') is None
+    assert subscriptions.get('good').route == 'A'
+    feed_update(subscriptions, {'1_A..S': ('A', NOW + 300)}, {'1_A..S': ('A', NOW + 900)})
+    assert len(subscriptions.get('good').events) == 1
+
+
+def test_event_ids_resume_only_on_the_worker_that_emitted_them():
+    subscriptions = engine()
+    watch = subscriptions.subscribe('delay', route='A', min_delay=60)
+    for arrival in (NOW + 480, NOW + 900):
+        feed_update(subscriptions, {'1_A..S': ('A', NOW + 300)}, {'1_A..S': ('A', arrival)})
+    first, second = watch.events
+    assert first['id'].startswith(subscriptions.worker + '-') and first['id'] != second['id']
+
+    assert subscriptions.history(watch.id) == [first, second]
+    assert subscriptions.history(watch.id, first['id']) == [second]
+    assert subscriptions.history(watch.id, second['id']) == []
+    assert subscriptions.history(watch.id, 'elsewhere-1') == []